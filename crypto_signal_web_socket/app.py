@@ -1,25 +1,54 @@
 
+import argparse
 import asyncio
 import pandas as pd
-from collections import defaultdict, deque
-from my_modules.indicator import IndicatorCalculator
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from my_modules.notifier.telegram import TelegramNotifier
 from my_modules.notifier.twitter import TwitterNotifier
 from my_modules.notifier.linkedin import LinkedInNotifier
 from my_modules.db.signal_db import SignalDatabase
-from my_modules.utils import log_signal, save_signal_to_excel, update_dashboard
-from my_modules.strategy import StrategyEngine
+from my_modules.utils import log_signal, save_signal_to_excel, update_dashboard, load_config
+from my_modules.candle_buffer import CandleBuffer, FIELDS
+from my_modules.candle_aggregator import CandleAggregator, interval_to_ms
+from my_modules.candle_archive import CandleArchive
+from my_modules.prefill import PrefillPipeline
+from my_modules.ws_connection_manager import WebSocketConnectionManager, kbar_subscription, depth_subscription, parse_kbar
+from my_modules.ws_router import ChannelRouter
+from my_modules.ingest_queue import IngestPipeline
+from my_modules.compute_pool import SymbolEvaluator, LoopLagMonitor
+from my_modules.order_book import OrderBookManager
+from my_modules.strategy import IchimokuDayStrategy
+from my_modules.ws_capture import FrameRecorder, FrameReplayer, LatencyStats
 from datetime import datetime
 import threading
+import time
 
-# استفاده از نسخه جدید WebSocket ترکیبی با prefill و پشتیبانی از REST-compatible timeframes
-from websocket_client_combined_updated import LBankWebSocketClient
+CONFIG = load_config("config.json")
 
-symbol_data = defaultdict(lambda: defaultdict(lambda: deque(maxlen=200)))
+PAIRS = [
+    'btc_usdt', 'eth_usdt', 'xrp_usdt', 'bnb_usdt', 'sol_usdt', 'doge_usdt',
+    'ada_usdt', 'trx_usdt', 'link_usdt', 'sui_usdt', 'avax_usdt', 'arb_usdt',
+    'matic_usdt', 'op_usdt', 'near_usdt', 'cro_usdt', 'gno_usdt', 'apt_usdt',
+    'xmr_usdt', 'kava_usdt', 'ton_usdt', 'mnt_usdt', 'blast_usdt', 'algo_usdt',
+    'rune_usdt', 'osmo_usdt', 'rsk_usdt', 'xin_usdt', 'celo_usdt', 'ftm_usdt',
+    'eos_usdt', 'xtz_usdt', 'neo_usdt', 'ont_usdt', 'metis_usdt', 'leo_usdt'
+]
+INTERVALS = ["1min", "5min", "15min", "1h", "4h"]
+
+symbol_data = defaultdict(lambda: defaultdict(lambda: CandleBuffer(capacity=200)))
+archive = CandleArchive(CONFIG.get("ARCHIVE_DIR", "candle_archive"))
+order_books = OrderBookManager(top_n=CONFIG.get("ORDERBOOK_TOP_N", 10))
+timings = LatencyStats()
+
+# set by replay(): no archive writes, no notifications
+REPLAY = False
 
 telegram = TelegramNotifier("YOUR_TELEGRAM_BOT_TOKEN", "YOUR_CHAT_ID")
 twitter = TwitterNotifier("TWITTER_API_KEY", "TWITTER_API_SECRET", "TWITTER_ACCESS_TOKEN", "TWITTER_ACCESS_SECRET")
 db = SignalDatabase()
+# one thread: signals.xlsx, dashboard.html and the SQLite connection are not safe to share
+publisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="publish")
 
 def heartbeat():
     import time
@@ -31,60 +60,198 @@ def heartbeat():
 
 threading.Thread(target=heartbeat, daemon=True).start()
 
+def store_candle(pair, interval, kline):
+    """Returns the buffer and whether this kline closed the previous candle."""
+    buffer = symbol_data[pair][interval]
+    closed = buffer.update(kline) and len(buffer) > 1
+    if closed and not REPLAY:
+        # a new candle opened, so the previous one is closed and can be archived
+        archive.append(pair, interval, {field: values[-2:-1] for field, values in buffer.arrays().items()})
+    return buffer, closed
+
+# klines received vs. strategy evaluations they triggered
+triggers = {"klines": 0, "closes": 0}
+
 def on_kline(pair, interval, kline):
-    df = pd.DataFrame([kline], columns=["timestamp", "open_price", "high_price", "low_price", "close_price", "volume"])
-    df["timestamp"] = pd.to_datetime(df["timestamp"], unit='ms')
-    symbol_data[pair][interval].append(df.iloc[0])
-
-    if len(symbol_data[pair][interval]) >= 30:
-        full_df = pd.DataFrame(symbol_data[pair][interval])
-        full_df.set_index("timestamp", inplace=True)
-        last = full_df.iloc[-1]
-
-        timeframes = {'HHT': '4h', 'HTF': '1h', 'TTF': '15min', 'LTF': '5min', 'LLT': '1min'}
-        multi_df = {}
-        for tf_label, tf in timeframes.items():
-            if len(symbol_data[pair][tf]) >= 30:
-                df_tf = pd.DataFrame(symbol_data[pair][tf])
-                df_tf.set_index("timestamp", inplace=True)
-                df_tf = IndicatorCalculator(df_tf)                    .calculate_rsi()                    .calculate_ichimoku()                    .detect_candlestick_patterns()                    .get_df()
-                multi_df[tf_label] = df_tf
-
-        if len(multi_df) == 5:
-            orderbook_mock = {'bids': [{'quantity': 500}], 'asks': [{'quantity': 400}]}
-            strat = StrategyEngine(multi_df)
-            signal = strat.analyze_trend()                          .analyze_signal()                          .analyze_entry()                          .analyze_scalping()                          .confirm_orderbook(orderbook_mock)                          .generate_signal()
-
-            if signal in ['Buy', 'Sell']:
-                msg = f"🚨 {signal.upper()} SIGNAL | {pair.upper()} [{interval}] @ {last['close_price']:.2f}"
-                print(msg)
-                telegram.send_message(msg)
-                twitter.send_message(msg)
-                db.save_signal(pair, interval, last.name.isoformat(), last['close_price'], signal)
-                log_signal(msg)
-                save_signal_to_excel("signals.xlsx", {
-                    "symbol": pair, "interval": interval,
-                    "timestamp": last.name.isoformat(),
-                    "price": last["close_price"],
-                    "signal": signal
-                })
-                update_dashboard("dashboard.html", db.get_signals())
-
-async def run():
-    client = LBankWebSocketClient(
-        pairs=[
-            'btc_usdt', 'eth_usdt', 'xrp_usdt', 'bnb_usdt', 'sol_usdt', 'doge_usdt',
-            'ada_usdt', 'trx_usdt', 'link_usdt', 'sui_usdt', 'avax_usdt', 'arb_usdt',
-            'matic_usdt', 'op_usdt', 'near_usdt', 'cro_usdt', 'gno_usdt', 'apt_usdt',
-            'xmr_usdt', 'kava_usdt', 'ton_usdt', 'mnt_usdt', 'blast_usdt', 'algo_usdt',
-            'rune_usdt', 'osmo_usdt', 'rsk_usdt', 'xin_usdt', 'celo_usdt', 'ftm_usdt',
-            'eos_usdt', 'xtz_usdt', 'neo_usdt', 'ont_usdt', 'metis_usdt', 'leo_usdt'
-        ],
-        intervals=["1min", "5min", "15min", "1h", "4h"],
-        on_kline_callback=on_kline,
-        symbol_data=symbol_data
+    buffer, closed = store_candle(pair, interval, kline)
+    triggers["klines"] += 1
+
+    # The strategy only reads closed bars and every timeframe closes together
+    # with a 1min candle, so that is the only moment its answer can change.
+    if closed and interval == "1min" and len(buffer) >= 30:
+        triggers["closes"] += 1
+        evaluator.submit(pair, interval)
+
+def publish_signal(pair, interval, result):
+    signal = result["signal"]
+    msg = f"🚨 {signal.upper()} SIGNAL | {pair.upper()} [{interval}] @ {result['close']:.2f}"
+    print(msg)
+    telegram.send_message(msg)
+    twitter.send_message(msg)
+    db.save_signal(pair, interval, result["timestamp"], result["close"], signal)
+    log_signal(msg)
+    save_signal_to_excel("signals.xlsx", {
+        "symbol": pair, "interval": interval,
+        "timestamp": result["timestamp"],
+        "price": result["close"],
+        "signal": signal
+    })
+    update_dashboard("dashboard.html", db.get_signals())
+
+def on_evaluated(pair, interval, result):
+    # the book lives on the loop thread, so confirm against the latest depth here
+    book = order_books.books.get(pair)
+    result["signal"] = IchimokuDayStrategy.confirm_orderbook(result["signal"], book,
+                                                             CONFIG.get("ORDERBOOK_MIN_IMBALANCE", 0.0))
+    if result["signal"] in ['Buy', 'Sell']:
+        if REPLAY:
+            print(f"🚨 {result['signal'].upper()} SIGNAL | {pair.upper()} [{interval}] @ {result['close']:.2f} (replay)")
+            return
+        # notifier/SQLite/openpyxl calls are blocking, keep them off the loop thread;
+        # signals firing together are published one after the other
+        asyncio.get_running_loop().run_in_executor(publisher, publish_signal, pair, interval, result)
+
+# Indicator + strategy evaluation runs in worker processes (COMPUTE_MODE "inline" keeps it on the loop)
+evaluator = SymbolEvaluator(symbol_data, PAIRS, INTERVALS, on_evaluated,
+                            mode=CONFIG.get("COMPUTE_MODE", "process"),
+                            workers=CONFIG.get("COMPUTE_WORKERS", 4),
+                            timings=timings)
+loop_lag = LoopLagMonitor()
+
+# 5min/15min/1h/4h are built locally from the 1min stream (one subscription per pair)
+aggregator = CandleAggregator(on_candle=on_kline, intervals=["5min", "15min", "1h", "4h"])
+
+async def warm_start(pairs, intervals):
+    """
+    Load the archived candles into the live buffers and only fetch the gap
+    since the last stored candle over REST. The 1min history also warms the
+    aggregator so its current 4h bucket is complete from the first tick.
+    """
+    sizes = {}
+    for pair in pairs:
+        for interval in intervals:
+            buffer = symbol_data[pair][interval]
+            arrays = archive.read(pair, interval)
+            for row in zip(*(arrays[field][-buffer.capacity:] for field in FIELDS)):
+                buffer.append(*row)
+            last = archive.last_timestamp(pair, interval)
+            size = buffer.capacity
+            if last is not None:
+                size = min(size, (int(time.time() * 1000) - last) // interval_to_ms(interval) + 1)
+            if interval == "1min":
+                size = max(size, max(interval_to_ms(i) for i in intervals) // 60_000)
+            sizes[(pair, interval)] = int(size)
+
+    pipeline = make_pipeline()
+    results = await pipeline.prefill(pairs, intervals, sizes=sizes)
+    pipeline.report()
+
+    for (pair, interval), df in results.items():
+        if df is None:
+            continue
+        klines = rest_klines(df)
+        for kline in klines:
+            store_candle(pair, interval, kline)
+        if interval == "1min":
+            aggregator.warm_up(pair, klines)
+
+def make_pipeline():
+    return PrefillPipeline(CONFIG["REST_TIMEFRAME_CODES"],
+                           max_concurrency=CONFIG.get("PREFILL_CONCURRENCY", 8),
+                           rate_per_sec=CONFIG.get("PREFILL_RATE_PER_SEC", 10))
+
+def rest_klines(df):
+    # REST timestamps are in seconds, the live buffers keep milliseconds
+    return [[ts * 1000, o, h, l, c, v] for ts, o, h, l, c, v in
+            df[["timestamp", "open", "high", "low", "close", "volume"]].itertuples(index=False)]
+
+async def backfill_after_reconnect(pairs, disconnected_at):
+    """Replay the 1min candles missed while a connection was down."""
+    missed = (int(time.time() * 1000) - disconnected_at) // 60_000 + 2
+    pipeline = make_pipeline()
+    results = await pipeline.prefill(pairs, ["1min"], size=int(min(missed, 2000)))
+    for (pair, interval), df in results.items():
+        if df is not None:
+            for kline in rest_klines(df):
+                aggregator.update(pair, interval, kline)
+    print(f"🔁 Backfilled {len(pairs)} pairs after reconnect ({missed} candles)")
+
+def on_kbar(data):
+    aggregator.update(*parse_kbar(data))
+
+router = ChannelRouter()
+router.register_pairs("kbar", PAIRS, on_kbar)
+router.register_pairs("depth", PAIRS, order_books.on_depth)
+
+# Receiver only enqueues; workers run the routed handlers on the latest frame per pair
+ingest = IngestPipeline(router.dispatch,
+                        workers=CONFIG.get("INGEST_WORKERS", 4),
+                        maxsize=CONFIG.get("INGEST_QUEUE_SIZE", 1000),
+                        timings=timings)
+
+async def report_ws_stats(manager, every=60):
+    while True:
+        await asyncio.sleep(every)
+        for conn_id, stats in manager.stats().items():
+            log_signal(f"[WS-{conn_id}] {stats}")
+        log_signal(f"[INGEST] {ingest.stats()}")
+        log_signal(f"[COMPUTE] {evaluator.stats()} {triggers} {loop_lag.stats()}")
+
+async def run(record=None):
+    await warm_start(PAIRS, INTERVALS)
+    recorder = FrameRecorder(record) if record else None
+    manager = WebSocketConnectionManager(
+        [kbar_subscription(pair, "1min") for pair in PAIRS] +
+        [depth_subscription(pair, CONFIG.get("ORDERBOOK_DEPTH", 50)) for pair in PAIRS],
+        ingest.submit,
+        connections=CONFIG.get("WS_CONNECTIONS", 4),
+        on_reconnect=backfill_after_reconnect,
+        recorder=recorder
     )
-    await client.connect()
+    asyncio.create_task(report_ws_stats(manager))
+    asyncio.create_task(loop_lag.run())
+    try:
+        await asyncio.gather(manager.run(), ingest.run())
+    finally:
+        if recorder is not None:
+            recorder.close()
+
+async def replay(path, speed=1.0):
+    """
+    Push a captured session through the same router/ingest/aggregator/evaluator
+    path as live, without network, archive writes or notifications, and
+    report throughput and per-stage latency once everything has drained.
+    """
+    global REPLAY
+    REPLAY = True
+    replayer = FrameReplayer(path, ingest.submit, speed=speed, timings=timings)
+    workers = asyncio.create_task(ingest.run())
+    lag = asyncio.create_task(loop_lag.run())
+    started = time.perf_counter()
+    await replayer.run()
+    while len(ingest) or evaluator.in_flight:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    workers.cancel()
+    lag.cancel()
+    evaluator.shutdown()
+
+    report = replayer.report()
+    print(f"⏱️ Replay x{speed or 'max'}: {report['frames']} frames of {report['recorded_sec']}s "
+          f"in {elapsed:.2f}s -> {report['frames'] / elapsed:.1f} frames/sec end to end")
+    for stage, stats in report["stages"].items():
+        print(f"   {stage:<14} {stats}")
+    print(f"   [INGEST] {ingest.stats()}")
+    print(f"   [COMPUTE] {evaluator.stats()} {triggers} {loop_lag.stats()}")
+    return report
 
 if __name__ == "__main__":
-    asyncio.run(run())
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--record", help="append raw WebSocket frames to this gzip log")
+    parser.add_argument("--replay", help="replay a captured log instead of connecting")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed multiplier, 0 = as fast as possible")
+    args = parser.parse_args()
+    if args.replay:
+        asyncio.run(replay(args.replay, args.speed))
+    else:
+        asyncio.run(run(args.record))
@@ -3,6 +3,7 @@ from my_modules.real_time_multi_df_handler import MultiTimeframeHandler
 from my_modules.strategy import strategyEngine
 from my_modules.notifier.SignalDispatcher import SignalDispatcher
 from my_modules.utils import load_config
+from my_modules.candle_archive import CandleArchive
 
 # === CONFIG ===
 CONFIG = load_config("config.json")
@@ -11,12 +12,15 @@ SYMBOLS = CONFIG["SYMBOLS"]
 TIMEFRAMES = CONFIG["TIMEFRAMES"]
 REST_TIMEFRAME_CODES = CONFIG["REST_TIMEFRAME_CODES"]
 WEBSOCKET_TIMEFRAME_CODES = CONFIG["WEBSOCKET_TIMEFRAME_CODES"]
+ARCHIVE = CandleArchive(CONFIG.get("ARCHIVE_DIR", "candle_archive"))
 
 # === HANDLERS ===
-handlers = {
-    symbol: MultiTimeframeHandler(symbol, TIMEFRAMES, REST_TIMEFRAME_CODES)
-    for symbol in SYMBOLS
-}
+handlers = MultiTimeframeHandler.prefill_many(
+    SYMBOLS, TIMEFRAMES, REST_TIMEFRAME_CODES,
+    archive=ARCHIVE,
+    max_concurrency=CONFIG.get("PREFILL_CONCURRENCY", 8),
+    rate_per_sec=CONFIG.get("PREFILL_RATE_PER_SEC", 10)
+)
 
 # === SIGNAL NOTIFIER ===
 notifier = SignalDispatcher(
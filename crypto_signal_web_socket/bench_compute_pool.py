@@ -0,0 +1,52 @@
+"""
+Event-loop lag and throughput of per-symbol evaluation, inline on the loop
+versus SymbolEvaluator's process pool.
+
+    python bench_compute_pool.py [pairs] [rounds] [workers]
+"""
+import asyncio
+import sys
+import time
+from my_modules.compute_pool import SymbolEvaluator, LoopLagMonitor
+from candle_fixtures import fill_buffers
+
+INTERVALS = ["1min", "5min", "15min", "1h", "4h"]
+
+
+async def run_mode(mode, pairs, rounds, workers):
+    symbol_data = fill_buffers(pairs)
+    done = []
+    evaluator = SymbolEvaluator(symbol_data, pairs, INTERVALS, lambda *args: done.append(args),
+                                mode=mode, workers=workers)
+    monitor = LoopLagMonitor(interval=0.01)
+    lag_task = asyncio.create_task(monitor.run())
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for pair in pairs:
+            evaluator.submit(pair, "1min")
+        while evaluator.in_flight:
+            await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - started
+
+    lag_task.cancel()
+    evaluator.shutdown()
+    stats = monitor.stats()
+    print(f"{mode:<8} {evaluator.evaluations / elapsed:>8.1f} evals/sec | "
+          f"avg lag {stats['avg_lag_ms']} ms | max lag {stats['max_lag_ms']} ms")
+    return evaluator.evaluations / elapsed, stats
+
+
+def main():
+    n_pairs = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    pairs = [f"pair{i}_usdt" for i in range(n_pairs)]
+    print(f"📦 {n_pairs} pairs x {len(INTERVALS)} timeframes, {rounds} rounds, {workers} workers")
+    for mode in ("inline", "process"):
+        asyncio.run(run_mode(mode, pairs, rounds, workers))
+
+
+if __name__ == "__main__":
+    main()
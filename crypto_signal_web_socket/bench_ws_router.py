@@ -0,0 +1,112 @@
+"""
+Micro-benchmark of the WebSocket receive path: frames/sec for the old
+json.loads + string-check dispatch versus ChannelRouter with the stdlib
+and the fastest installed JSON decoder.
+
+    python bench_ws_router.py [frames.jsonl]
+
+Without an argument it uses the LBank V2 payloads below; a file with one raw
+frame per line can be passed instead.
+"""
+import json
+import random
+import sys
+import time
+from my_modules import ws_router
+from my_modules.ws_router import ChannelRouter
+
+PAIRS = ["btc_usdt", "eth_usdt", "xrp_usdt", "bnb_usdt", "sol_usdt", "doge_usdt"]
+
+SAMPLE_FRAMES = [
+    '{"kbar":{"a":1251744.3596,"c":104856.51,"t":"2025-06-21T17:46:00.000","v":11.9361,"h":104872.23,"slot":"1min","l":104831.05,"n":146,"o":104840.12},"type":"kbar","pair":"btc_usdt","SERVER":"V2","TS":"2025-06-21T17:46:35.390"}',
+    '{"tick":{"to_cny":752144.42,"high":105980.0,"vol":9283.1342,"low":103127.44,"change":0.81,"usd":104856.51,"to_usd":104856.51,"dir":"buy","turnover":967521334.11,"latest":104856.51,"cny":752144.42},"type":"tick","pair":"btc_usdt","SERVER":"V2","TS":"2025-06-21T17:46:35.412"}',
+    json.dumps({
+        "depth": {
+            "asks": [[round(2410.5 + i * 0.11, 2), round(0.5 + i * 0.07, 4)] for i in range(50)],
+            "bids": [[round(2410.3 - i * 0.11, 2), round(0.6 + i * 0.05, 4)] for i in range(50)]
+        },
+        "count": 50, "type": "depth", "pair": "eth_usdt", "SERVER": "V2", "TS": "2025-06-21T17:46:35.433"
+    }),
+    '{"action":"ping","ping":"0ca8f854-7ba7-4341-9d86-d3327e52804e"}',
+]
+
+
+def synthetic_frames(n=20000, seed=1):
+    rng = random.Random(seed)
+    frames = []
+    for _ in range(n):
+        frame = rng.choice(SAMPLE_FRAMES)
+        frames.append(frame.replace("btc_usdt", rng.choice(PAIRS)))
+    return frames
+
+
+def legacy_dispatch(frames, callback):
+    for msg in frames:
+        data = json.loads(msg)
+        if data.get("action") == "ping":
+            continue
+        if 'kbar' in data.get('type', ''):
+            symbol = data['pair'].split('.')[-1]
+            callback(data)
+        elif 'tick' in data.get('type', ''):
+            symbol = data['pair'].split('.')[-1]
+            callback(data)
+        elif 'depth' in data.get('type', ''):
+            symbol = data['pair'].split('.')[-1]
+            callback(data)
+
+
+def router_dispatch(frames, router, loads):
+    dispatch = router.dispatch
+    for msg in frames:
+        data = loads(msg)
+        if data.get("action") == "ping":
+            continue
+        dispatch(data)
+
+
+def measure(name, fn, frames, repeat=3):
+    best = min(_timed(fn) for _ in range(repeat))
+    rate = len(frames) / best
+    print(f"{name:<28} {rate:>12,.0f} frames/sec")
+    return rate
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as f:
+            frames = [line.strip() for line in f if line.strip()]
+    else:
+        frames = synthetic_frames()
+
+    # count frames instead of keeping them: a list growing across runs slows
+    # whichever path is measured later with garbage-collector passes
+    seen = [0]
+
+    def handle(data):
+        seen[0] += 1
+
+    router = ChannelRouter()
+    for channel in ("kbar", "tick", "depth"):
+        router.register_pairs(channel, PAIRS, handle)
+
+    print(f"📦 {len(frames)} frames, fast decoder: {ws_router.DECODER}")
+    results = {
+        "legacy json + str checks": measure("legacy json + str checks", lambda: legacy_dispatch(frames, handle), frames),
+        "router + json": measure("router + json", lambda: router_dispatch(frames, router, json.loads), frames),
+    }
+    if ws_router.DECODER != "json":
+        name = f"router + {ws_router.DECODER}"
+        results[name] = measure(name, lambda: router_dispatch(frames, router, ws_router.loads), frames)
+    assert router.unrouted == 0
+    return results
+
+
+if __name__ == "__main__":
+    main()
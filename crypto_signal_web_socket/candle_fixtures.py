@@ -0,0 +1,44 @@
+"""Synthetic candles shared by the tests and benchmarks."""
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+from my_modules.candle_aggregator import interval_to_ms
+from my_modules.candle_buffer import CandleBuffer
+
+LIVE_INTERVALS = ["1min", "5min", "15min", "1h", "4h"]
+
+
+def make_minutes(n, seed, start="2025-01-01"):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    # a steady trend (up for even seeds) keeps the 4h/1h clouds on one side;
+    # the 4h cycle on top of it makes 15min crossovers
+    trend = 5e-6 if seed % 2 == 0 else -5e-6
+    log_price = trend * t + 0.004 * np.sin(2 * np.pi * t / 240) + np.cumsum(rng.normal(0, 0.0002, n))
+    close = 100 * np.exp(log_price)
+    open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0, 0.0002, n))
+    # long shadows make hammers and engulfing candles common
+    return pd.DataFrame({
+        "open_price": open_,
+        "high_price": np.maximum(open_, close) * (1 + rng.exponential(0.0006, n)),
+        "low_price": np.minimum(open_, close) * (1 - rng.exponential(0.0012, n)),
+        "close_price": close,
+        "volume": rng.uniform(1, 5, n)
+    }, index=pd.date_range(start, periods=n, freq="min", name="timestamp"))
+
+
+def fill_buffers(pairs, capacity=200, seed=3, intervals=LIVE_INTERVALS):
+    """Live-style {pair: {interval: CandleBuffer}} holding `capacity` random candles each."""
+    rng = np.random.default_rng(seed)
+    symbol_data = defaultdict(lambda: defaultdict(lambda: CandleBuffer(capacity)))
+    end = 1_750_000_000_000 // interval_to_ms("4h") * interval_to_ms("4h")
+    for pair in pairs:
+        for interval in intervals:
+            step = interval_to_ms(interval)
+            close = 100 + np.cumsum(rng.normal(0, 0.5, capacity))
+            for i, c in enumerate(close):
+                o = c + rng.normal(0, 0.2)
+                # every timeframe ends at the same moment, like the live buffers
+                ts = end - (capacity - i) * step
+                symbol_data[pair][interval].append(ts, o, max(o, c) + 0.3, min(o, c) - 0.3, c, 1.0)
+    return symbol_data
@@ -0,0 +1,240 @@
+import numpy as np
+import pandas as pd
+from my_modules.candle_aggregator import interval_to_ms
+from my_modules.indicator import IndicatorCalculator
+from my_modules.slippage_model import fill_slippage, trade_costs
+from my_modules.strategy import IchimokuDayStrategy, TradePlanner
+from my_modules.timeframe_alignment import TIMEFRAME_ROLES, align_timeframes, open_ms, split_aligned
+
+# Defaults are the values hard-coded in IndicatorCalculator / IchimokuDayStrategy / TradePlanner
+DEFAULT_PARAMS = {
+    "tenkan": 9, "kijun": 26, "senkou": 52,
+    "rsi_period": 14, "rsi_buy_below": 40, "rsi_sell_above": 60,
+    "atr_period": 10, "keltner_multiplier": 2.0,
+    "rr_ratio": 2.0,
+}
+
+# Indicator columns the backtest reads, per IndicatorCalculator step, and
+# the parameters each step depends on
+SIGNAL_COLUMNS = {
+    "ichimoku": ("tenkan_sen", "kijun_sen", "senkou_span_a", "senkou_span_b", "chikou_span", "chikou_reference"),
+    "rsi": ("rsi",),
+    "patterns": ("patterns_result",),
+    "keltner": ("ema", "keltner_upper"),
+}
+INDICATOR_PARAMS = {
+    "ichimoku": ("tenkan", "kijun", "senkou"),
+    "rsi": ("rsi_period",),
+    "patterns": (),
+    "keltner": ("atr_period", "keltner_multiplier"),
+}
+
+
+def indicator_columns(candles, kind, params):
+    """{column: array} of one IndicatorCalculator step with the given parameters."""
+    calc = IndicatorCalculator(candles)
+    if kind == "ichimoku":
+        calc.calculate_ichimoku(params["tenkan"], params["kijun"], params["senkou"])
+    elif kind == "rsi":
+        calc.calculate_rsi(params["rsi_period"])
+    elif kind == "patterns":
+        calc.detect_candlestick_patterns()
+    elif kind == "keltner":
+        calc.calculate_keltner(atr_period=params["atr_period"], multiplier=params["keltner_multiplier"])
+    df = calc.get_df()
+    return {column: df[column].to_numpy() for column in SIGNAL_COLUMNS[kind]}
+
+
+def strategy_frame(candles, params, columns=indicator_columns):
+    """Only the columns the strategy needs; a year of 1min bars stays small."""
+    return pd.DataFrame({
+        "close_price": candles["close_price"].to_numpy(),
+        **columns(candles, "ichimoku", params),
+        **columns(candles, "rsi", params),
+        **columns(candles, "patterns", params),
+    }, index=candles.index)
+
+
+def strategy_signals(wide, params):
+    """
+    "Buy" / "Sell" / "None" for every row of an align_timeframes() frame;
+    like the live bot, a Sell is only taken when the buy ladder did not fire.
+    """
+    strat = IchimokuDayStrategy(split_aligned(wide), params["rsi_buy_below"], params["rsi_sell_above"])
+    buy = strat.generate_signals().to_numpy()
+    sell = strat.generate_signals_sell().to_numpy()
+    return np.where(buy == "Buy", buy, np.where(sell == "Sell", sell, "None"))
+
+
+def stop_distance(keltner):
+    # SL one Keltner band away from the entry (multiplier x ATR)
+    return keltner["keltner_upper"] - keltner["ema"]
+
+
+def pair_signals(candles, params=None, base="LLT"):
+    """
+    Signals and SL distances on every `base` bar of one pair.
+    candles: {interval: candle DataFrame} for every TIMEFRAME_ROLES interval.
+    """
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    frames = {role: strategy_frame(candles[tf], params) for role, tf in TIMEFRAME_ROLES.items()}
+    signals = strategy_signals(align_timeframes(frames, base=base), params)
+    base_candles = candles[TIMEFRAME_ROLES[base]]
+    return base_candles, signals, stop_distance(indicator_columns(base_candles, "keltner", params))
+
+
+def first_touch(high, low, start, sl, tp, long, step=256):
+    """
+    Index of the first bar from `start` whose range reaches SL or TP, and
+    whether it was the SL. Scans growing windows, so a trade costs a few
+    vectorized comparisons instead of a Python step per bar.
+    """
+    n = len(high)
+    while start < n:
+        h, l = high[start:start + step], low[start:start + step]
+        stop, take = (l <= sl, h >= tp) if long else (h >= sl, l <= tp)
+        hit = stop | take
+        if hit.any():
+            k = int(hit.argmax())
+            # both inside one bar: assume the worse outcome
+            return start + k, bool(stop[k])
+        start += step
+        step *= 2
+    return None, False
+
+
+def intrabar_touch(high, low, lo, hi, sl, tp, long):
+    """
+    First touch inside one higher-timeframe bar, from its 1min rows lo:hi.
+    The running max of the highs and min of the lows are monotonic, so the
+    first minute reaching each level is a searchsorted. Returns the row and
+    whether the SL came first (or in the same minute), or (None, True) when
+    the minutes never reach either level.
+    """
+    peak = np.maximum.accumulate(high[lo:hi])
+    trough = np.minimum.accumulate(low[lo:hi])
+    if long:
+        stop, take = np.searchsorted(-trough, -sl), np.searchsorted(peak, tp)
+    else:
+        stop, take = np.searchsorted(peak, sl), np.searchsorted(-trough, -tp)
+    k = min(stop, take)
+    if k == hi - lo:
+        return None, True
+    return lo + int(k), bool(stop <= take)
+
+
+def simulate_trades(pair, candles, signals, sl_distance, planner, slippage_pct=0.001, commission_pct=0.001,
+                    halt_on_drawdown=True, interval="1min", intrabar=None, liquidity=None, fees=None, impact=1.0):
+    """
+    Event-driven walk over the whole history with one position at a time.
+
+    A Buy/Sell bar opens a trade at its close with the TradePlanner's
+    SL/TP/size (a NaN distance falls back to the planner's fixed 1%); it is
+    closed at the level the first later bar reaches, or at the last close.
+    Signals while a trade is open are ignored. With `halt_on_drawdown`,
+    trading stops once the planner's drawdown limit is hit. Returns the
+    trade log.
+
+    `intrabar`: 1min candles under `interval` bars. The exit bar is then
+    replayed minute by minute, so a bar reaching both SL and TP exits at
+    whichever came first, stamped with the minute it happened in.
+
+    All trades are costed in one slippage_model.trade_costs call: a fixed
+    `slippage_pct` per fill, or with `liquidity` (candle_liquidity /
+    book_liquidity arrays per bar) size- and depth-dependent market impact.
+    `fees` is a maker/taker schedule (default: `commission_pct` for both);
+    take-profits rest as limit orders and pay the maker fee.
+    """
+    close = candles["close_price"].to_numpy()
+    high = candles["high_price"].to_numpy()
+    low = candles["low_price"].to_numpy()
+    index = candles.index
+    if intrabar is not None:
+        minute_open = open_ms(intrabar.index)
+        minute_high = intrabar["high_price"].to_numpy()
+        minute_low = intrabar["low_price"].to_numpy()
+        bar_open = open_ms(index)
+        # 1min rows of every bar
+        bar_lo = np.searchsorted(minute_open, bar_open)
+        bar_hi = np.searchsorted(minute_open, bar_open + interval_to_ms(interval))
+    entries = np.flatnonzero((signals == "Buy") | (signals == "Sell"))
+    fills, free_from = [], 0
+    for i in entries:
+        if i < free_from or i + 1 >= len(close):
+            continue
+        atr = sl_distance[i] if np.isfinite(sl_distance[i]) else None
+        plan = planner.plan_trade({
+            "symbol": pair,
+            "entry": float(close[i]),
+            "direction": "long" if signals[i] == "Buy" else "short"
+        }, atr)
+        long = plan["direction"] == "long"
+        j, stopped = first_touch(high, low, i + 1, plan["sl"], plan["tp"], long)
+        exit_time = None
+        if j is None:
+            j, exit_price, reason = len(close) - 1, float(close[-1]), "end"
+        else:
+            if intrabar is not None:
+                k, sl_first = intrabar_touch(minute_high, minute_low, bar_lo[j], bar_hi[j],
+                                             plan["sl"], plan["tp"], long)
+                if k is not None:
+                    stopped, exit_time = sl_first, pd.Timestamp(minute_open[k], unit="ms")
+            exit_price, reason = (plan["sl"], "sl") if stopped else (plan["tp"], "tp")
+        fills.append((i, j, exit_time, plan, exit_price, reason))
+        free_from = j + 1
+    if not fills:
+        return []
+
+    rows_in = np.array([fill[0] for fill in fills])
+    rows_out = np.array([fill[1] for fill in fills])
+    entry = np.array([fill[3]["entry"] for fill in fills])
+    size = np.array([fill[3]["position_size"] for fill in fills])
+    sign = np.array([1.0 if fill[3]["direction"] == "long" else -1.0 for fill in fills])
+    exit_price = np.array([fill[4] for fill in fills])
+    if liquidity is None:
+        entry_slippage = exit_slippage = slippage_pct
+    else:
+        entry_slippage = fill_slippage(liquidity, rows_in, size, sign > 0, impact)
+        exit_slippage = fill_slippage(liquidity, rows_out, size, sign < 0, impact)
+    costs = trade_costs(entry, exit_price, sign, entry_slippage, exit_slippage,
+                        fees or {"maker": commission_pct, "taker": commission_pct},
+                        exit_maker=np.array([fill[5] == "tp" for fill in fills]))
+    net_return = costs["net_return"]
+    pnl = net_return * size * entry
+
+    trades = []
+    for n, (i, j, exit_time, plan, exit_at, reason) in enumerate(fills):
+        trades.append({
+            "symbol": pair,
+            "interval": interval,
+            "entry_time": index[i].isoformat(),
+            "timestamp": (index[j] if exit_time is None else exit_time).isoformat(),
+            "price": plan["entry"],
+            "exit_price": exit_at,
+            "signal": signals[i],
+            "sl": plan["sl"],
+            "tp": plan["tp"],
+            "position_size": plan["position_size"],
+            "exit": reason,
+            "return": float(net_return[n]),
+            "pnl": float(pnl[n])
+        })
+        # positions never depend on the running loss, so halting just cuts the log
+        if halt_on_drawdown and not planner.update_drawdown(trades[-1]["pnl"]):
+            break
+    return trades
+
+
+def backtest_pair(pair, candles, params=None, equity=10_000.0, max_risk_pct=2.0,
+                  slippage_pct=0.001, commission_pct=0.001, halt_on_drawdown=True, base="LLT"):
+    """
+    Full-history backtest of IchimokuDayStrategy on one pair; returns its trade log.
+    With a higher `base` role, signals are taken on its bars and exits are
+    settled on the 1min candles inside them.
+    """
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    base_candles, signals, sl_distance = pair_signals(candles, params, base)
+    planner = TradePlanner(equity, max_risk_pct=max_risk_pct, rr_ratio=params["rr_ratio"])
+    minutes = candles[TIMEFRAME_ROLES["LLT"]] if base != "LLT" else None
+    return simulate_trades(pair, base_candles, signals, sl_distance, planner, slippage_pct, commission_pct,
+                           halt_on_drawdown, interval=TIMEFRAME_ROLES[base], intrabar=minutes)
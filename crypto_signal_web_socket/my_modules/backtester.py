@@ -2,11 +2,14 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import pandas as pd
-from my_modules.indicator import IndicatorCalculator
-from my_modules.strategy import IchimokuDayStrategy
-from my_modules.utils import log_signal
-from my_modules.slippage_model import apply_slippage_and_commission
+from my_modules.backtest_engine import backtest_pair
+from my_modules.timeframe_alignment import resample_timeframes
+from my_modules.utils import log_signal, load_config
 from my_modules.dashboard_generator import generate_dashboard
+from my_modules.robustness import robustness_report
+from my_modules.candle_archive import CandleArchive
+from my_modules.kline_downloader import KlineCache, KlineDownloader
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import time
 import requests
 
@@ -23,6 +26,17 @@ TIMEFRAME_MAP_REST = {
 ALL_PAIRS = ['btc_usdt', 'eth_usdt']
 ALL_INTERVALS = ["1min", "5min", "15min", "1h", "4h"]
 
+# آدرس REST (با LBANK_REST_URL می‌توان شبیه‌ساز محلی را جایگزین کرد)
+KLINE_URL = os.environ.get("LBANK_REST_URL", "https://api.lbkex.com").rstrip("/") + "/v2/kline.do"
+
+# کندل‌های ذخیره‌شده توسط ربات زنده (همان ARCHIVE_DIR که app.py می‌خواند)
+CONFIG = load_config("config.json") if os.path.exists("config.json") else {}
+ARCHIVE = CandleArchive(CONFIG.get("ARCHIVE_DIR", "candle_archive"))
+
+# تاریخچه دانلودشده برای بک‌تست (کش ماهانه روی دیسک، فقط بازه‌های جاافتاده دانلود می‌شوند)
+DOWNLOADER = KlineDownloader(TIMEFRAME_MAP_REST, KlineCache("kline_cache"), base_url=KLINE_URL)
+HISTORY_DAYS = 30
+
 # تبدیل رشته تایم‌فریم به دقیقه
 def interval_to_minutes(interval):
     if interval.endswith("min"):
@@ -33,13 +47,22 @@ def interval_to_minutes(interval):
         raise ValueError(f"Unsupported interval format: {interval}")
 
 # گرفتن دیتا از REST API
-def fetch_historical_kline(pair, interval, size=200):
+def fetch_historical_kline(pair, interval, size=200, archive=ARCHIVE):
     rest_interval = TIMEFRAME_MAP_REST.get(interval)
     if not rest_interval:
         raise ValueError(f"Unsupported interval: {interval}")
     minutes_per_candle = interval_to_minutes(interval)
+
+    # Use the local archive when it already holds enough up-to-date candles
+    if archive is not None:
+        df = archive.to_frame(pair, interval, tail=size)
+        if len(df) >= size:
+            age_minutes = (time.time() - df.index[-1].timestamp()) / 60
+            if age_minutes <= 2 * minutes_per_candle:
+                return df
+
     start_time = int(time.time()) - size * 60 * minutes_per_candle
-    url = "https://api.lbkex.com/v2/kline.do"
+    url = KLINE_URL
     params = {
         "symbol": pair,
         "size": size,
@@ -55,62 +78,114 @@ def fetch_historical_kline(pair, interval, size=200):
         df = pd.DataFrame(data["data"], columns=[
             "timestamp", "open_price", "high_price", "low_price", "close_price", "volume"
         ])
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit='ms')
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit='s')  # REST returns seconds
         df.set_index("timestamp", inplace=True)
-        return df
+        return df.astype(float)
     except Exception as e:
         print(f"[Error] Fetching {pair} @ {interval}: {e}")
         return None
 
-# تحلیل یک جفت‌ارز در یک تایم‌فریم
-def analyze_one(pair, interval, trade_log):
-    df = fetch_historical_kline(pair, interval)
-    if df is None or len(df) < 30:
+# آیا آرشیو ربات زنده از `start` (ms) به بعد را پوشش می‌دهد؟
+def archive_covers(archive, pair, start=None, end=None):
+    if archive is None:
+        return False
+    ts = archive.read(pair, "1min", start, end)["timestamp"]
+    return len(ts) > 0 and (start is None or ts[0] <= start + 60_000)
+
+# بازه پیش‌فرض دانلود: HISTORY_DAYS روز اخیر
+def history_range(start=None, end=None):
+    end = int(time.time() * 1000) if end is None else end
+    return (end - HISTORY_DAYS * 86_400_000 if start is None else start), end
+
+# تاریخچه کامل یک جفت‌ارز: کندل‌های ۱ دقیقه‌ای و تایم‌فریم‌های بالاتر ساخته‌شده از آن‌ها
+def load_history(pair, archive=ARCHIVE, start=None, end=None, downloader=DOWNLOADER):
+    if archive_covers(archive, pair, start, end):
+        return resample_timeframes(archive.to_frame(pair, "1min", start, end))
+    if downloader is None:
+        return None
+    # Otherwise the download cache, fetching only what it does not hold yet
+    minutes = downloader.load(pair, "1min", *history_range(start, end))
+    return resample_timeframes(minutes) if len(minutes) else None
+
+# بک‌تست یک جفت‌ارز (در پردازه‌های کارگر هم اجرا می‌شود) -> (pair, trades یا None, تعداد کندل, ثانیه)
+def backtest_job(pair, archive=ARCHIVE, params=None, start=None, end=None, downloader=DOWNLOADER):
+    started = time.perf_counter()
+    candles = load_history(pair, archive, start, end, downloader)
+    if candles is None or len(candles["1min"]) < 30:
+        return pair, None, 0, time.perf_counter() - started
+    trades = backtest_pair(pair, candles, params)
+    return pair, trades, len(candles["1min"]), time.perf_counter() - started
+
+def report_job(result, done=None, total=None):
+    pair, trades, bars, seconds = result
+    if trades is None:
+        print(f"⚠️ Not enough history for {pair}")
         return
+    progress = f" {done}/{total}" if done is not None else ""
+    message = f"[Backtest]{progress} {pair.upper()}: {len(trades)} trades over {bars} 1min bars in {seconds:.1f}s"
+    print(message)
+    log_signal(message)
 
-    df = IndicatorCalculator(df)\
-        .calculate_rsi()\
-        .calculate_macd()\
-        .calculate_bollinger()\
-        .calculate_keltner()\
-        .calculate_ichimoku()\
-        .detect_candlestick_patterns()\
-        .detect_price_action()\
-        .get_df()
-
-    strat = StrategyEngine({"TTF": df})
-    signal = strat.analyze_signal()\
-                  .analyze_entry()\
-                  .generate_signal()
-
-    if signal in ["Buy", "Sell"]:
-        entry = df.iloc[-2]
-        exit_ = df.iloc[-1]
-        slip = apply_slippage_and_commission(entry["close_price"], exit_["close_price"])
-        trade_log.append({
-            "symbol": pair,
-            "interval": interval,
-            "timestamp": exit_.name.isoformat(),
-            "price": exit_["close_price"],
-            "signal": signal,
-            "return": slip["net_return"]
-        })
-        log_signal(f"[Backtest] {signal} {pair.upper()} @ {exit_['close_price']:.2f} | Return: {slip['net_return']:.4f}")
-
-# اجرای کامل بک‌تست
-def run_full_backtest():
+# بک‌تست کل تاریخچه یک جفت‌ارز
+def analyze_one(pair, trade_log, archive=ARCHIVE, params=None, start=None, end=None, downloader=DOWNLOADER):
+    result = backtest_job(pair, archive, params, start, end, downloader)
+    report_job(result)
+    trade_log.extend(result[1] or [])
+
+# بک‌تست موازی: هر جفت‌ارز یک کار در ProcessPool، نتایج به محض آماده شدن دریافت می‌شوند
+def run_parallel(pairs, archive=ARCHIVE, params=None, start=None, end=None, downloader=DOWNLOADER, workers=None):
+    ranges = {}
+    if downloader is not None:
+        # Downloads happen here under one rate limit; the workers then read the cache
+        missing = [pair for pair in pairs if not archive_covers(archive, pair, start, end)]
+        if missing:
+            window = history_range(start, end)
+            ranges = dict.fromkeys(missing, window)
+            downloader.download_many(missing, ["1min"], *window)
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(backtest_job, pair, archive, params, *ranges.get(pair, (start, end)), downloader): pair
+                   for pair in pairs}
+        for done, future in enumerate(as_completed(futures), 1):
+            pair = futures[future]
+            try:
+                results[pair] = future.result()
+            except Exception as e:
+                print(f"[Error] Backtest of {pair} failed: {e}")
+                results[pair] = (pair, None, 0, 0.0)
+                continue
+            report_job(results[pair], done, len(futures))
+    return results
+
+# اجرای کامل بک‌تست (workers=0: بدون پردازه‌های کارگر)
+def run_full_backtest(pairs=ALL_PAIRS, archive=ARCHIVE, params=None, start=None, end=None,
+                      output_csv="backtest_log.csv", output_html="backtest_report.html", downloader=DOWNLOADER,
+                      workers=None):
     print("[🚀] Running backtest...")
-    trade_log = []
-    for pair in ALL_PAIRS:
-        for interval in ALL_INTERVALS:
-            analyze_one(pair, interval, trade_log)
+    started = time.perf_counter()
+    if workers == 0 or len(pairs) < 2:
+        results = {}
+        for pair in pairs:
+            results[pair] = backtest_job(pair, archive, params, start, end, downloader)
+            report_job(results[pair])
+    else:
+        results = run_parallel(pairs, archive, params, start, end, downloader, workers)
+    # Merged in pair order, then by exit time: the same log whatever order the jobs finished in
+    trade_log = [trade for pair in pairs for trade in (results[pair][1] or [])]
+    print(f"[⏱️] {len(pairs)} pairs in {time.perf_counter() - started:.1f}s "
+          f"({sum(result[3] for result in results.values()):.1f}s of job time)")
 
     if trade_log:
+        trade_log.sort(key=lambda trade: (trade["timestamp"], trade["symbol"]))
         df_log = pd.DataFrame(trade_log)
-        df_log.to_csv("backtest_log.csv", index=False)
-        generate_dashboard(trade_log, output_html="backtest_report.html")
+        df_log.to_csv(output_csv, index=False)
+        started = time.perf_counter()
+        robustness = robustness_report(df_log["return"].to_numpy())
+        print(f"[🎲] Robustness bands from {len(df_log)} trades in {time.perf_counter() - started:.2f}s")
+        generate_dashboard(trade_log, output_html=output_html, robustness=robustness)
     else:
         print("⚠️ No trades were generated.")
+    return trade_log
 
 if __name__ == "__main__":
     run_full_backtest()
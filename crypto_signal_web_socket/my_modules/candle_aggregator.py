@@ -0,0 +1,122 @@
+def interval_to_ms(interval):
+    """'1min', '15min', '1h', '4hr' -> milliseconds per candle."""
+    if interval.endswith("min"):
+        return int(interval[:-3]) * 60_000
+    if interval.endswith("hr"):
+        return int(interval[:-2]) * 3_600_000
+    if interval.endswith("h"):
+        return int(interval[:-1]) * 3_600_000
+    raise ValueError(f"Unsupported interval format: {interval}")
+
+
+class CandleAggregator:
+    """
+    Builds higher-timeframe candles locally from a single 1-minute kline stream.
+
+    Buckets are aligned to UTC epoch multiples of the interval (the same
+    boundaries the exchange uses), so 1h candles open at :00 and 4h candles at
+    00:00, 04:00, ... Because the exchange repeats the forming 1-minute candle
+    until it closes, minutes are only folded into a bucket once a newer minute
+    arrives; until then the bucket is emitted as committed minutes + the
+    forming one, so volume is never double counted.
+
+    `update` has the same (pair, interval, kline) signature as on_kline and can
+    be passed straight to the WebSocket client as its kline callback. For
+    every 1-minute kline, `on_candle` is called for the base interval and then
+    for each target interval with the current (possibly forming) candle.
+    `on_close` is called once with the final candle when a bucket completes.
+    A bucket that began before the first minute seen (see `is_partial`) would
+    miss candles, so it is neither emitted nor closed; its interval starts
+    with the next bucket.
+    """
+    def __init__(self, on_candle, intervals=("5min", "15min", "1h", "4h"),
+                 base_interval="1min", on_close=None):
+        self.on_candle = on_candle
+        self.on_close = on_close
+        self.base_interval = base_interval
+        self.intervals = list(intervals)
+        self.interval_ms = {interval: interval_to_ms(interval) for interval in self.intervals}
+        self._forming = {}   # pair -> forming base kline
+        self._buckets = {}   # (pair, interval) -> committed [start, o, h, l, c, v] or None
+        self._starts = {}    # (pair, interval) -> start of the current bucket
+        self.partial = set()  # (pair, interval) whose current bucket began before we saw it
+
+    def warm_up(self, pair, klines):
+        """Replay closed 1-minute klines (oldest first) without emitting candles."""
+        on_candle, on_close = self.on_candle, self.on_close
+        self.on_candle = lambda *args: None
+        self.on_close = None
+        try:
+            for kline in klines:
+                self.update(pair, self.base_interval, kline)
+        finally:
+            self.on_candle, self.on_close = on_candle, on_close
+
+    def update(self, pair, interval, kline):
+        if interval != self.base_interval:
+            # Not ours to aggregate, e.g. a timeframe still subscribed directly.
+            self.on_candle(pair, interval, kline)
+            return
+
+        kline = [int(kline[0])] + [float(x) for x in kline[1:6]]
+        forming = self._forming.get(pair)
+        if forming is not None:
+            if kline[0] < forming[0]:
+                return
+            if kline[0] > forming[0]:
+                self._commit(pair, forming)
+        self._forming[pair] = kline
+
+        self.on_candle(pair, self.base_interval, kline)
+        for target in self.intervals:
+            candle = self._current(pair, target, kline)
+            if not self.is_partial(pair, target):
+                self.on_candle(pair, target, candle)
+
+    def is_partial(self, pair, interval):
+        return (pair, interval) in self.partial
+
+    def _bucket_start(self, ts, interval):
+        return ts - ts % self.interval_ms[interval]
+
+    def _commit(self, pair, minute):
+        for target in self.intervals:
+            key = (pair, target)
+            start = self._bucket_start(minute[0], target)
+            bucket = self._buckets.get(key)
+            if bucket is None or bucket[0] != start:
+                bucket = [start] + minute[1:]
+                if key not in self._starts and minute[0] != start:
+                    self.partial.add(key)
+                self._buckets[key] = bucket
+                self._starts[key] = start
+            else:
+                bucket[2] = max(bucket[2], minute[2])
+                bucket[3] = min(bucket[3], minute[3])
+                bucket[4] = minute[4]
+                bucket[5] += minute[5]
+
+    def _current(self, pair, target, minute):
+        key = (pair, target)
+        start = self._bucket_start(minute[0], target)
+        bucket = self._buckets.get(key)
+        if bucket is not None and bucket[0] != start:
+            # The forming minute opened a new bucket: the previous one is final.
+            if self.on_close and key not in self.partial:
+                self.on_close(pair, target, list(bucket))
+            self.partial.discard(key)
+            self._buckets[key] = bucket = None
+        if key not in self._starts:
+            self._starts[key] = start
+            if minute[0] != start:
+                self.partial.add(key)
+        if bucket is None:
+            return [start] + minute[1:]
+        return [
+            start,
+            bucket[1],
+            max(bucket[2], minute[2]),
+            min(bucket[3], minute[3]),
+            minute[4],
+            bucket[5] + minute[5]
+        ]
@@ -0,0 +1,118 @@
+import os
+import numpy as np
+import pandas as pd
+
+COLUMNS = {
+    "timestamp": "<i8",
+    "open_price": "<f8",
+    "high_price": "<f8",
+    "low_price": "<f8",
+    "close_price": "<f8",
+    "volume": "<f8"
+}
+
+
+class CandleArchive:
+    """
+    Append-only, columnar on-disk store of closed candles.
+
+    Layout: <root>/<symbol>/<interval>/<column>.bin, one raw little-endian
+    array per column, timestamps in epoch milliseconds and strictly
+    increasing. Reads are np.memmap views, so opening years of history costs
+    no parsing and only the touched pages are loaded.
+    """
+    def __init__(self, root="candle_archive"):
+        self.root = root
+        # (symbol, interval) -> (rows, last timestamp) as of this instance's last append
+        self._tails = {}
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, symbol, interval)
+
+    def _path(self, symbol, interval, column):
+        return os.path.join(self._dir(symbol, interval), f"{column}.bin")
+
+    def count(self, symbol, interval):
+        sizes = []
+        for column, dtype in COLUMNS.items():
+            path = self._path(symbol, interval, column)
+            if not os.path.exists(path):
+                return 0
+            sizes.append(os.path.getsize(path) // np.dtype(dtype).itemsize)
+        return min(sizes)
+
+    def _repair(self, symbol, interval):
+        # An interrupted append can leave columns with different lengths.
+        n = self.count(symbol, interval)
+        for column, dtype in COLUMNS.items():
+            path = self._path(symbol, interval, column)
+            if os.path.exists(path) and os.path.getsize(path) != n * np.dtype(dtype).itemsize:
+                os.truncate(path, n * np.dtype(dtype).itemsize)
+        return n
+
+    def read(self, symbol, interval, start=None, end=None):
+        """Memory-mapped columns, optionally limited to start <= timestamp <= end (ms)."""
+        n = self.count(symbol, interval)
+        if n == 0:
+            return {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}
+        arrays = {
+            column: np.memmap(self._path(symbol, interval, column), dtype=dtype, mode="r", shape=(n,))
+            for column, dtype in COLUMNS.items()
+        }
+        ts = arrays["timestamp"]
+        lo = int(np.searchsorted(ts, start, side="left")) if start is not None else 0
+        hi = int(np.searchsorted(ts, end, side="right")) if end is not None else n
+        return {column: arr[lo:hi] for column, arr in arrays.items()}
+
+    def last_timestamp(self, symbol, interval):
+        ts = self.read(symbol, interval)["timestamp"]
+        return int(ts[-1]) if len(ts) else None
+
+    def _tail(self, symbol, interval):
+        # The timestamp column is written first, so a torn or foreign append
+        # always changes its size; only then are the files checked again.
+        path = self._path(symbol, interval, "timestamp")
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        cached = self._tails.get((symbol, interval))
+        if cached is None or size != cached[0] * np.dtype(COLUMNS["timestamp"]).itemsize:
+            n = self._repair(symbol, interval)
+            cached = self._tails[(symbol, interval)] = (n, self.last_timestamp(symbol, interval) if n else None)
+        return cached
+
+    def to_frame(self, symbol, interval, start=None, end=None, tail=None):
+        """Backtester layout: datetime index and *_price columns."""
+        arrays = self.read(symbol, interval, start, end)
+        if tail is not None:
+            arrays = {column: arr[-tail:] for column, arr in arrays.items()}
+        df = pd.DataFrame({column: np.asarray(arr) for column, arr in arrays.items() if column != "timestamp"})
+        df.index = pd.to_datetime(np.asarray(arrays["timestamp"]), unit="ms")
+        df.index.name = "timestamp"
+        return df
+
+    def append(self, symbol, interval, candles):
+        """
+        Append closed candles given as {column: array} (or a DataFrame with
+        those columns). Rows not newer than the last stored candle are
+        skipped, so overlapping backfills are safe. Returns rows written.
+        """
+        ts = np.asarray(candles["timestamp"], dtype=np.int64)
+        if len(ts) == 0:
+            return 0
+        order = np.argsort(ts, kind="stable")
+        ts = ts[order]
+        keep = np.r_[ts[1:] != ts[:-1], True]  # last update of a timestamp wins
+
+        os.makedirs(self._dir(symbol, interval), exist_ok=True)
+        rows, last = self._tail(symbol, interval)
+        if rows:
+            keep &= ts > last
+        if not keep.any():
+            return 0
+
+        for column, dtype in COLUMNS.items():
+            values = np.asarray(candles[column], dtype=dtype)[order][keep]
+            with open(self._path(symbol, interval, column), "ab") as f:
+                f.write(values.tobytes())
+        written = int(keep.sum())
+        self._tails[(symbol, interval)] = (rows + written, int(ts[keep][-1]))
+        return written
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+FIELDS = ("timestamp", "open_price", "high_price", "low_price", "close_price", "volume")
+
+
+class CandleBuffer:
+    """
+    Fixed-capacity OHLCV ring buffer backed by preallocated NumPy arrays.
+
+    Each column is stored twice back to back (mirrored ring), so the live
+    window is always one contiguous slice and `view()` can hand out zero-copy
+    arrays in chronological order. Timestamps are epoch milliseconds.
+    """
+    __slots__ = FIELDS + ("capacity", "_head", "_size")
+
+    def __init__(self, capacity=200):
+        self.capacity = capacity
+        self.timestamp = np.zeros(2 * capacity, dtype=np.int64)
+        self.open_price = np.zeros(2 * capacity, dtype=np.float64)
+        self.high_price = np.zeros(2 * capacity, dtype=np.float64)
+        self.low_price = np.zeros(2 * capacity, dtype=np.float64)
+        self.close_price = np.zeros(2 * capacity, dtype=np.float64)
+        self.volume = np.zeros(2 * capacity, dtype=np.float64)
+        self._head = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _write(self, pos, ts, o, h, l, c, v):
+        for p in (pos, pos + self.capacity):
+            self.timestamp[p] = ts
+            self.open_price[p] = o
+            self.high_price[p] = h
+            self.low_price[p] = l
+            self.close_price[p] = c
+            self.volume[p] = v
+
+    def append(self, ts, o, h, l, c, v):
+        if self._size < self.capacity:
+            pos = self._head + self._size
+            self._size += 1
+        else:
+            pos = self._head
+            self._head = (self._head + 1) % self.capacity
+        self._write(pos, ts, o, h, l, c, v)
+
+    def update(self, kline):
+        """
+        Apply a [timestamp, open, high, low, close, volume] kline.
+        A repeated timestamp overwrites the forming candle, a newer one is
+        appended and older ones are ignored. Returns True when a new candle
+        was appended, i.e. the previous one closed.
+        """
+        ts = int(kline[0])
+        values = [float(x) for x in kline[1:6]]
+        if self._size:
+            last_pos = (self._head + self._size - 1) % self.capacity
+            last_ts = self.timestamp[last_pos]
+            if ts == last_ts:
+                self._write(last_pos, ts, *values)
+                return False
+            if ts < last_ts:
+                return False
+        self.append(ts, *values)
+        return True
+
+    def view(self, field):
+        """Read-only, zero-copy array of `field` in chronological order."""
+        arr = getattr(self, field)[self._head:self._head + self._size]
+        arr.flags.writeable = False
+        return arr
+
+    def arrays(self):
+        return {field: self.view(field) for field in FIELDS}
+
+    def last(self, field="close_price"):
+        if not self._size:
+            return None
+        return getattr(self, field)[self._head + self._size - 1]
+
+    def to_frame(self):
+        """DataFrame indexed by datetime, the layout IndicatorCalculator expects."""
+        df = pd.DataFrame({field: self.view(field) for field in FIELDS[1:]})
+        df.index = pd.to_datetime(self.view("timestamp"), unit="ms")
+        df.index.name = "timestamp"
+        return df
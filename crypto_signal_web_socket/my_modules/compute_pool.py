@@ -0,0 +1,306 @@
+import asyncio
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from my_modules.indicator import IndicatorCalculator
+from my_modules.strategy import IchimokuDayStrategy
+from my_modules.timeframe_alignment import TIMEFRAME_ROLES, closed_bars, open_ms
+PRICE_FIELDS = ("open_price", "high_price", "low_price", "close_price", "volume")
+MIN_ROWS = 30
+
+
+class SharedCandleStore:
+    """
+    Candle slots for every pair x interval in one shared-memory block.
+
+    The parent copies a CandleBuffer's chronological view into the slot (a
+    memcpy of a few KB); workers attach to the same block by name and read
+    it without anything being pickled.
+    """
+    def __init__(self, pairs, intervals, capacity=200, name=None):
+        self.pairs = list(pairs)
+        self.intervals = list(intervals)
+        self.capacity = capacity
+        self._pair_index = {pair: i for i, pair in enumerate(self.pairs)}
+        self._interval_index = {interval: i for i, interval in enumerate(self.intervals)}
+        p, n, c = len(self.pairs), len(self.intervals), capacity
+        size = 8 * (p * n * c + p * n * len(PRICE_FIELDS) * c + p * n)
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        offset = 0
+        self.timestamps = np.ndarray((p, n, c), dtype=np.int64, buffer=self.shm.buf, offset=offset)
+        offset += self.timestamps.nbytes
+        self.prices = np.ndarray((p, n, len(PRICE_FIELDS), c), dtype=np.float64, buffer=self.shm.buf, offset=offset)
+        offset += self.prices.nbytes
+        self.lengths = np.ndarray((p, n), dtype=np.int64, buffer=self.shm.buf, offset=offset)
+        if self.owner:
+            self.lengths[:] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def spec(self):
+        """Arguments for re-attaching to this store from another process."""
+        return self.pairs, self.intervals, self.capacity, self.name
+
+    def publish(self, pair, interval, buffer):
+        i, j = self._pair_index[pair], self._interval_index[interval]
+        n = min(len(buffer), self.capacity)
+        self.timestamps[i, j, :n] = buffer.view("timestamp")[-n:]
+        for k, field in enumerate(PRICE_FIELDS):
+            self.prices[i, j, k, :n] = buffer.view(field)[-n:]
+        self.lengths[i, j] = n
+
+    def frame(self, pair, interval):
+        i, j = self._pair_index[pair], self._interval_index[interval]
+        n = int(self.lengths[i, j])
+        df = pd.DataFrame({field: self.prices[i, j, k, :n] for k, field in enumerate(PRICE_FIELDS)})
+        df.index = pd.to_datetime(self.timestamps[i, j, :n], unit="ms")
+        df.index.name = "timestamp"
+        return df
+
+    def close(self):
+        # drop our views before closing the mapping
+        del self.timestamps, self.prices, self.lengths
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class VerdictCache:
+    """
+    Strategy verdicts per (pair, role), kept until that timeframe's next bar
+    closes. A 4h verdict is computed about once per 4 hours and reused by
+    every 1min evaluation in between; hit/miss counters are per role.
+    """
+    def __init__(self):
+        self.entries = {}
+        self.hits = dict.fromkeys(TIMEFRAME_ROLES, 0)
+        self.misses = dict.fromkeys(TIMEFRAME_ROLES, 0)
+
+    def get(self, pair, role, key):
+        entry = self.entries.get((pair, role))
+        if entry is not None and entry[0] == key:
+            self.hits[role] += 1
+            return entry[1]
+        self.misses[role] += 1
+        return None
+
+    def put(self, pair, role, key, verdicts):
+        self.entries[(pair, role)] = (key, verdicts)
+
+    def stats(self):
+        return {role: {"hits": self.hits[role], "misses": self.misses[role]} for role in TIMEFRAME_ROLES}
+
+
+def role_verdicts(df, role):
+    df = IndicatorCalculator(df) \
+        .calculate_rsi() \
+        .calculate_ichimoku() \
+        .detect_candlestick_patterns() \
+        .get_df()
+    return IchimokuDayStrategy({role: df}).role_verdicts(role)
+
+
+def evaluate_frames(frames, pair=None, cache=None):
+    """
+    Indicators + IchimokuDayStrategy over {interval: candle DataFrame}.
+    Only bars that had closed when the newest 1min candle opened are used,
+    so no timeframe contributes a still-forming candle. With a VerdictCache
+    a timeframe's indicators and checks are only recomputed after its last
+    closed bar changed.
+    Returns a small, cheaply pickled result dict or None when data is missing.
+    """
+    base = frames.get(TIMEFRAME_ROLES['LLT'])
+    if base is None or len(base) == 0:
+        return None
+    as_of = int(open_ms(base.index)[-1])
+    closed = {}
+    for role, tf in TIMEFRAME_ROLES.items():
+        df = frames.get(tf)
+        if df is not None:
+            df = closed_bars(df, tf, as_of)
+        if df is None or len(df) < MIN_ROWS:
+            return None
+        closed[role] = df
+
+    verdicts = {}
+    for role, df in closed.items():
+        key = (df.index[-1], float(df['close_price'].iloc[-1]))
+        cached = cache.get(pair, role, key) if cache is not None else None
+        if cached is None:
+            cached = role_verdicts(df, role)
+            if cache is not None:
+                cache.put(pair, role, key, cached)
+        verdicts[role] = cached
+
+    last = closed['LLT']
+    return {
+        "signal": IchimokuDayStrategy.signal_from_verdicts(verdicts),
+        "close": float(last['close_price'].iloc[-1]),
+        "timestamp": last.index[-1].isoformat()
+    }
+
+
+# --- worker process side ---
+_STORE = None
+_CACHE = VerdictCache()  # per process; a pair always lands on the same worker
+
+
+def _attach_store(spec):
+    global _STORE
+    pairs, intervals, capacity, name = spec
+    _STORE = SharedCandleStore(pairs, intervals, capacity, name=name)
+
+
+def evaluate_symbol(pair):
+    frames = {tf: _STORE.frame(pair, tf) for tf in _STORE.intervals}
+    result = evaluate_frames(frames, pair, _CACHE)
+    return result, _CACHE.stats()
+
+
+class SymbolEvaluator:
+    """
+    Runs per-symbol indicator/strategy evaluation off the event-loop thread.
+
+    mode="process": every pair is pinned to one of `workers` single-process
+    executors (symbol affinity), candles travel through SharedCandleStore.
+    mode="inline": evaluate on the loop thread, as before.
+
+    While a pair is being evaluated its slots are not rewritten; further
+    submits for it are conflated into one re-run on the latest candles once
+    the current run finishes. Results go to `on_result(pair, interval, result)`.
+    Each worker keeps a VerdictCache; `stats()` sums their hit rates per role.
+    Evaluation times are added to `timings` (ws_capture.LatencyStats) if given.
+    """
+    def __init__(self, symbol_data, pairs, intervals, on_result, mode="process", workers=4, capacity=200,
+                 timings=None):
+        self.symbol_data = symbol_data
+        self.intervals = list(intervals)
+        self.on_result = on_result
+        self.mode = mode
+        self.in_flight = set()
+        self.pending = {}
+        self._tasks = set()  # the loop only holds weak references to tasks
+        self.evaluations = 0
+        self.busy_time = 0.0
+        self.pairs = list(pairs)
+        self.workers = workers
+        self.capacity = capacity
+        self.timings = timings
+        self.cache_stats = {}  # worker -> VerdictCache.stats()
+        self.store = None
+        self.executors = []
+
+    def _start(self):
+        # Created on first use, so importing the app in a spawned child stays cheap.
+        self.store = SharedCandleStore(self.pairs, self.intervals, self.capacity)
+        self.executors = [
+            ProcessPoolExecutor(max_workers=1, initializer=_attach_store, initargs=(self.store.spec(),))
+            for _ in range(self.workers)
+        ]
+
+    def _worker_of(self, pair):
+        return zlib.crc32(pair.encode()) % self.workers
+
+    def submit(self, pair, interval):
+        if pair in self.in_flight:
+            self.pending[pair] = interval
+            return
+        self.in_flight.add(pair)
+        task = asyncio.get_running_loop().create_task(self._run(pair, interval))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pair, interval):
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    result, cache_stats = await self._evaluate(pair)
+                    # inline mode shares one cache for every pair
+                    self.cache_stats[self._worker_of(pair) if self.mode == "process" else None] = cache_stats
+                except Exception as e:
+                    print(f"[EVAL ERROR] {pair}: {e}")
+                    result = None
+                self.evaluations += 1
+                elapsed = time.perf_counter() - started
+                self.busy_time += elapsed
+                if self.timings is not None:
+                    self.timings.add("evaluate", elapsed)
+                if result is not None:
+                    self.on_result(pair, interval, result)
+                if pair not in self.pending:
+                    break
+                interval = self.pending.pop(pair)
+        finally:
+            self.in_flight.discard(pair)
+
+    async def _evaluate(self, pair):
+        buffers = self.symbol_data[pair]
+        if self.mode != "process":
+            frames = {tf: buffers[tf].to_frame() for tf in self.intervals}
+            return evaluate_frames(frames, pair, _CACHE), _CACHE.stats()
+        if self.store is None:
+            self._start()
+        for tf in self.intervals:
+            self.store.publish(pair, tf, buffers[tf])
+        executor = self.executors[self._worker_of(pair)]
+        return await asyncio.get_running_loop().run_in_executor(executor, evaluate_symbol, pair)
+
+    def stats(self):
+        return {
+            "mode": self.mode,
+            "evaluations": self.evaluations,
+            "in_flight": len(self.in_flight),
+            "avg_ms": round(self.busy_time / self.evaluations * 1000, 2) if self.evaluations else None,
+            "cache_hit_rate": self.cache_hit_rates()
+        }
+
+    def cache_hit_rates(self):
+        rates = {}
+        for role in TIMEFRAME_ROLES:
+            hits = sum(stats[role]["hits"] for stats in self.cache_stats.values())
+            misses = sum(stats[role]["misses"] for stats in self.cache_stats.values())
+            rates[role] = round(hits / (hits + misses), 3) if hits + misses else None
+        return rates
+
+    def shutdown(self):
+        # a task cancelled before it started never reaches _run's finally
+        for task in list(self._tasks):
+            task.cancel()
+        self.in_flight.clear()
+        self.pending.clear()
+        for executor in self.executors:
+            executor.shutdown()
+        if self.store is not None:
+            self.store.close()
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes up from a short sleep."""
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.samples = 0
+        self.total = 0.0
+        self.max_lag = 0.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - started - self.interval
+            self.samples += 1
+            self.total += lag
+            self.max_lag = max(self.max_lag, lag)
+
+    def stats(self):
+        return {
+            "avg_lag_ms": round(self.total / self.samples * 1000, 2) if self.samples else None,
+            "max_lag_ms": round(self.max_lag * 1000, 2)
+        }
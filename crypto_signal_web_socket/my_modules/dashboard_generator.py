@@ -3,7 +3,7 @@ import pandas as pd
 import plotly.graph_objs as go
 from my_modules.metrics import calculate_metrics
 
-def generate_dashboard(trade_log, output_html="backtest_report.html"):
+def generate_dashboard(trade_log, output_html="backtest_report.html", stats=None, robustness=None):
     df = pd.DataFrame(trade_log)
     if df.empty or 'return' not in df.columns:
         print("No trades found.")
@@ -28,8 +28,8 @@ def generate_dashboard(trade_log, output_html="backtest_report.html"):
         mode='markers', name='Sell', marker=dict(color='red', symbol='triangle-down', size=8)
     )
 
-    # Performance stats table
-    stats = calculate_metrics(trade_log)
+    # Performance stats table (or a MetricsAccumulator snapshot that is already up to date)
+    stats = stats or calculate_metrics(trade_log)
     stats_table = go.Table(
         header=dict(values=["Metric", "Value"], fill_color='paleturquoise', align='left'),
         cells=dict(values=[list(stats.keys()), list(stats.values())], fill_color='lavender', align='left')
@@ -42,9 +42,18 @@ def generate_dashboard(trade_log, output_html="backtest_report.html"):
     # Save plots
     fig.write_html(output_html.replace(".html", "_equity.html"), auto_open=False)
 
-    # Save stats
+    # Save stats, with the robustness bands (robustness.robustness_report) below them
     stats_fig = go.Figure(data=[stats_table])
     stats_fig.update_layout(title='Performance Summary')
+    if robustness is not None and not robustness.empty:
+        stats_table.domain = dict(y=[0.55, 1])
+        bands_table = go.Table(
+            domain=dict(y=[0, 0.5]),
+            header=dict(values=list(robustness.columns), fill_color='paleturquoise', align='left'),
+            cells=dict(values=[robustness[c].tolist() for c in robustness.columns], fill_color='lavender', align='left')
+        )
+        stats_fig = go.Figure(data=[stats_table, bands_table])
+        stats_fig.update_layout(title='Performance Summary and Robustness (resampled trades)', height=900)
     stats_fig.write_html(output_html.replace(".html", "_stats.html"), auto_open=False)
 
     print(f"✅ Dashboard saved to: {output_html.replace('.html', '_equity.html')} and _stats.html")
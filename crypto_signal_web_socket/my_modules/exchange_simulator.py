@@ -0,0 +1,399 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import websockets
+from my_modules.candle_buffer import CandleBuffer, FIELDS
+from my_modules.candle_aggregator import interval_to_ms
+from my_modules.ws_capture import read_frames
+from my_modules.ws_router import loads
+
+# REST `type` codes (matched case-insensitively) -> bot intervals
+REST_TYPES = {"minute1": "1min", "minute5": "5min", "minute15": "15min", "hour1": "1h", "hour4": "4h"}
+SIM_INTERVALS = list(REST_TYPES.values())
+
+
+def _iso(ts_ms):
+    return datetime.fromtimestamp(ts_ms / 1000, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3]
+
+
+class MarketState:
+    """
+    What the simulated exchange knows per pair: candles of every interval,
+    the last price and the last depth snapshot. A pair is listed once it has
+    a price; with a `seeder` unknown pairs are created on first request.
+
+    Only 1min candles are fed in (`apply_kline`); the other intervals are
+    merged from them the same way the exchange would build them.
+    """
+    def __init__(self, history=1000, seeder=None):
+        self.history = history
+        self.seeder = seeder
+        self.candles = {}
+        self.last_price = {}
+        self.day_open = {}
+        self.depth = {}
+        self.lock = threading.Lock()
+
+    @property
+    def pairs(self):
+        return list(self.last_price)
+
+    def _add_pair(self, pair):
+        for interval in SIM_INTERVALS:
+            self.candles.setdefault((pair, interval), CandleBuffer(self.history))
+
+    def ensure(self, pair):
+        """True if `pair` is traded, seeding it first when a seeder is set."""
+        with self.lock:
+            if pair and pair not in self.last_price and self.seeder is not None:
+                self.seeder(pair)
+            return pair in self.last_price
+
+    def seed_synthetic(self, pair, price, end_ms, rng, volatility=0.001):
+        """Random-walk history for every interval, ending at `price` in the bucket holding `end_ms`."""
+        self._add_pair(pair)
+        for interval in SIM_INTERVALS:
+            step = interval_to_ms(interval)
+            n = self.history
+            returns = rng.normal(0, volatility * np.sqrt(step / 60_000), n)
+            close = price * np.exp(np.cumsum(returns) - returns.sum())
+            open_ = np.r_[close[0], close[:-1]]
+            spread = np.abs(rng.normal(0, volatility, n)) * close
+            first = end_ms - end_ms % step - (n - 1) * step
+            buffer = self.candles[(pair, interval)]
+            for i in range(n):
+                buffer.append(first + i * step, open_[i], max(open_[i], close[i]) + spread[i],
+                              min(open_[i], close[i]) - spread[i], close[i], rng.uniform(1, 100) * step / 60_000)
+        self.last_price[pair] = self.day_open[pair] = price
+
+    def seed_archive(self, archive, pair):
+        """History from a CandleArchive; returns False when the archive has nothing for the pair."""
+        found = False
+        self._add_pair(pair)
+        for interval in SIM_INTERVALS:
+            arrays = archive.read(pair, interval)
+            buffer = self.candles[(pair, interval)]
+            for row in zip(*(arrays[field][-self.history:] for field in FIELDS)):
+                buffer.append(*row)
+                found = True
+        if len(self.candles[(pair, "1min")]):
+            self.last_price[pair] = self.day_open[pair] = self.candles[(pair, "1min")].last()
+        return found
+
+    def apply_kline(self, pair, kline):
+        """1min [ts_ms, o, h, l, c, v] (the forming candle, possibly repeated) -> every interval."""
+        ts, o, h, l, c, v = kline
+        with self.lock:
+            minute = self.candles[(pair, "1min")]
+            added = v
+            if len(minute) and minute.last("timestamp") == ts:
+                added = v - minute.last("volume")
+            minute.update(kline)
+            for interval in SIM_INTERVALS[1:]:
+                buffer = self.candles[(pair, interval)]
+                bucket = ts - ts % interval_to_ms(interval)
+                if len(buffer) and buffer.last("timestamp") == bucket:
+                    buffer.update([bucket, buffer.last("open_price"), max(buffer.last("high_price"), h),
+                                   min(buffer.last("low_price"), l), c, buffer.last("volume") + added])
+                else:
+                    buffer.update([bucket, o, h, l, c, v])
+            self.last_price[pair] = c
+            self.day_open.setdefault(pair, o)
+
+    def klines(self, pair, interval, size, start_sec=None):
+        """LBank kline.do rows [ts_sec, o, h, l, c, v]: `size` candles from `start_sec`, else the latest."""
+        with self.lock:
+            arrays = self.candles[(pair, interval)].arrays()
+            ts = arrays["timestamp"]
+            first = int(np.searchsorted(ts, start_sec * 1000)) if start_sec else len(ts)
+            if first >= len(ts):
+                first = max(0, len(ts) - size)
+            rows = slice(first, first + size)
+            return [[int(t) // 1000, float(o), float(h), float(l), float(c), float(v)] for t, o, h, l, c, v in zip(
+                ts[rows], arrays["open_price"][rows], arrays["high_price"][rows],
+                arrays["low_price"][rows], arrays["close_price"][rows], arrays["volume"][rows])]
+
+    def ticker(self, pair):
+        with self.lock:
+            day = self.candles[(pair, "1min")].arrays()
+            tail = slice(-1440, None)
+            latest = self.last_price[pair]
+            return {
+                "latest": latest,
+                "high": float(day["high_price"][tail].max()),
+                "low": float(day["low_price"][tail].min()),
+                "vol": float(day["volume"][tail].sum()),
+                "change": round((latest / self.day_open[pair] - 1) * 100, 2),
+                "turnover": float((day["volume"][tail] * day["close_price"][tail]).sum())
+            }
+
+
+class SyntheticFeed:
+    """
+    Random-walk market: every 1/`rate` seconds each pair gets a trade and
+    one kbar, tick and depth frame (only built when someone listens). Pairs
+    are created with a random price the first time the bot asks for them.
+    """
+    def __init__(self, state, rate=1.0, volatility=0.001, depth_levels=50, seed=None):
+        self.state = state
+        self.rate = rate
+        self.volatility = volatility
+        self.depth_levels = depth_levels
+        self.rng = np.random.default_rng(seed)
+
+    def seed(self):
+        self.state.seeder = self._seed_pair
+
+    def _seed_pair(self, pair):
+        now = int(time.time() * 1000)
+        self.state.seed_synthetic(pair, float(self.rng.uniform(1, 1000)), now, self.rng, self.volatility)
+
+    async def frames(self):
+        while True:
+            started = time.monotonic()
+            now = int(time.time() * 1000)
+            minute = now - now % 60_000
+            for pair in self.state.pairs:
+                price = self.state.last_price[pair] * float(np.exp(self.rng.normal(0, self.volatility)))
+                volume = float(self.rng.uniform(0.01, 2))
+                buffer = self.state.candles[(pair, "1min")]
+                if buffer.last("timestamp") == minute:
+                    kline = [minute, buffer.last("open_price"), max(buffer.last("high_price"), price),
+                             min(buffer.last("low_price"), price), price, buffer.last("volume") + volume]
+                else:
+                    kline = [minute, price, price, price, price, volume]
+                self.state.apply_kline(pair, kline)
+                yield "kbar", pair, lambda pair=pair, kline=kline: self.kbar_frame(pair, kline, now)
+                yield "tick", pair, lambda pair=pair: self.tick_frame(pair, now)
+                yield "depth", pair, lambda pair=pair, price=price: self.depth_frame(pair, price, now)
+            await asyncio.sleep(max(0.0, 1 / self.rate - (time.monotonic() - started)))
+
+    @staticmethod
+    def kbar_frame(pair, kline, now):
+        ts, o, h, l, c, v = kline
+        return json.dumps({"kbar": {"t": _iso(ts), "o": o, "h": h, "l": l, "c": c, "v": v, "a": v * c,
+                                    "n": 1, "slot": "1min"},
+                           "type": "kbar", "pair": pair, "SERVER": "V2", "TS": _iso(now)})
+
+    def tick_frame(self, pair, now):
+        return json.dumps({"tick": self.state.ticker(pair), "type": "tick", "pair": pair,
+                           "SERVER": "V2", "TS": _iso(now)})
+
+    def depth_frame(self, pair, price, now):
+        steps = np.arange(1, self.depth_levels + 1) * price * 0.0005
+        sizes = self.rng.exponential(1.0, (2, self.depth_levels)).round(4)
+        depth = {"asks": [[round(price + s, 8), float(q)] for s, q in zip(steps, sizes[0])],
+                 "bids": [[round(price - s, 8), float(q)] for s, q in zip(steps, sizes[1])]}
+        self.state.depth[pair] = depth
+        return json.dumps({"depth": depth, "count": self.depth_levels, "type": "depth", "pair": pair,
+                           "SERVER": "V2", "TS": _iso(now)})
+
+
+class RecordedFeed:
+    """
+    Frames of a ws_capture log, sent as recorded at `speed` x the recorded
+    pacing (0 = back to back). Klines also update the REST state.
+    """
+    def __init__(self, state, path, speed=1.0, volatility=0.001, seed=None):
+        self.state = state
+        self.path = path
+        self.speed = speed
+        self.volatility = volatility
+        self.rng = np.random.default_rng(seed)
+
+    def seed(self):
+        # synthetic history leading into the first recorded candle of every pair without one
+        for _, frame in read_frames(self.path):
+            data = loads(frame)
+            pair = data.get("pair")
+            if data.get("type") == "kbar" and pair not in self.state.last_price:
+                k = data["kbar"]
+                start = int(datetime.fromisoformat(k["t"]).replace(tzinfo=timezone.utc).timestamp() * 1000)
+                self.state.seed_synthetic(pair, float(k["o"]), start, self.rng, self.volatility)
+
+    async def frames(self):
+        first_ns = None
+        started = time.monotonic()
+        for received_ns, frame in read_frames(self.path):
+            first_ns = first_ns or received_ns
+            if self.speed:
+                delay = (received_ns - first_ns) / 1e9 / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            data = loads(frame)
+            channel, pair = data.get("type"), data.get("pair")
+            if pair not in self.state.last_price:
+                continue  # pings and pairs without klines in the capture
+            if channel == "kbar" and data["kbar"].get("slot") == "1min":
+                k = data["kbar"]
+                ts = int(datetime.fromisoformat(k["t"]).replace(tzinfo=timezone.utc).timestamp() * 1000)
+                self.state.apply_kline(pair, [ts] + [float(k[f]) for f in "ohlcv"])
+            elif channel == "depth":
+                self.state.depth[pair] = data["depth"]
+            elif channel != "tick":
+                continue
+            yield channel, pair, lambda frame=frame: frame
+            if not self.speed:
+                await asyncio.sleep(0)
+
+
+class _RestHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, code, msg):
+        self._reply({"result": "false", "error_code": code, "msg": msg, "ts": int(time.time() * 1000)})
+
+    def _ok(self, data):
+        self._reply({"result": "true", "data": data, "error_code": 0, "ts": int(time.time() * 1000)})
+
+    def do_GET(self):
+        sim = self.server.simulator
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        sim.requests[url.path] = sim.requests.get(url.path, 0) + 1
+        pair = query.get("symbol")
+        if url.path == "/v2/kline.do":
+            interval = REST_TYPES.get(query.get("type", "").lower())
+            if not sim.state.ensure(pair) or interval is None:
+                return self._error(10008, "invalid symbol or type")
+            start = int(query["time"]) if query.get("time") else None
+            return self._ok(sim.state.klines(pair, interval, int(query.get("size", 100)), start))
+        if url.path == "/v2/ticker.do":
+            if not sim.state.ensure(pair):
+                return self._error(10008, "invalid symbol")
+            return self._ok([{"symbol": pair, "ticker": sim.state.ticker(pair), "timestamp": int(time.time() * 1000)}])
+        self._reply({"result": "false", "error_code": 404, "msg": "not found"}, status=404)
+
+    def do_POST(self):
+        sim = self.server.simulator
+        path = urlparse(self.path).path
+        sim.requests[path] = sim.requests.get(path, 0) + 1
+        length = int(self.headers.get("Content-Length", 0))
+        params = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+        if not all(params.get(k) for k in ("api_key", "sign", "timestamp")):
+            return self._error(10002, "missing api_key/sign/timestamp")
+        if path == "/v2/create_order.do":
+            return self._ok(sim.create_order(params))
+        if path in ("/v2/order_info.do", "/v2/cancel_order.do"):
+            order = sim.orders.get(params.get("order_id"))
+            if order is None:
+                return self._error(10025, "order not found")
+            if path == "/v2/cancel_order.do" and order["status"] == 0:
+                order["status"] = -1
+            return self._ok(order)
+        self._reply({"result": "false", "error_code": 404, "msg": "not found"}, status=404)
+
+
+class ExchangeSimulator:
+    """
+    Local stand-in for LBank: a V2 WebSocket server (kbar/tick/depth
+    subscriptions, server pings) and the REST endpoints the bot uses
+    (kline.do, ticker.do, create_order.do, order_info.do, cancel_order.do).
+
+    Point the bot at it with LBANK_WS_URL=ws://host:ws_port/ws/V2/ and
+    LBANK_REST_URL=http://host:rest_port. Market orders fill at the last
+    price; limit orders are accepted and stay open.
+    """
+    def __init__(self, feed, host="127.0.0.1", ws_port=8765, rest_port=8766, ping_interval=30):
+        self.feed = feed
+        self.state = feed.state
+        self.host = host
+        self.ws_port = ws_port
+        self.rest_port = rest_port
+        self.ping_interval = ping_interval
+        self.subscribers = {}  # (channel, pair) -> set of connections
+        self.orders = {}
+        self.requests = {}
+        self.frames_sent = 0
+        self.rest = None
+
+    def create_order(self, params):
+        order_id = str(uuid.uuid4())
+        side, _, kind = params.get("type", "buy").partition("_")
+        price = self.state.last_price.get(params.get("symbol"))
+        market = kind == "market"
+        self.orders[order_id] = {
+            "order_id": order_id, "symbol": params.get("symbol"), "type": params.get("type"),
+            "amount": float(params.get("amount", 0)),
+            "price": price if market else float(params.get("price", 0)),
+            "deal_amount": float(params.get("amount", 0)) if market else 0.0,
+            "status": 2 if market else 0,  # 2 = filled, 0 = open, -1 = cancelled
+            "create_time": int(time.time() * 1000)
+        }
+        return {"symbol": params.get("symbol"), "order_id": order_id}
+
+    async def _serve_client(self, ws):
+        subscribed = set()
+        try:
+            async for msg in ws:
+                data = loads(msg)
+                action = data.get("action")
+                if action == "ping":
+                    await ws.send(json.dumps({"action": "pong", "pong": data.get("ping")}))
+                elif action in ("subscribe", "unsubscribe"):
+                    channel = data.get(action, "")
+                    pair = data.get("pair")
+                    if "." in channel:  # legacy "ticker.btc_usdt"
+                        channel, pair = channel.split(".", 1)
+                    key = ("tick" if channel == "ticker" else channel, pair)
+                    if action == "subscribe" and self.state.ensure(pair):
+                        self.subscribers.setdefault(key, set()).add(ws)
+                        subscribed.add(key)
+                    else:
+                        self.subscribers.get(key, set()).discard(ws)
+        finally:
+            for key in subscribed:
+                self.subscribers.get(key, set()).discard(ws)
+
+    async def _publish(self):
+        async for channel, pair, build in self.feed.frames():
+            clients = self.subscribers.get((channel, pair))
+            if clients:
+                websockets.broadcast(clients, build())
+                self.frames_sent += len(clients)
+
+    async def _ping(self):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            clients = set().union(*self.subscribers.values()) if self.subscribers else set()
+            websockets.broadcast(clients, json.dumps({"action": "ping", "ping": str(uuid.uuid4())}))
+
+    def start_rest(self):
+        self.rest = ThreadingHTTPServer((self.host, self.rest_port), _RestHandler)
+        self.rest.daemon_threads = True
+        self.rest.simulator = self
+        self.rest_port = self.rest.server_address[1]
+        threading.Thread(target=self.rest.serve_forever, daemon=True).start()
+
+    async def run(self, ready=None):
+        self.feed.seed()
+        self.start_rest()
+        async with websockets.serve(self._serve_client, self.host, self.ws_port) as server:
+            self.ws_port = server.sockets[0].getsockname()[1]
+            print(f"🧪 Simulator: ws://{self.host}:{self.ws_port}/ws/V2/ | http://{self.host}:{self.rest_port} "
+                  f"| {len(self.state.pairs)} pairs")
+            if ready is not None:
+                ready.set()
+            try:
+                await asyncio.gather(self._publish(), self._ping())
+            finally:
+                self.rest.shutdown()
+
+    def stats(self):
+        return {"frames_sent": self.frames_sent, "orders": len(self.orders), "requests": dict(self.requests),
+                "subscriptions": sum(len(c) for c in self.subscribers.values())}
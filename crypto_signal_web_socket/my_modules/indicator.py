@@ -16,6 +16,8 @@ class IndicatorCalculator:
         self.df['senkou_span_a'] = ((self.df['tenkan_sen'] + self.df['kijun_sen']) / 2).shift(kijun)
         self.df['senkou_span_b'] = ((high.rolling(senkou).max() + low.rolling(senkou).min()) / 2).shift(kijun)
         self.df['chikou_span'] = close.shift(-kijun)
+        # price under today's chikou point (it is plotted kijun bars back)
+        self.df['chikou_reference'] = close.shift(kijun)
         return self
 
     def calculate_keltner(self, ema_period=20, atr_period=10, multiplier=2):
@@ -123,17 +125,10 @@ class IndicatorCalculator:
         df['bullish_score'] = df[['hammer', 'inv_hammer', 'bullish_engulfing']].sum(axis=1)
         df['bearish_score'] = df[['bearish_engulfing']].sum(axis=1)
 
-        def classify(row):
-            if row['doji']:
-                return "Neutral"
-            if row['bullish_score'] > row['bearish_score']:
-                return "Bullish"
-            elif row['bearish_score'] > row['bullish_score']:
-                return "Bearish"
-            else:
-                return "Neutral"
-
-        df['patterns_result'] = df.apply(classify, axis=1)
+        # doji first, then whichever score is higher; ties are Neutral
+        df['patterns_result'] = np.select(
+            [df['doji'], df['bullish_score'] > df['bearish_score'], df['bearish_score'] > df['bullish_score']],
+            ["Neutral", "Bullish", "Bearish"], default="Neutral")
         return self
 
     def get_df(self):
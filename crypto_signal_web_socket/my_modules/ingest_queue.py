@@ -0,0 +1,130 @@
+import asyncio
+import inspect
+import time
+import zlib
+from collections import OrderedDict
+from my_modules.ws_router import channel_key
+
+
+def ingest_key(data):
+    """
+    Conflation key of a frame: one slot per channel and pair. Klines also key
+    on the candle time, so the last update of a closing candle is never
+    overwritten by the first update of the next one.
+    """
+    channel, pair = channel_key(data)
+    if channel == "kbar":
+        return channel, pair, data["kbar"].get("t")
+    return channel, pair
+
+
+class ConflatingQueue:
+    """
+    Bounded asyncio queue that keeps only the latest item per key.
+
+    A new item for a key that is still waiting replaces it in place (the key
+    keeps its position), so a busy symbol cannot crowd out the others. When
+    `maxsize` distinct keys are waiting, the oldest one is dropped. put_nowait
+    never blocks, so the socket reader is never held up by slow consumers.
+    """
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._items = OrderedDict()  # key -> (enqueued_at, item)
+        self._ready = asyncio.Event()
+        self.received = 0
+        self.conflated = 0
+        self.dropped = 0
+        self.processed = 0
+        self.max_depth = 0
+        self.last_wait = 0.0
+        self.max_wait = 0.0  # longest wait since IngestPipeline.stats() last reset it
+
+    def __len__(self):
+        return len(self._items)
+
+    def put_nowait(self, key, item):
+        self.received += 1
+        entry = self._items.get(key)
+        if entry is not None:
+            self._items[key] = (entry[0], item)
+            self.conflated += 1
+            return
+        if len(self._items) >= self.maxsize:
+            self._items.popitem(last=False)
+            self.dropped += 1
+        self._items[key] = (time.monotonic(), item)
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._ready.set()
+
+    async def get(self):
+        while not self._items:
+            self._ready.clear()
+            await self._ready.wait()
+        key, (enqueued_at, item) = self._items.popitem(last=False)
+        self.last_wait = time.monotonic() - enqueued_at
+        if self.last_wait > self.max_wait:
+            self.max_wait = self.last_wait
+        return key, item
+
+
+class IngestPipeline:
+    """
+    Decouples the WebSocket receiver from frame processing.
+
+    `submit` is the receiver's on_message callback: it only computes the
+    conflation key and enqueues. Each pair is pinned to one of `workers`
+    queues, so a pair's frames are handled in order by a single worker while
+    different pairs are processed side by side.
+
+    With `timings` (ws_capture.LatencyStats) the queue wait, the handler time
+    and their sum ("ingest_e2e") are recorded per frame.
+    """
+    def __init__(self, handler, workers=4, maxsize=1000, key=ingest_key, timings=None):
+        self.handler = handler
+        self.timings = timings
+        self.key = key
+        self.queues = [ConflatingQueue(maxsize) for _ in range(workers)]
+
+    def __len__(self):
+        return sum(len(q) for q in self.queues)
+
+    def submit(self, data):
+        key = self.key(data)
+        pair = key[1] or ""
+        self.queues[zlib.crc32(pair.encode()) % len(self.queues)].put_nowait(key, data)
+
+    async def run(self):
+        await asyncio.gather(*(self._work(queue) for queue in self.queues))
+
+    async def _work(self, queue):
+        while True:
+            _, data = await queue.get()
+            started = time.perf_counter()
+            try:
+                result = self.handler(data)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"[INGEST ERROR] {e}")
+            queue.processed += 1
+            if self.timings is not None:
+                handled = time.perf_counter() - started
+                self.timings.add("queue", queue.last_wait)
+                self.timings.add("handler", handled)
+                self.timings.add("ingest_e2e", queue.last_wait + handled)
+            await asyncio.sleep(0)  # let the receiver run between items
+
+    def stats(self):
+        """Queue counters; max_wait_ms is the longest queue wait since the previous call."""
+        max_wait = max(q.max_wait for q in self.queues)
+        for q in self.queues:
+            q.max_wait = 0.0
+        return {
+            "depth": len(self),
+            "max_depth": max(q.max_depth for q in self.queues),
+            "received": sum(q.received for q in self.queues),
+            "processed": sum(q.processed for q in self.queues),
+            "conflated": sum(q.conflated for q in self.queues),
+            "dropped": sum(q.dropped for q in self.queues),
+            "max_wait_ms": round(max_wait * 1000, 1)
+        }
@@ -0,0 +1,287 @@
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from my_modules.candle_aggregator import interval_to_ms
+from my_modules.candle_archive import COLUMNS
+from my_modules.utils import KLINE_URL
+
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`."""
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                time.sleep((1 - self.tokens) / self.rate)
+
+
+def month_of(ts):
+    """'YYYY-MM' partition of each epoch-ms timestamp."""
+    return np.datetime_as_string(np.asarray(ts, dtype="datetime64[ms]").astype("datetime64[M]"))
+
+
+class KlineCache:
+    """
+    Local columnar cache of downloaded klines, partitioned by month.
+
+    Layout: <root>/<pair>/<interval>/<YYYY-MM>/<column>.bin with the
+    CandleArchive column files (epoch-ms timestamps, sorted and unique),
+    plus coverage.json: the [start, end] bar ranges already downloaded, so
+    candles the exchange never had are not asked for again.
+    """
+    def __init__(self, root="kline_cache"):
+        self.root = root
+
+    def _dir(self, pair, interval):
+        return os.path.join(self.root, pair, interval)
+
+    def partitions(self, pair, interval):
+        folder = self._dir(pair, interval)
+        if not os.path.isdir(folder):
+            return []
+        # "<month>.tmp" / "<month>.old" are leftovers of an interrupted write
+        return sorted(name for name in os.listdir(folder) if len(name) == 7 and name[4] == "-")
+
+    def coverage(self, pair, interval):
+        path = os.path.join(self._dir(pair, interval), "coverage.json")
+        if not os.path.exists(path):
+            return []
+        with open(path) as f:
+            return json.load(f)
+
+    def _mark_covered(self, pair, interval, start, end):
+        step = interval_to_ms(interval)
+        merged = []
+        for a, b in sorted(self.coverage(pair, interval) + [[start, end]]):
+            if merged and a <= merged[-1][1] + step:
+                merged[-1][1] = max(merged[-1][1], b)
+            else:
+                merged.append([a, b])
+        path = os.path.join(self._dir(pair, interval), "coverage.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(merged, f)
+        os.replace(path + ".tmp", path)
+
+    def missing(self, pair, interval, start, end):
+        """[(start, end)] bar-open ranges (ms) of start..end not downloaded yet."""
+        step = interval_to_ms(interval)
+        start, end = -(-start // step) * step, end // step * step
+        gaps, cursor = [], start
+        for a, b in self.coverage(pair, interval):
+            if b < cursor:
+                continue
+            if a > end:
+                break
+            if a > cursor:
+                gaps.append((cursor, min(a - step, end)))
+            cursor = b + step
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def _read_partition(self, folder):
+        arrays = {column: np.fromfile(os.path.join(folder, f"{column}.bin"), dtype=dtype)
+                  for column, dtype in COLUMNS.items()}
+        n = min(len(arr) for arr in arrays.values())
+        return {column: arr[:n] for column, arr in arrays.items()}
+
+    def _write_partition(self, folder, arrays):
+        # write beside the partition and swap it in, so readers never see half a month
+        tmp, old = folder + ".tmp", folder + ".old"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for column, dtype in COLUMNS.items():
+            np.asarray(arrays[column], dtype=dtype).tofile(os.path.join(tmp, f"{column}.bin"))
+        if os.path.exists(folder):
+            os.replace(folder, old)
+        os.replace(tmp, folder)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def write(self, pair, interval, candles, start, end):
+        """
+        Merge {column: array} candles into their month partitions (newer
+        downloads win on equal timestamps) and mark start..end as covered.
+        Returns the number of candles written.
+        """
+        os.makedirs(self._dir(pair, interval), exist_ok=True)
+        ts = np.asarray(candles["timestamp"], dtype=np.int64)
+        months = month_of(ts)
+        for month in np.unique(months):
+            rows = months == month
+            folder = os.path.join(self._dir(pair, interval), str(month))
+            new = {column: np.asarray(candles[column], dtype=dtype)[rows] for column, dtype in COLUMNS.items()}
+            if os.path.exists(folder):
+                old = self._read_partition(folder)
+                new = {column: np.concatenate([old[column], new[column]]) for column in COLUMNS}
+            # stable sort on the reversed rows keeps the last copy of a timestamp first
+            order = np.argsort(new["timestamp"][::-1], kind="stable")
+            merged = {column: arr[::-1][order] for column, arr in new.items()}
+            first = np.r_[True, merged["timestamp"][1:] != merged["timestamp"][:-1]]
+            self._write_partition(folder, {column: arr[first] for column, arr in merged.items()})
+        self._mark_covered(pair, interval, start, end)
+        return len(ts)
+
+    def read(self, pair, interval, start=None, end=None):
+        """Cached columns with start <= timestamp <= end (ms), read only from the months they touch."""
+        months = self.partitions(pair, interval)
+        if start is not None:
+            months = [m for m in months if m >= str(month_of(start))]
+        if end is not None:
+            months = [m for m in months if m <= str(month_of(end))]
+        parts = [self._read_partition(os.path.join(self._dir(pair, interval), m)) for m in months]
+        if not parts:
+            return {column: np.empty(0, dtype=dtype) for column, dtype in COLUMNS.items()}
+        arrays = {column: np.concatenate([part[column] for part in parts]) for column in COLUMNS}
+        ts = arrays["timestamp"]
+        lo = int(np.searchsorted(ts, start, side="left")) if start is not None else 0
+        hi = int(np.searchsorted(ts, end, side="right")) if end is not None else len(ts)
+        return {column: arr[lo:hi] for column, arr in arrays.items()}
+
+    def to_frame(self, pair, interval, start=None, end=None):
+        """Backtester layout: datetime index and *_price columns."""
+        arrays = self.read(pair, interval, start, end)
+        df = pd.DataFrame({column: arr for column, arr in arrays.items() if column != "timestamp"})
+        df.index = pd.to_datetime(arrays["timestamp"], unit="ms")
+        df.index.name = "timestamp"
+        return df
+
+
+class KlineDownloader:
+    """
+    Fills a KlineCache from /v2/kline.do for arbitrary date ranges.
+
+    Only the ranges the cache has not covered yet are requested. Each one is
+    paged backwards from its end in `page_size` candles (the `time` parameter
+    is a page's first candle), so an interrupted download still leaves the
+    most recent history cached; a page with no candles is taken as the start
+    of the pair's listing. Requests share one pooled requests.Session and a
+    token bucket; (pair, interval) streams run on `max_concurrency` threads.
+    """
+    def __init__(self, rest_code_map, cache=None, base_url=KLINE_URL, page_size=2000, rate_per_sec=10,
+                 max_concurrency=4, retries=3, backoff=0.5, timeout=10, session=None):
+        self.rest_code_map = rest_code_map
+        self.cache = cache or KlineCache()
+        self.base_url = base_url
+        self.page_size = page_size
+        self.rate_per_sec = rate_per_sec
+        self.limiter = RateLimiter(rate_per_sec)
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or self._make_session(max_concurrency)
+        self.requests = 0
+        self._count_lock = threading.Lock()
+
+    @staticmethod
+    def _make_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def __getstate__(self):
+        # worker processes get their own session and limiter
+        state = dict(self.__dict__)
+        for name in ("session", "limiter", "_count_lock"):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.session = self._make_session(self.max_concurrency)
+        self.limiter = RateLimiter(self.rate_per_sec)
+        self._count_lock = threading.Lock()
+
+    def fetch_page(self, pair, interval, start):
+        """Up to page_size candles from `start` (ms) on, as {column: array} with ms timestamps."""
+        params = {"symbol": pair, "size": self.page_size, "type": self.rest_code_map[interval],
+                  "time": str(start // 1000)}
+        attempt = 0
+        while True:
+            attempt += 1
+            self.limiter.acquire()
+            with self._count_lock:
+                self.requests += 1
+            try:
+                response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+                response.raise_for_status()
+                data = response.json()
+                if data.get("result") in (False, "false"):
+                    raise ValueError(f"error {data.get('error_code')}: {data.get('msg')}")
+                break
+            except Exception as e:
+                if attempt > self.retries:
+                    raise
+                print(f"[WARN] kline page {pair}-{interval}@{start} failed ({e}), retry {attempt}")
+                time.sleep(self.backoff * 2 ** (attempt - 1) * (0.5 + random.random()))
+        rows = np.asarray(data.get("data") or [], dtype=np.float64).reshape(-1, 6)
+        return {
+            "timestamp": rows[:, 0].astype(np.int64) * 1000,  # REST returns seconds
+            **{column: rows[:, k] for k, column in enumerate(list(COLUMNS)[1:], 1)}
+        }
+
+    def _download_range(self, pair, interval, start, end):
+        step = interval_to_ms(interval)
+        pages, cursor = [], end
+        try:
+            while cursor >= start:
+                page_start = max(start, cursor - (self.page_size - 1) * step)
+                page = self.fetch_page(pair, interval, page_start)
+                ts = page["timestamp"]
+                inside = (ts >= page_start) & (ts <= cursor)
+                pages.append({column: arr[inside] for column, arr in page.items()})
+                if not inside.any():
+                    cursor = start - step  # nothing this far back
+                    break
+                cursor = page_start - step
+        except Exception as e:
+            print(f"[ERROR] download of {pair}-{interval} stopped at {pd.to_datetime(cursor, unit='ms')}: {e}")
+        if not pages:
+            return 0
+        candles = {column: np.concatenate([page[column] for page in pages[::-1]]) for column in COLUMNS}
+        return self.cache.write(pair, interval, candles, cursor + step, end)
+
+    def download(self, pair, interval, start, end=None):
+        """Fetch the missing parts of start..end (ms, default now) into the cache; returns candles written."""
+        step = interval_to_ms(interval)
+        last_closed = int(time.time() * 1000) // step * step - step
+        end = last_closed if end is None else min(end, last_closed)
+        return sum(self._download_range(pair, interval, a, b)
+                   for a, b in self.cache.missing(pair, interval, start, end))
+
+    def download_many(self, pairs, intervals, start, end=None):
+        """download() for every pair x interval concurrently -> {(pair, interval): candles written}."""
+        jobs = [(pair, interval) for pair in pairs for interval in intervals]
+        started, requests_before = time.perf_counter(), self.requests
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            written = list(pool.map(lambda job: self.download(*job, start, end), jobs))
+        print(f"⬇️ Downloaded {sum(written)} candles in {self.requests - requests_before} requests "
+              f"({time.perf_counter() - started:.1f}s)")
+        return dict(zip(jobs, written))
+
+    def load(self, pair, interval, start, end=None):
+        """Candles of start..end from the cache, downloading what is missing first."""
+        self.download(pair, interval, start, end)
+        return self.cache.to_frame(pair, interval, start, end)
@@ -44,3 +44,138 @@ def calculate_metrics(trade_log, risk_free_rate=0.01):
         "Max Drawdown": round(max_drawdown * 100, 2),
         "CAGR": round(cagr * 100, 2)
     }
+
+
+class MetricsAccumulator:
+    """
+    calculate_metrics kept up to date one closed trade at a time.
+
+    Every update is O(1): counts and sums for win rate / averages, Welford's
+    running mean and variance of the excess returns for Sharpe, and the
+    compounded equity with its running peak for max drawdown and CAGR.
+    `snapshot()` returns the same dict as calculate_metrics on the trades
+    seen so far.
+    """
+    def __init__(self, risk_free_rate=0.01):
+        self.risk_free = risk_free_rate / 252
+        self.count = 0
+        self.wins = 0
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.mean = 0.0  # of excess returns
+        self.m2 = 0.0
+        self.equity = 1.0
+        self.peak = -np.inf
+        self.max_drawdown = 0.0
+
+    def update(self, trade):
+        """Add one closed trade (a trade_log dict, or just its return)."""
+        ret = trade["return"] if isinstance(trade, dict) else trade
+        self.count += 1
+        if ret > 0:
+            self.wins += 1
+            self.gain_sum += ret
+        else:
+            self.loss_sum += ret
+
+        excess = ret - self.risk_free
+        delta = excess - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (excess - self.mean)
+
+        self.equity *= 1 + ret
+        self.peak = max(self.peak, self.equity)
+        self.max_drawdown = min(self.max_drawdown, self.equity / self.peak - 1)
+
+    def extend(self, trades):
+        for trade in trades:
+            self.update(trade)
+
+    def snapshot(self):
+        if self.count == 0:
+            return {}
+        losses = self.count - self.wins
+        win_rate = self.wins / self.count
+        avg_gain = self.gain_sum / self.wins if self.wins else 0
+        avg_loss = self.loss_sum / losses if losses else 0
+        profit_factor = abs(avg_gain / avg_loss) if avg_loss != 0 else np.inf
+        std = np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+        sharpe_ratio = self.mean / (std + 1e-10) * np.sqrt(252)
+        expectancy = (win_rate * avg_gain) + ((1 - win_rate) * avg_loss)
+        cagr = self.equity ** (252 / self.count) - 1
+        return {
+            "Total Trades": self.count,
+            "Win Rate": round(win_rate * 100, 2),
+            "Average Gain": round(avg_gain, 4),
+            "Average Loss": round(avg_loss, 4),
+            "Profit Factor": round(profit_factor, 3),
+            "Sharpe Ratio": round(sharpe_ratio, 3),
+            "Expectancy": round(expectancy, 4),
+            "Max Drawdown": round(self.max_drawdown * 100, 2),
+            "CAGR": round(cagr * 100, 2)
+        }
+
+
+def pad_returns(series):
+    """List of return sequences -> (returns [n_series, max_len], mask of the real trades)."""
+    lengths = np.array([len(s) for s in series], dtype=int)
+    width = max(int(lengths.max(initial=0)), 1)
+    mask = np.arange(width) < lengths[:, None]
+    returns = np.zeros((len(series), width))
+    returns[mask] = np.concatenate([np.asarray(s, dtype=float) for s in series]) if len(series) else []
+    return returns, mask
+
+
+def batch_metrics(returns, mask=None, risk_free_rate=0.01, rounded=True):
+    """
+    calculate_metrics for many return series at once.
+
+    returns: [n_series, n_trades] in trade order; mask marks the real
+    trades (default: all), padded cells are ignored. Returns {metric name:
+    array over series}, rounded like calculate_metrics unless
+    `rounded=False`; series without trades get 0 trades and NaN elsewhere.
+    """
+    returns = np.asarray(returns, dtype=float)
+    mask = np.ones(returns.shape, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+    r = np.where(mask, returns, 0.0)
+    count = mask.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        win = mask & (r > 0)
+        loss = mask & (r <= 0)
+        wins, losses = win.sum(axis=1), loss.sum(axis=1)
+        win_rate = wins / count
+        avg_gain = np.where(wins > 0, np.where(win, r, 0.0).sum(axis=1) / wins, 0.0)
+        avg_loss = np.where(losses > 0, np.where(loss, r, 0.0).sum(axis=1) / losses, 0.0)
+        profit_factor = np.where(avg_loss != 0, np.abs(avg_gain / avg_loss), np.inf)
+
+        excess = r - risk_free_rate / 252
+        mean = np.where(mask, excess, 0.0).sum(axis=1) / count
+        var = np.where(mask, (excess - mean[:, None]) ** 2, 0.0).sum(axis=1) / (count - 1)
+        std = np.where(count > 1, np.sqrt(var), np.nan)
+        sharpe_ratio = mean / (std + 1e-10) * np.sqrt(252)
+
+        # padded trades leave the equity unchanged and never set the peak
+        equity = np.cumprod(1 + r, axis=1)
+        peak = np.maximum.accumulate(np.where(mask, equity, -np.inf), axis=1)
+        max_drawdown = np.where(mask, equity / peak - 1, np.inf).min(axis=1)
+        expectancy = (win_rate * avg_gain) + ((1 - win_rate) * avg_loss)
+        cagr = equity[:, -1] ** (252 / count) - 1
+
+    empty = count == 0
+    out = {
+        "Total Trades": count,
+        "Win Rate": win_rate * 100,
+        "Average Gain": avg_gain,
+        "Average Loss": avg_loss,
+        "Profit Factor": profit_factor,
+        "Sharpe Ratio": sharpe_ratio,
+        "Expectancy": expectancy,
+        "Max Drawdown": max_drawdown * 100,
+        "CAGR": cagr * 100
+    }
+    decimals = {"Win Rate": 2, "Average Gain": 4, "Average Loss": 4, "Profit Factor": 3, "Sharpe Ratio": 3,
+                "Expectancy": 4, "Max Drawdown": 2, "CAGR": 2}
+    for name, digits in decimals.items():
+        values = np.round(out[name], digits) if rounded else out[name]
+        out[name] = np.where(empty, np.nan, values)
+    return out
@@ -0,0 +1,124 @@
+from bisect import bisect_left
+
+
+class _BookSide:
+    """
+    Price levels of one side kept in sorted lists, best level first.
+    Bids are stored with negated prices so both sides sort ascending.
+    Lookups are O(log n) bisects; inserts/removes shift a short list.
+    """
+    def __init__(self, is_bid):
+        self.sign = -1.0 if is_bid else 1.0
+        self.keys = []
+        self.sizes = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def set(self, price, size):
+        key = self.sign * price
+        i = bisect_left(self.keys, key)
+        found = i < len(self.keys) and self.keys[i] == key
+        if size <= 0:
+            if found:
+                del self.keys[i]
+                del self.sizes[i]
+        elif found:
+            self.sizes[i] = size
+        else:
+            self.keys.insert(i, key)
+            self.sizes.insert(i, size)
+        return i
+
+    def levels(self, n=None):
+        return [(self.sign * k, s) for k, s in zip(self.keys[:n], self.sizes[:n])]
+
+
+class OrderBook:
+    """
+    Local L2 book for one symbol with cached aggregates.
+
+    Updates go through `apply_updates` (price, size) deltas, where size 0
+    removes a level, or `apply_snapshot`, which turns a full top-N depth push
+    into the minimal set of level changes. After every batch the top-N volume,
+    imbalance, spread and microprice are refreshed once, so the strategy
+    reads them as plain attributes.
+    """
+    def __init__(self, symbol, top_n=10):
+        self.symbol = symbol
+        self.top_n = top_n
+        self.bids = _BookSide(is_bid=True)
+        self.asks = _BookSide(is_bid=False)
+        self.updates = 0
+        self.timestamp = None
+        self.best_bid = self.best_ask = None
+        self.bid_volume = self.ask_volume = 0.0
+        self.imbalance = 0.0
+        self.mid = self.spread = self.microprice = None
+
+    def apply_updates(self, bids=(), asks=(), timestamp=None):
+        touched_top = False
+        for price, size in bids:
+            touched_top |= self.bids.set(float(price), float(size)) < self.top_n
+        for price, size in asks:
+            touched_top |= self.asks.set(float(price), float(size)) < self.top_n
+        self.updates += 1
+        self.timestamp = timestamp
+        if touched_top:
+            self._refresh()
+
+    def apply_snapshot(self, bids, asks, timestamp=None):
+        self.apply_updates(self._diff(self.bids, bids), self._diff(self.asks, asks), timestamp)
+
+    @staticmethod
+    def _diff(side, levels):
+        new = {float(p): float(q) for p, q in levels}
+        old = dict(side.levels())
+        changes = [(p, 0.0) for p in old if p not in new]
+        changes += [(p, q) for p, q in new.items() if old.get(p) != q]
+        return changes
+
+    def _refresh(self):
+        bid_sizes = self.bids.sizes[:self.top_n]
+        ask_sizes = self.asks.sizes[:self.top_n]
+        self.bid_volume = sum(bid_sizes)
+        self.ask_volume = sum(ask_sizes)
+        total = self.bid_volume + self.ask_volume
+        self.imbalance = (self.bid_volume - self.ask_volume) / total if total else 0.0
+        if self.bids.keys and self.asks.keys:
+            self.best_bid = -self.bids.keys[0]
+            self.best_ask = self.asks.keys[0]
+            bid_size, ask_size = bid_sizes[0], ask_sizes[0]
+            self.mid = (self.best_bid + self.best_ask) / 2
+            self.spread = self.best_ask - self.best_bid
+            self.microprice = (self.best_bid * ask_size + self.best_ask * bid_size) / (bid_size + ask_size)
+        else:
+            self.best_bid = -self.bids.keys[0] if self.bids.keys else None
+            self.best_ask = self.asks.keys[0] if self.asks.keys else None
+            self.mid = self.spread = self.microprice = None
+
+    def snapshot(self):
+        return {
+            "symbol": self.symbol,
+            "best_bid": self.best_bid, "best_ask": self.best_ask,
+            "bid_volume": self.bid_volume, "ask_volume": self.ask_volume,
+            "imbalance": self.imbalance, "spread": self.spread,
+            "mid": self.mid, "microprice": self.microprice
+        }
+
+
+class OrderBookManager:
+    """One OrderBook per pair, fed by LBank depth pushes (ChannelRouter handler)."""
+    def __init__(self, top_n=10):
+        self.top_n = top_n
+        self.books = {}
+
+    def get(self, pair):
+        book = self.books.get(pair)
+        if book is None:
+            book = self.books[pair] = OrderBook(pair, self.top_n)
+        return book
+
+    def on_depth(self, data):
+        depth = data["depth"]
+        self.get(data["pair"]).apply_snapshot(depth.get("bids", []), depth.get("asks", []), data.get("TS"))
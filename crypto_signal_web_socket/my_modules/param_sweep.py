@@ -0,0 +1,191 @@
+import itertools
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from my_modules.backtest_engine import DEFAULT_PARAMS, INDICATOR_PARAMS, indicator_columns, simulate_trades, \
+    stop_distance, strategy_frame, strategy_signals
+from my_modules.metrics import batch_metrics, pad_returns
+from my_modules.shared_history import SharedHistory
+from my_modules.strategy import TradePlanner
+from my_modules.timeframe_alignment import TIMEFRAME_ROLES, align_timeframes
+
+PARAM_SPACE = {
+    "tenkan": [7, 9, 12],
+    "kijun": [22, 26, 30],
+    "senkou": [44, 52],
+    # a tenkan/kijun cross usually comes with a stretched RSI, so the
+    # thresholds reach far past the 40/60 defaults
+    "rsi_buy_below": [40, 55, 70, 85],
+    "rsi_sell_above": [60, 45, 30, 15],
+    "keltner_multiplier": [1.5, 2.0, 2.5],
+    "rr_ratio": [1.5, 2.0, 3.0],
+}
+
+
+def is_valid(params):
+    return params["tenkan"] < params["kijun"] < params["senkou"]
+
+
+def grid_search(space=PARAM_SPACE):
+    """Every combination of `space`, missing keys at their defaults."""
+    keys = list(space)
+    combos = (dict(DEFAULT_PARAMS, **dict(zip(keys, values))) for values in itertools.product(*space.values()))
+    return [params for params in combos if is_valid(params)]
+
+
+def random_search(space=PARAM_SPACE, n=100, seed=0):
+    """Up to `n` distinct combinations drawn uniformly from `space`."""
+    rng = np.random.default_rng(seed)
+    seen, out = set(), []
+    for _ in range(n * 20):
+        params = dict(DEFAULT_PARAMS, **{key: values[rng.integers(len(values))] for key, values in space.items()})
+        key = tuple(sorted(params.items()))
+        if is_valid(params) and key not in seen:
+            seen.add(key)
+            out.append(params)
+            if len(out) == n:
+                break
+    return out
+
+
+# --- worker process side ---
+# Indicator columns are memoized per (pair, interval, indicator, arguments),
+# so parameter sets that only differ in thresholds / rr_ratio reuse them.
+_HISTORY = None
+
+
+def attach_history(spec):
+    global _HISTORY
+    _HISTORY = SharedHistory.attach(spec)
+
+
+def use_history(history):
+    global _HISTORY
+    _HISTORY = history
+    cached_indicator.cache_clear()
+    _aligned.cache_clear()
+
+
+def shared_frame(pair, interval):
+    """Candles of the history this process reads (zero-copy SharedHistory view)."""
+    return _HISTORY.frame(pair, interval)
+
+
+def indicator_key(kind, params):
+    return tuple(params[name] for name in INDICATOR_PARAMS[kind])
+
+
+@lru_cache(maxsize=128)
+def cached_indicator(pair, interval, kind, key):
+    params = dict(zip(INDICATOR_PARAMS[kind], key))
+    return indicator_columns(_HISTORY.frame(pair, interval), kind, params)
+
+
+@lru_cache(maxsize=8)
+def _aligned(pair, ichimoku, rsi_period):
+    """Every role's strategy columns projected onto the 1min bars (timeframe_alignment)."""
+    params = dict(zip(INDICATOR_PARAMS["ichimoku"], ichimoku), rsi_period=rsi_period)
+    frames = {}
+    for role, tf in TIMEFRAME_ROLES.items():
+        def memoized(candles, kind, params, tf=tf):
+            return cached_indicator(pair, tf, kind, indicator_key(kind, params))
+        frames[role] = strategy_frame(_HISTORY.frame(pair, tf), params, memoized)
+    return align_timeframes(frames)
+
+
+def _run_params(pair, params, costs):
+    wide = _aligned(pair, indicator_key("ichimoku", params), params["rsi_period"])
+    base = TIMEFRAME_ROLES["LLT"]
+    sl_distance = stop_distance(cached_indicator(pair, base, "keltner", indicator_key("keltner", params)))
+    planner = TradePlanner(equity=1.0, rr_ratio=params["rr_ratio"])
+    # rank the raw edge: the planner's 20% drawdown stop would end losing
+    # variants early and hide how bad they are
+    return simulate_trades(pair, _HISTORY.frame(pair, base), strategy_signals(wide, params), sl_distance, planner,
+                           halt_on_drawdown=False, **costs)
+
+
+def run_chunk(pair, jobs, costs):
+    """[(job id, trade log)] of one pair for several parameter sets."""
+    return [(job, _run_params(pair, params, costs)) for job, params in jobs]
+
+
+def memo_groups(param_sets):
+    """Indices of `param_sets` grouped by their _aligned() arguments: each group shares one aligned frame."""
+    def memo_key(job):
+        params = param_sets[job]
+        return indicator_key("ichimoku", params), params["rsi_period"]
+
+    ordered = sorted(range(len(param_sets)), key=memo_key)
+    return [list(group) for _, group in itertools.groupby(ordered, key=memo_key)]
+
+
+def _chunks(pairs, param_sets, chunk_size):
+    # parameter sets sharing indicator arguments stay in one chunk so the
+    # worker's memo is reused; chunks never span pairs
+    groups = memo_groups(param_sets)
+    for pair in pairs:
+        for group in groups:
+            for k in range(0, len(group), chunk_size):
+                yield pair, [(job, param_sets[job]) for job in group[k:k + chunk_size]]
+
+
+def rank_results(param_sets, trade_logs, rank_by="Sharpe Ratio"):
+    """
+    One row per parameter set: the parameters plus calculate_metrics over
+    its trades from every pair (in exit order), best `rank_by` first. All
+    sets are scored together by metrics.batch_metrics.
+    """
+    series = []
+    for job in range(len(param_sets)):
+        log = sorted(trade_logs.get(job, []), key=lambda trade: (trade["timestamp"], trade["symbol"]))
+        series.append([trade["return"] for trade in log])
+    returns, mask = pad_returns(series)
+    table = pd.concat([pd.DataFrame(param_sets), pd.DataFrame(batch_metrics(returns, mask))], axis=1)
+    if rank_by not in table.columns:
+        table[rank_by] = np.nan
+    table = table.sort_values([rank_by, "Total Trades"], ascending=False, na_position="last", kind="stable")
+    table.insert(0, "rank", range(1, len(table) + 1))
+    return table.reset_index(drop=True)
+
+
+def run_sweep(candles, param_sets, workers=None, rank_by="Sharpe Ratio", chunk_size=8,
+              slippage_pct=0.001, commission_pct=0.001, verbose=True):
+    """
+    Backtest every parameter set on every pair and rank them.
+
+    candles: {pair: {interval: candle DataFrame}} covering every
+    TIMEFRAME_ROLES interval (see timeframe_alignment.resample_timeframes).
+    The candles are copied once into a SharedHistory block that the
+    `workers` processes (default: one per core) read in place; workers=0
+    runs in this process.
+    """
+    history = SharedHistory({(pair, tf): frames[tf] for pair, frames in candles.items()
+                             for tf in TIMEFRAME_ROLES.values()})
+    costs = {"slippage_pct": slippage_pct, "commission_pct": commission_pct}
+    chunks = list(_chunks(list(candles), param_sets, chunk_size))
+    trade_logs = {}
+    started = time.perf_counter()
+    try:
+        if workers != 0:
+            with ProcessPoolExecutor(max_workers=workers, initializer=attach_history,
+                                     initargs=(history.spec(),)) as pool:
+                futures = [pool.submit(run_chunk, pair, jobs, costs) for pair, jobs in chunks]
+                for done, future in enumerate(as_completed(futures), 1):
+                    for job, trades in future.result():
+                        trade_logs.setdefault(job, []).extend(trades)
+                    if verbose and (done % 20 == 0 or done == len(futures)):
+                        print(f"[SWEEP] {done}/{len(futures)} chunks, {time.perf_counter() - started:.1f}s")
+        else:
+            use_history(history)
+            for pair, jobs in chunks:
+                for job, trades in run_chunk(pair, jobs, costs):
+                    trade_logs.setdefault(job, []).extend(trades)
+            use_history(None)
+    finally:
+        history.close()
+    if verbose:
+        print(f"[SWEEP] {len(param_sets)} parameter sets x {len(candles)} pairs "
+              f"in {time.perf_counter() - started:.1f}s")
+    return rank_results(param_sets, trade_logs, rank_by)
@@ -0,0 +1,121 @@
+import asyncio
+import random
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from my_modules.utils import KLINE_URL, kline_request_params, kline_response_to_df
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts up to `capacity`."""
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class PrefillPipeline:
+    """
+    Concurrent REST prefill of kline history for many symbol x timeframe pairs.
+
+    Requests share one pooled requests.Session and run on worker threads, so
+    the event loop can keep up to `max_concurrency` of them in flight while a
+    token bucket keeps the overall rate under the exchange limit. Failed
+    requests are retried with exponential backoff. Every request's latency is
+    kept in `stats` and summarised by `report()`.
+    """
+    def __init__(self, rest_code_map, base_url=KLINE_URL, max_concurrency=8,
+                 rate_per_sec=10, retries=3, backoff=0.5, timeout=10, session=None):
+        self.rest_code_map = rest_code_map
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.rate_per_sec = rate_per_sec
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = session or self._make_session(max_concurrency)
+        self.stats = []
+
+    @staticmethod
+    def _make_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _get(self, params):
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def fetch(self, symbol, interval, size, limiter, semaphore):
+        params = kline_request_params(symbol, interval, size, self.rest_code_map)
+        attempt = 0
+        while True:
+            attempt += 1
+            await limiter.acquire()
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    data = await asyncio.to_thread(self._get, params)
+                    df = kline_response_to_df(data, symbol, interval)
+                    error = None
+                except Exception as e:
+                    df, error = None, e
+                latency = time.perf_counter() - started
+            self.stats.append({
+                "symbol": symbol, "interval": interval, "attempt": attempt,
+                "latency": latency, "ok": error is None
+            })
+            if error is None:
+                return df
+            if attempt > self.retries:
+                print(f"[ERROR] prefill failed for {symbol}-{interval} after {attempt} attempts: {error}")
+                return None
+            await asyncio.sleep(self.backoff * 2 ** (attempt - 1) * (0.5 + random.random()))
+
+    async def prefill(self, symbols, timeframes, size=200, sizes=None):
+        """
+        Fetch every symbol x timeframe concurrently -> {(symbol, timeframe): df or None}.
+        `sizes` optionally overrides the candle count per (symbol, timeframe).
+        """
+        sizes = sizes or {}
+        limiter = TokenBucket(self.rate_per_sec)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        jobs = [(symbol, tf) for symbol in symbols for tf in timeframes]
+        results = await asyncio.gather(*(
+            self.fetch(symbol, tf, sizes.get((symbol, tf), size), limiter, semaphore)
+            for symbol, tf in jobs
+        ))
+        return dict(zip(jobs, results))
+
+    def run(self, symbols, timeframes, size=200, sizes=None):
+        return asyncio.run(self.prefill(symbols, timeframes, size, sizes))
+
+    def report(self):
+        if not self.stats:
+            return {}
+        latencies = sorted(s["latency"] for s in self.stats)
+        summary = {
+            "requests": len(latencies),
+            "failed": sum(not s["ok"] for s in self.stats),
+            "p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1)
+        }
+        print(f"⏱️ Prefill: {summary}")
+        return summary
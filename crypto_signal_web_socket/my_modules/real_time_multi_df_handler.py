@@ -1,57 +1,128 @@
 from collections import defaultdict, deque
+import time
 import pandas as pd
-from my_modules.utils import fetch_initial_kline
+from my_modules.utils import fetch_initial_kline, INTERVAL_MINUTES
 from my_modules.indicator import IndicatorCalculator
+from my_modules.prefill import PrefillPipeline
+
+# REST / WS candles say open/high/low/close; the handler keeps the *_price
+# names that IndicatorCalculator, the strategy and the archive use
+PRICE_COLUMNS = {"open": "open_price", "high": "high_price", "low": "low_price", "close": "close_price"}
 
 class MultiTimeframeHandler:
-    def __init__(self, symbol, timeframes, rest_code_map):
+    def __init__(self, symbol, timeframes, rest_code_map, prefill=True, archive=None):
         self.symbol = symbol
         self.timeframes = timeframes
         self.rest_code_map = rest_code_map
+        self.archive = archive
         self.dataframes = defaultdict(lambda: pd.DataFrame())
-        self.prefill_symbol_data()
+        if prefill:
+            self.prefill_symbol_data()
+
+    @classmethod
+    def prefill_many(cls, symbols, timeframes, rest_code_map, size=200, archive=None, **pipeline_options):
+        """
+        Build one handler per symbol, fetching all symbol x timeframe histories
+        concurrently through PrefillPipeline instead of one request at a time.
+        With an archive, only the gap since the last stored candle is fetched.
+        """
+        handlers = {symbol: cls(symbol, timeframes, rest_code_map, prefill=False, archive=archive)
+                    for symbol in symbols}
+        history, sizes = {}, {}
+        for symbol, handler in handlers.items():
+            for tf in timeframes:
+                history[(symbol, tf)] = handler._load_archive(tf, size)
+                sizes[(symbol, tf)] = handler._backfill_size(tf, history[(symbol, tf)], size)
+
+        pipeline = PrefillPipeline(rest_code_map, **pipeline_options)
+        results = pipeline.run(symbols, timeframes, size, sizes)
+        pipeline.report()
+
+        for (symbol, tf), fresh in results.items():
+            handler = handlers[symbol]
+            handler.load_initial(tf, handler._merge_archive(tf, history[(symbol, tf)], fresh, size))
+        return handlers
 
     def prefill_symbol_data(self):
         print(f"⏳ Prefilling {self.symbol}...")
         for tf in self.timeframes:
-            df = fetch_initial_kline(self.symbol, tf, size=200, rest_code_map=self.rest_code_map)
-            if not df.empty:
-                df = IndicatorCalculator(df) \
-                        .calculate_rsi() \
-                        .calculate_macd() \
-                        .calculate_bollinger() \
-                        .calculate_keltner() \
-                        .calculate_ichimoku() \
-                        .detect_candlestick_patterns() \
-                        .detect_price_action() \
-                        .get_df()
-                self.dataframes[tf] = df
-                print(f"✅ Initialized {self.symbol}-{tf} with {len(df)} rows")
-            else:
-                print(f"⚠️ Empty data for {self.symbol}-{tf}")
+            hist = self._load_archive(tf)
+            size = self._backfill_size(tf, hist)
+            df = fetch_initial_kline(self.symbol, tf, size=size, rest_code_map=self.rest_code_map)
+            self.load_initial(tf, self._merge_archive(tf, hist, df))
+
+    # --- candle archive (timestamps here are REST seconds, the archive keeps ms) ---
+    def _load_archive(self, timeframe, rows=200):
+        if self.archive is None:
+            return pd.DataFrame()
+        arrays = self.archive.read(self.symbol, timeframe)
+        df = pd.DataFrame({"timestamp": arrays["timestamp"][-rows:] // 1000})
+        for archived in PRICE_COLUMNS.values():
+            df[archived] = arrays[archived][-rows:]
+        df["volume"] = arrays["volume"][-rows:]
+        return df
+
+    def _backfill_size(self, timeframe, hist, size=200):
+        if hist.empty:
+            return size
+        interval_sec = INTERVAL_MINUTES[timeframe] * 60
+        missing = (int(time.time()) - int(hist["timestamp"].iloc[-1])) // interval_sec
+        return int(min(size, max(1, missing + 1)))
+
+    def _archive_closed(self, timeframe, df):
+        if self.archive is None or df is None or df.empty:
+            return
+        interval_sec = INTERVAL_MINUTES[timeframe] * 60
+        closed = df[df["timestamp"] + interval_sec <= time.time()]
+        self.archive.append(self.symbol, timeframe, {
+            "timestamp": closed["timestamp"].to_numpy(dtype="int64") * 1000,
+            **{archived: closed[archived] for archived in PRICE_COLUMNS.values()},
+            "volume": closed["volume"]
+        })
+
+    def _merge_archive(self, timeframe, hist, fresh, size=200):
+        if fresh is None or fresh.empty:
+            return hist
+        fresh = fresh.rename(columns=PRICE_COLUMNS)
+        self._archive_closed(timeframe, fresh)
+        if hist.empty:
+            return fresh
+        fresh = fresh[fresh["timestamp"] > hist["timestamp"].iloc[-1]]
+        return pd.concat([hist, fresh], ignore_index=True).tail(size).reset_index(drop=True)
+
+    def load_initial(self, timeframe, df):
+        if df is not None and not df.empty:
+            df = self._apply_indicators(df.rename(columns=PRICE_COLUMNS))
+            self.dataframes[timeframe] = df
+            print(f"✅ Initialized {self.symbol}-{timeframe} with {len(df)} rows")
+        else:
+            print(f"⚠️ Empty data for {self.symbol}-{timeframe}")
+
+    @staticmethod
+    def _apply_indicators(df):
+        return IndicatorCalculator(df) \
+                .calculate_rsi() \
+                .calculate_macd() \
+                .calculate_bollinger() \
+                .calculate_keltner() \
+                .calculate_ichimoku() \
+                .detect_candlestick_patterns() \
+                .get_df()
 
     def update_candle(self, timeframe, new_candle):
         df = self.dataframes.get(timeframe, pd.DataFrame())
+        if not df.empty and new_candle["timestamp"] > df["timestamp"].iloc[-1]:
+            # a newer candle means the previous one has closed
+            self._archive_closed(timeframe, df.tail(1))
         new_row = pd.DataFrame([{
             "timestamp": new_candle["timestamp"],
-            "open": new_candle["open"],
-            "high": new_candle["high"],
-            "low": new_candle["low"],
-            "close": new_candle["close"],
+            **{archived: new_candle[column] for column, archived in PRICE_COLUMNS.items()},
             "volume": new_candle["volume"]
         }])
         df = pd.concat([df, new_row], ignore_index=True)
         df = df.tail(200).copy()
 
-        df = IndicatorCalculator(df) \
-                .calculate_rsi() \
-                .calculate_macd() \
-                .calculate_bollinger() \
-                .calculate_keltner() \
-                .calculate_ichimoku() \
-                .detect_candlestick_patterns() \
-                .detect_price_action() \
-                .get_df()
+        df = self._apply_indicators(df)
 
         self.dataframes[timeframe] = df
 
@@ -0,0 +1,65 @@
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from my_modules.compute_pool import PRICE_FIELDS
+
+
+class SharedHistory:
+    """
+    Full candle histories of many pair x interval series in one shared-memory
+    block, for process pools that only read them (sweeps, backtests).
+
+    Unlike SharedCandleStore's fixed 200-bar slots, series are packed back to
+    back, so months of 1min bars sit next to a few hundred 4h bars without
+    padding. Workers attach with `SharedHistory.attach(spec)` and get
+    read-only views; `frame()` builds a DataFrame on them without a copy.
+    """
+    def __init__(self, frames, name=None, slots=None):
+        # frames: {(pair, interval): candle DataFrame}; name/slots: see attach()
+        self.owner = name is None
+        if self.owner:
+            slots, start = {}, 0
+            for key, df in frames.items():
+                slots[key] = (start, start + len(df))
+                start += len(df)
+            size = 8 * max(start, 1) * (1 + len(PRICE_FIELDS))
+        self.slots = slots
+        total = max((stop for _, stop in slots.values()), default=0)
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self.timestamps = np.ndarray((total,), dtype=np.int64, buffer=self.shm.buf)
+        self.prices = np.ndarray((len(PRICE_FIELDS), total), dtype=np.float64, buffer=self.shm.buf,
+                                 offset=self.timestamps.nbytes)
+        if self.owner:
+            for key, df in frames.items():
+                start, stop = slots[key]
+                self.timestamps[start:stop] = np.asarray(df.index.values, dtype="datetime64[ms]").astype(np.int64)
+                for k, field in enumerate(PRICE_FIELDS):
+                    self.prices[k, start:stop] = df[field].to_numpy(dtype=np.float64)
+        else:
+            self.timestamps.flags.writeable = False
+            self.prices.flags.writeable = False
+
+    @classmethod
+    def attach(cls, spec):
+        name, slots = spec
+        return cls(None, name=name, slots=slots)
+
+    def spec(self):
+        """Arguments for attaching to this block from another process."""
+        return self.shm.name, self.slots
+
+    def keys(self):
+        return list(self.slots)
+
+    def frame(self, pair, interval):
+        start, stop = self.slots[(pair, interval)]
+        df = pd.DataFrame(self.prices[:, start:stop].T, columns=list(PRICE_FIELDS), copy=False)
+        df.index = pd.DatetimeIndex(self.timestamps[start:stop].view("datetime64[ms]"), name="timestamp")
+        return df
+
+    def close(self):
+        # drop our views before closing the mapping
+        del self.timestamps, self.prices
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
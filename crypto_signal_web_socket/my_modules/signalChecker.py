@@ -1,8 +1,12 @@
+import os
+import requests
 import pandas as pd
 from trader import Trader
 from notifier import Notifier  # Assumed class that posts to socials
 from datetime import datetime
 
+TICKER_URL = os.environ.get("LBANK_REST_URL", "https://api.lbank.info").rstrip("/") + "/v2/ticker.do"
+
 
 class SignalChecker:
     def __init__(self, signal_file, trader: Trader, notifier: Notifier):
@@ -42,9 +46,8 @@ class SignalChecker:
 
     def get_current_price(self, symbol: str) -> float:
         try:
-            url = f"https://api.lbank.info/v2/ticker.do?symbol={symbol}"
-            response = requests.get(url).json()
-            return float(response['ticker']['latest'])
+            response = requests.get(TICKER_URL, params={"symbol": symbol}, timeout=10).json()
+            return float(response['data'][0]['ticker']['latest'])
         except Exception as e:
             print(f"Error getting price for {symbol}: {e}")
             return None
@@ -1,14 +1,19 @@
+import numpy as np
+import pandas as pd
 
-def apply_slippage_and_commission(entry_price, exit_price, slippage_pct=0.001, commission_pct=0.001):
-    # Apply slippage
-    adjusted_entry = entry_price * (1 + slippage_pct)
-    adjusted_exit = exit_price * (1 - slippage_pct)
+
+
+def apply_slippage_and_commission(entry_price, exit_price, slippage_pct=0.001, commission_pct=0.001, direction="long"):
+    # Apply slippage (a short sells at the entry and buys back at the exit)
+    sign = 1 if direction == "long" else -1
+    adjusted_entry = entry_price * (1 + sign * slippage_pct)
+    adjusted_exit = exit_price * (1 - sign * slippage_pct)
 
     # Apply commission (entry and exit)
     total_commission = (adjusted_entry + adjusted_exit) * commission_pct
 
     # Net return with adjustments
-    gross_return = (adjusted_exit - adjusted_entry) / adjusted_entry
+    gross_return = sign * (adjusted_exit - adjusted_entry) / adjusted_entry
     net_return = gross_return - (2 * commission_pct)  # entry + exit
 
     return {
@@ -18,3 +23,82 @@ def apply_slippage_and_commission(entry_price, exit_price, slippage_pct=0.001, c
         "gross_return": gross_return,
         "commission_paid": total_commission
     }
+
+
+# --- vectorized costs over whole trade arrays ---
+DEFAULT_FEES = {"maker": 0.001, "taker": 0.001}  # LBank spot
+
+
+def market_impact(size, volume, volatility, spread_pct=0.0, impact=1.0, max_pct=0.05):
+    """
+    Expected slippage of a market fill as a fraction of price: half the
+    spread plus the square-root law impact * volatility * sqrt(size / volume).
+    Arrays broadcast; no liquidity at all costs `max_pct`.
+    """
+    size, volume = np.asarray(size, dtype=float), np.asarray(volume, dtype=float)
+    participation = np.divide(size, volume, out=np.full(np.broadcast(size, volume).shape, np.inf),
+                              where=volume > 0)
+    slippage = np.asarray(spread_pct) / 2 + impact * np.asarray(volatility) * np.sqrt(participation)
+    return np.minimum(np.nan_to_num(slippage, nan=max_pct), max_pct)
+
+
+def candle_liquidity(candles, window=60):
+    """Per-bar liquidity from candles: rolling mean volume and high-low range (fraction of close)."""
+    bar_range = (candles["high_price"] - candles["low_price"]) / candles["close_price"]
+    return {
+        "volume": candles["volume"].rolling(window, min_periods=1).mean().to_numpy(),
+        "volatility": bar_range.rolling(window, min_periods=1).mean().to_numpy(),
+        "spread_pct": np.zeros(len(candles)),
+    }
+
+
+def book_liquidity(snapshots, candles, window=60):
+    """
+    candle_liquidity() with recorded depth: OrderBook.snapshot() dicts plus a
+    `timestamp` (ms), taken as of each bar's open. Buys then walk the ask
+    side's top-N volume and sells the bid side's, with the recorded spread;
+    bars before the first snapshot keep the candle estimate.
+    """
+    liquidity = candle_liquidity(candles, window)
+    book = pd.DataFrame(snapshots).dropna(subset=["mid"]).sort_values("timestamp")
+    bar_open = np.asarray(candles.index.values, dtype="datetime64[ms]").astype(np.int64)
+    pos = np.searchsorted(book["timestamp"].to_numpy(np.int64), bar_open, side="right") - 1
+    known = pos >= 0
+    take = np.maximum(pos, 0)
+    for side in ("bid_volume", "ask_volume"):
+        liquidity[side] = np.where(known, book[side].to_numpy(float)[take], liquidity["volume"])
+    spread = (book["spread"] / book["mid"]).to_numpy(float)[take]
+    liquidity["spread_pct"] = np.where(known, spread, liquidity["spread_pct"])
+    return liquidity
+
+
+def fill_slippage(liquidity, rows, size, buy, impact=1.0, max_pct=0.05):
+    """market_impact() of fills of `size` on bars `rows`; `buy` fills take the ask side."""
+    volume = liquidity["volume"]
+    ask, bid = liquidity.get("ask_volume", volume), liquidity.get("bid_volume", volume)
+    side_volume = np.where(buy, ask[rows], bid[rows])
+    return market_impact(size, side_volume, liquidity["volatility"][rows], liquidity["spread_pct"][rows],
+                         impact, max_pct)
+
+
+def trade_costs(entry_price, exit_price, direction=1, entry_slippage=0.001, exit_slippage=0.001,
+                fees=DEFAULT_FEES, entry_maker=False, exit_maker=False):
+    """
+    apply_slippage_and_commission over arrays of trades in one call.
+    direction: +1 long / -1 short; slippage and the maker flags may be
+    per-trade arrays, maker fills pay fees["maker"] and the rest fees["taker"].
+    """
+    sign = np.asarray(direction, dtype=float)
+    adjusted_entry = np.asarray(entry_price, dtype=float) * (1 + sign * entry_slippage)
+    adjusted_exit = np.asarray(exit_price, dtype=float) * (1 - sign * exit_slippage)
+    entry_fee = np.where(entry_maker, fees["maker"], fees["taker"])
+    exit_fee = np.where(exit_maker, fees["maker"], fees["taker"])
+
+    gross_return = sign * (adjusted_exit - adjusted_entry) / adjusted_entry
+    return {
+        "entry_price": adjusted_entry,
+        "exit_price": adjusted_exit,
+        "net_return": gross_return - (entry_fee + exit_fee),
+        "gross_return": gross_return,
+        "commission_paid": adjusted_entry * entry_fee + adjusted_exit * exit_fee
+    }
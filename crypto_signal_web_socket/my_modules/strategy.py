@@ -1,5 +1,9 @@
+import numpy as np
+import pandas as pd
+
+
 class IchimokuDayStrategy:
-    def __init__(self, multi_df):
+    def __init__(self, multi_df, rsi_buy_below=40, rsi_sell_above=60):
         """
         multi_df = {
             'HHT': df_4h,
@@ -8,8 +12,11 @@ class IchimokuDayStrategy:
             'LTF': df_5min,
             'LLT': df_1min
         }
+        rsi_buy_below / rsi_sell_above: default thresholds of rsi_below / rsi_above
         """
         self.multi_df = multi_df
+        self.rsi_buy_below = rsi_buy_below
+        self.rsi_sell_above = rsi_sell_above
 
     def get_df(self, tf):
         return self.multi_df.get(tf)
@@ -25,15 +32,18 @@ class IchimokuDayStrategy:
         if df is None: return False
         return df['senkou_span_a'].iloc[-1] < df['senkou_span_b'].iloc[-1]
 
+    # The chikou span is the current close plotted kijun bars back, so it is
+    # compared with the close of that bar (chikou_reference); chikou_span
+    # itself is close.shift(-kijun) and never known on the newest bar.
     def chikou_above_price(self, tf):
         df = self.get_df(tf)
         if df is None: return False
-        return df['chikou_span'].iloc[-1] > df['close_price'].iloc[-1]
+        return df['close_price'].iloc[-1] > df['chikou_reference'].iloc[-1]
 
     def chikou_below_price(self, tf):
         df = self.get_df(tf)
         if df is None: return False
-        return df['chikou_span'].iloc[-1] < df['close_price'].iloc[-1]
+        return df['close_price'].iloc[-1] < df['chikou_reference'].iloc[-1]
 
     def is_tenkan_kijun_cross_up(self, tf):
         df = self.get_df(tf)
@@ -57,15 +67,15 @@ class IchimokuDayStrategy:
         if df is None: return False
         return df['patterns_result'].iloc[-1] == "Bearish"
 
-    def rsi_below(self, tf, threshold=40):
+    def rsi_below(self, tf, threshold=None):
         df = self.get_df(tf)
         if df is None: return False
-        return df['rsi'].iloc[-1] < threshold
+        return df['rsi'].iloc[-1] < (self.rsi_buy_below if threshold is None else threshold)
 
-    def rsi_above(self, tf, threshold=60):
+    def rsi_above(self, tf, threshold=None):
         df = self.get_df(tf)
         if df is None: return False
-        return df['rsi'].iloc[-1] > threshold
+        return df['rsi'].iloc[-1] > (self.rsi_sell_above if threshold is None else threshold)
 
     def close_above_kijun(self, tf):
         df = self.get_df(tf)
@@ -115,6 +125,138 @@ class IchimokuDayStrategy:
 
         return "Sell"
 
+    # --- Per-timeframe verdicts ---
+    # Every check of the buy and sell ladders grouped by the timeframe it
+    # reads, so a timeframe's results can be kept until its next bar closes.
+    ROLE_CHECKS = {
+        'HHT': ('is_bullish_kumo', 'is_bearish_kumo'),
+        'HTF': ('is_bullish_kumo', 'is_bearish_kumo', 'chikou_above_price', 'chikou_below_price'),
+        'TTF': ('is_tenkan_kijun_cross_up', 'is_tenkan_kijun_cross_down', 'is_bullish_candle',
+                'is_bearish_candle', 'rsi_below', 'rsi_above'),
+        'LTF': ('close_above_kijun', 'close_below_kijun'),
+        'LLT': ('is_bullish_candle', 'is_bearish_candle'),
+    }
+
+    def role_verdicts(self, role):
+        return {name: bool(getattr(self, name)(role)) for name in self.ROLE_CHECKS[role]}
+
+    @staticmethod
+    def signal_from_verdicts(verdicts):
+        """
+        generate_signal(), falling back to a "Sell" from generate_signal_sell(),
+        from the role_verdicts() of every timeframe.
+        """
+        def ladder(kumo, chikou, cross, candle, rsi, kijun, done):
+            if not verdicts['HHT'][kumo]:
+                return "NoTrend"
+            if not (verdicts['HTF'][kumo] and verdicts['HTF'][chikou]):
+                return "WeakTrend"
+            if not (verdicts['TTF'][cross] and verdicts['TTF'][candle] and verdicts['TTF'][rsi]):
+                return "WeakSignal"
+            if not verdicts['LTF'][kijun]:
+                return "WaitLTF"
+            if not verdicts['LLT'][candle]:
+                return "WaitLLT"
+            return done
+
+        signal = ladder('is_bullish_kumo', 'chikou_above_price', 'is_tenkan_kijun_cross_up',
+                        'is_bullish_candle', 'rsi_below', 'close_above_kijun', "Buy")
+        if signal != "Buy":
+            sell = ladder('is_bearish_kumo', 'chikou_below_price', 'is_tenkan_kijun_cross_down',
+                          'is_bearish_candle', 'rsi_above', 'close_below_kijun', "Sell")
+            if sell == "Sell":
+                signal = sell
+        return signal
+
+    # --- Vectorized: the label of every bar in one pass ---
+    # Row i gets exactly what generate_signal()/generate_signal_sell() return
+    # when every frame ends at row i, so a backtest needs no per-bar slicing.
+    # All timeframes must share one index (see the as-of alignment helpers;
+    # frames from split_aligned carry a bar_time column for the crossovers).
+    def _shared_index(self):
+        frames = [df for df in self.multi_df.values() if df is not None]
+        if not frames:
+            raise ValueError("No timeframe data")
+        index = frames[0].index
+        for df in frames[1:]:
+            if not df.index.equals(index):
+                raise ValueError("Vectorized signals need all timeframes on one index")
+        return index
+
+    def _check(self, name, tf, n):
+        df = self.get_df(tf)
+        if df is None:
+            return np.zeros(n, dtype=bool)
+
+        def col(column):
+            return df[column].to_numpy(dtype=float)
+
+        def crossed(now, before):
+            # row 0 has no previous bar, like the len(df) < 2 guard
+            if 'bar_time' not in df.columns:
+                return now & np.r_[False, before[:-1]]
+            # projected frame (split_aligned): a bar repeats over many rows and
+            # its previous bar is the row before the first of them
+            bar_time = df['bar_time'].to_numpy()
+            rows = np.arange(n)
+            first = np.maximum.accumulate(np.where(np.r_[True, bar_time[1:] != bar_time[:-1]], rows, 0))
+            return now & (first > 0) & before[np.maximum(first - 1, 0)]
+
+        checks = {
+            'bullish_kumo': lambda: col('senkou_span_a') > col('senkou_span_b'),
+            'bearish_kumo': lambda: col('senkou_span_a') < col('senkou_span_b'),
+            'chikou_above': lambda: col('close_price') > col('chikou_reference'),
+            'chikou_below': lambda: col('close_price') < col('chikou_reference'),
+            'cross_up': lambda: crossed(col('tenkan_sen') > col('kijun_sen'), col('tenkan_sen') <= col('kijun_sen')),
+            'cross_down': lambda: crossed(col('tenkan_sen') < col('kijun_sen'), col('tenkan_sen') >= col('kijun_sen')),
+            'bullish_candle': lambda: df['patterns_result'].to_numpy() == "Bullish",
+            'bearish_candle': lambda: df['patterns_result'].to_numpy() == "Bearish",
+            'rsi_below': lambda: col('rsi') < self.rsi_buy_below,
+            'rsi_above': lambda: col('rsi') > self.rsi_sell_above,
+            'above_kijun': lambda: col('close_price') > col('kijun_sen'),
+            'below_kijun': lambda: col('close_price') < col('kijun_sen'),
+        }
+        return checks[name]()
+
+    def _labels(self, bull):
+        index = self._shared_index()
+        n = len(index)
+        if bull:
+            kumo, chikou, cross, candle, rsi, kijun = \
+                'bullish_kumo', 'chikou_above', 'cross_up', 'bullish_candle', 'rsi_below', 'above_kijun'
+        else:
+            kumo, chikou, cross, candle, rsi, kijun = \
+                'bearish_kumo', 'chikou_below', 'cross_down', 'bearish_candle', 'rsi_above', 'below_kijun'
+
+        conditions = [
+            ~self._check(kumo, 'HHT', n),
+            ~(self._check(kumo, 'HTF', n) & self._check(chikou, 'HTF', n)),
+            ~(self._check(cross, 'TTF', n) & self._check(candle, 'TTF', n) & self._check(rsi, 'TTF', n)),
+            ~self._check(kijun, 'LTF', n),
+            ~self._check(candle, 'LLT', n),
+        ]
+        labels = np.select(conditions, ["NoTrend", "WeakTrend", "WeakSignal", "WaitLTF", "WaitLLT"],
+                           default="Buy" if bull else "Sell")
+        return pd.Series(labels, index=index, name="signal")
+
+    def generate_signals(self):
+        return self._labels(bull=True)
+
+    def generate_signals_sell(self):
+        return self._labels(bull=False)
+
+    # --- Order Book Confirmation ---
+    @staticmethod
+    def confirm_orderbook(signal, book, min_imbalance=0.0):
+        """Keep a Buy/Sell only if the top-of-book imbalance leans the same way."""
+        if book is None or not book.updates or signal not in ("Buy", "Sell"):
+            return signal
+        if signal == "Buy" and book.imbalance <= min_imbalance:
+            return "WaitBook"
+        if signal == "Sell" and book.imbalance >= -min_imbalance:
+            return "WaitBook"
+        return signal
+
 class TradePlanner:
     def __init__(self, equity: float, max_risk_pct: float = 2.0, rr_ratio: float = 2.0):
         self.equity = equity
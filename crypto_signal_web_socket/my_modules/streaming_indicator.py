@@ -0,0 +1,295 @@
+from collections import deque
+import math
+
+NAN = float("nan")
+
+
+class _Ema:
+    """EMA with the same weighting as pandas ewm(span=..., adjust=...)."""
+    def __init__(self, span, adjust=True):
+        self.decay = 1 - 2 / (span + 1)
+        self.adjust = adjust
+        self.num = 0.0
+        self.den = 0.0
+        self.value = None
+
+    def update(self, x, commit):
+        if self.adjust:
+            num = x + self.decay * self.num
+            den = 1 + self.decay * self.den
+            value = num / den
+            if commit:
+                self.num, self.den = num, den
+        else:
+            value = x if self.value is None else (1 - self.decay) * x + self.decay * self.value
+        if commit:
+            self.value = value
+        return value
+
+
+class _RollingMean:
+    """Rolling mean that, like pandas, is NaN while the window is short or holds a NaN."""
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.total = 0.0
+        self.nans = 0
+
+    def update(self, x, commit):
+        x_nan = x != x
+        total = self.total + (0.0 if x_nan else x)
+        nans = self.nans + x_nan
+        count = len(self.values) + 1
+        if count > self.window:
+            old = self.values[0]
+            if old != old:
+                nans -= 1
+            else:
+                total -= old
+            count -= 1
+        if commit:
+            self.values.append(x)
+            if len(self.values) > self.window:
+                self.values.popleft()
+            self.total, self.nans = total, nans
+        if count < self.window or nans:
+            return NAN
+        return total / self.window
+
+
+class _RollingStd:
+    """Windowed Welford mean/variance (ddof=1), as rolling(window).mean()/std()."""
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x, commit):
+        if len(self.values) == self.window:
+            old = self.values[0]
+            mean = self.mean + (x - old) / self.window
+            m2 = self.m2 + (x - old) * (x - mean + old - self.mean)
+            count = self.window
+        else:
+            count = len(self.values) + 1
+            mean = self.mean + (x - self.mean) / count
+            m2 = self.m2 + (x - self.mean) * (x - mean)
+        if commit:
+            self.values.append(x)
+            if len(self.values) > self.window:
+                self.values.popleft()
+            self.mean, self.m2 = mean, m2
+        if count < self.window:
+            return NAN, NAN
+        return mean, math.sqrt(max(m2, 0.0) / (self.window - 1))
+
+
+class _RollingExtreme:
+    """Monotonic-deque rolling max (or min) over the last `window` values."""
+    def __init__(self, window, use_max=True):
+        self.window = window
+        self.use_max = use_max
+        self.queue = deque()  # (index, value), values monotonic from the front
+        self.count = 0
+
+    def _better(self, a, b):
+        return a >= b if self.use_max else a <= b
+
+    def update(self, x, commit):
+        index = self.count
+        if commit:
+            while self.queue and self._better(x, self.queue[-1][1]):
+                self.queue.pop()
+            self.queue.append((index, x))
+            while self.queue[0][0] <= index - self.window:
+                self.queue.popleft()
+            self.count += 1
+            best = self.queue[0][1]
+        else:
+            # Only the front entry can expire when one more value enters the window.
+            best = x
+            for i, value in self.queue:
+                if i > index - self.window:
+                    if self._better(value, best):
+                        best = value
+                    break
+        if index + 1 < self.window:
+            return NAN
+        return best
+
+
+class _Lag:
+    """Value of a series `periods` committed bars ago, i.e. shift(periods)."""
+    def __init__(self, periods):
+        self.periods = periods
+        self.values = deque(maxlen=periods)
+
+    def update(self, x, commit):
+        value = self.values[0] if len(self.values) == self.periods else NAN
+        if commit:
+            self.values.append(x)
+        return value
+
+
+class StreamingIndicatorCalculator:
+    """
+    Incremental counterpart of IndicatorCalculator.
+
+    Every update costs O(1) in the length of the history: EMA/RSI/ATR and
+    Bollinger keep running state, and the Ichimoku windows use monotonic
+    deques for their rolling highs and lows. The output of `update` uses the
+    same column names as the batch calculator and matches its last row.
+
+    Kline streams repeat the still-forming candle until it closes, so the
+    latest candle is held as pending and only committed into the running state
+    once a candle with a newer timestamp arrives (or `close_bar` is called).
+    """
+    def __init__(self, rsi_period=14, macd_fast=12, macd_slow=26, macd_signal=9,
+                 boll_period=20, boll_std=2, keltner_ema=20, keltner_atr=10, keltner_multiplier=2,
+                 tenkan=9, kijun=26, senkou=52):
+        self.boll_num_std = boll_std
+        self.keltner_multiplier = keltner_multiplier
+        self.kijun = kijun
+
+        self._rsi_gain = _RollingMean(rsi_period)
+        self._rsi_loss = _RollingMean(rsi_period)
+        self._macd_fast = _Ema(macd_fast)
+        self._macd_slow = _Ema(macd_slow)
+        self._macd_signal = _Ema(macd_signal)
+        self._boll = _RollingStd(boll_period)
+        self._keltner_ema = _Ema(keltner_ema, adjust=False)
+        self._atr = _RollingMean(keltner_atr)
+        self._high = {n: _RollingExtreme(n, use_max=True) for n in (tenkan, kijun, senkou)}
+        self._low = {n: _RollingExtreme(n, use_max=False) for n in (tenkan, kijun, senkou)}
+        self._windows = (tenkan, kijun, senkou)
+        self._span_a = _Lag(kijun)
+        self._span_b = _Lag(kijun)
+        self._chikou_reference = _Lag(kijun)
+
+        self._prev = None  # last committed candle
+        self._pending = None
+        self.bars = 0
+        self.values = {}
+
+    @classmethod
+    def from_frame(cls, df, **params):
+        """Warm up from a candle DataFrame; its last row stays pending."""
+        calc = cls(**params)
+        columns = ["open_price", "high_price", "low_price", "close_price", "volume"]
+        timestamps = df["timestamp"] if "timestamp" in df.columns else df.index
+        for ts, row in zip(timestamps, df[columns].itertuples(index=False)):
+            calc.update(dict(zip(columns, row), timestamp=ts))
+        return calc
+
+    def update(self, candle):
+        """
+        Feed one kline (dict with timestamp, open_price, high_price, low_price,
+        close_price, volume) and return the indicator values for it.
+        """
+        pending = self._pending
+        if pending is not None:
+            if candle["timestamp"] < pending["timestamp"]:
+                return self.values  # stale update of an already closed candle
+            if candle["timestamp"] != pending["timestamp"]:
+                self._step(pending, commit=True)
+        self._pending = candle
+        self.values = self._step(candle, commit=False)
+        return self.values
+
+    def close_bar(self):
+        """Commit the pending candle, e.g. when the exchange marks it closed."""
+        if self._pending is not None:
+            self.values = self._step(self._pending, commit=True)
+            self._pending = None
+        return self.values
+
+    def _step(self, candle, commit):
+        o = float(candle["open_price"])
+        h = float(candle["high_price"])
+        l = float(candle["low_price"])
+        c = float(candle["close_price"])
+        prev = self._prev
+        out = {"timestamp": candle["timestamp"]}
+
+        # RSI (simple rolling means of gains/losses, as calculate_rsi)
+        delta = c - prev["close_price"] if prev else NAN
+        avg_gain = self._rsi_gain.update(max(delta, 0.0) if prev else NAN, commit)
+        avg_loss = self._rsi_loss.update(-min(delta, 0.0) if prev else NAN, commit)
+        out["rsi"] = 100 - (100 / (1 + avg_gain / (avg_loss + 1e-10)))
+
+        # MACD
+        macd = self._macd_fast.update(c, commit) - self._macd_slow.update(c, commit)
+        macd_signal = self._macd_signal.update(macd, commit)
+        out["macd"] = macd
+        out["macd_signal"] = macd_signal
+        out["macd_hist"] = macd - macd_signal
+
+        # Bollinger
+        sma, std = self._boll.update(c, commit)
+        out["boll_sma"] = sma
+        out["boll_std"] = std
+        out["boll_upper"] = sma + self.boll_num_std * std
+        out["boll_lower"] = sma - self.boll_num_std * std
+
+        # Keltner
+        ema = self._keltner_ema.update(c, commit)
+        if prev:
+            prev_close = prev["close_price"]
+            tr = max(h - l, abs(h - prev_close), abs(l - prev_close))
+        else:
+            tr = NAN
+        atr = self._atr.update(tr, commit)
+        out["ema"] = ema
+        out["tr"] = tr
+        out["atr"] = atr
+        out["keltner_upper"] = ema + self.keltner_multiplier * atr
+        out["keltner_lower"] = ema - self.keltner_multiplier * atr
+
+        # Ichimoku
+        tenkan_n, kijun_n, senkou_n = self._windows
+        mids = {n: (self._high[n].update(h, commit) + self._low[n].update(l, commit)) / 2
+                for n in self._windows}
+        out["tenkan_sen"] = mids[tenkan_n]
+        out["kijun_sen"] = mids[kijun_n]
+        out["senkou_span_a"] = self._span_a.update((mids[tenkan_n] + mids[kijun_n]) / 2, commit)
+        out["senkou_span_b"] = self._span_b.update(mids[senkou_n], commit)
+        out["chikou_span"] = NAN  # close.shift(-kijun) is never known for the newest bar
+        out["chikou_reference"] = self._chikou_reference.update(c, commit)
+
+        # Candlestick patterns
+        bullish = c > o
+        bearish = c < o
+        body = abs(c - o)
+        rng = h - l
+        upper_shadow = h - max(c, o)
+        lower_shadow = min(c, o) - l
+        doji = body <= rng * 0.1
+        hammer = lower_shadow > 2 * body and upper_shadow < body and bullish
+        inv_hammer = upper_shadow > 2 * body and lower_shadow < body and bullish
+        bullish_engulfing = bool(prev) and bullish and o < prev["close_price"] \
+            and c > prev["open_price"] and prev["close_price"] < prev["open_price"]
+        bearish_engulfing = bool(prev) and bearish and o > prev["close_price"] \
+            and c < prev["open_price"] and prev["close_price"] > prev["open_price"]
+        bullish_score = int(hammer) + int(inv_hammer) + int(bullish_engulfing)
+        bearish_score = int(bearish_engulfing)
+        if doji or bullish_score == bearish_score:
+            result = "Neutral"
+        elif bullish_score > bearish_score:
+            result = "Bullish"
+        else:
+            result = "Bearish"
+        out.update({
+            "bullish_candle": bullish, "bearish_candle": bearish,
+            "body": body, "range": rng,
+            "upper_shadow": upper_shadow, "lower_shadow": lower_shadow,
+            "doji": doji, "hammer": hammer, "inv_hammer": inv_hammer,
+            "bullish_engulfing": bullish_engulfing, "bearish_engulfing": bearish_engulfing,
+            "bullish_score": bullish_score, "bearish_score": bearish_score,
+            "patterns_result": result
+        })
+
+        if commit:
+            self._prev = {"open_price": o, "close_price": c}
+            self.bars += 1
+        return out
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+from my_modules.candle_aggregator import interval_to_ms
+
+TIMEFRAME_ROLES = {'HHT': '4h', 'HTF': '1h', 'TTF': '15min', 'LTF': '5min', 'LLT': '1min'}
+
+# Columns built from future bars (close.shift(-kijun)); never known when their bar closes
+LOOKAHEAD_COLUMNS = ("chikou_span",)
+
+OHLCV_AGG = {"open_price": "first", "high_price": "max", "low_price": "min", "close_price": "last", "volume": "sum"}
+
+
+def open_ms(index):
+    """Bar open times of a DatetimeIndex as epoch milliseconds."""
+    return np.asarray(index.values, dtype="datetime64[ms]").astype(np.int64)
+
+
+def closed_bars(df, interval, as_of_ms):
+    """Rows of `df` whose bar had closed by `as_of_ms`; a still-forming last candle is dropped."""
+    close_ms = open_ms(df.index) + interval_to_ms(interval)
+    return df.iloc[:int(np.searchsorted(close_ms, as_of_ms, side="right"))]
+
+
+def resample_timeframes(minutes, intervals=TIMEFRAME_ROLES):
+    """{interval: candles} from 1min candles, bars labelled by their open time like the exchange."""
+    return {tf: minutes.resample(tf, label="left", closed="left").agg(OHLCV_AGG).dropna()
+            for tf in intervals.values()}
+
+
+def align_timeframes(frames, base="LLT", intervals=TIMEFRAME_ROLES, lookahead_columns=LOOKAHEAD_COLUMNS):
+    """
+    Project every timeframe onto the bars of the base timeframe.
+
+    Row t of the result holds, per role, the last bar of that timeframe that
+    had closed when base bar t closed (a vectorized as-of join on close
+    times), as `<role>_<column>` plus `<role>_bar_time`, the open time of
+    the projected bar. Nothing from a bar that was still forming leaks in.
+    Columns in `lookahead_columns` are NaN: at any bar's close their value
+    is not known yet, which is also what the live path sees on its last row.
+    Roles without a closed bar yet are NaN / None / False.
+    """
+    base_index = frames[base].index
+    base_close = open_ms(base_index) + interval_to_ms(intervals[base])
+    n = len(base_index)
+    columns = {}
+    for role, df in frames.items():
+        if df is None:
+            continue
+        bar_open = open_ms(df.index)
+        pos = np.searchsorted(bar_open + interval_to_ms(intervals[role]), base_close, side="right") - 1
+        known = pos >= 0
+        take = np.maximum(pos, 0)
+        for name in df.columns:
+            values = df[name].to_numpy()
+            if name in lookahead_columns:
+                out = np.full(n, np.nan)
+            elif len(df) == 0:
+                out = np.full(n, None, dtype=object)
+            elif values.dtype.kind == "b":
+                out = values[take] & known
+            elif values.dtype.kind in "fiu":
+                out = values.astype(np.float64)[take]
+                out[~known] = np.nan
+            else:
+                out = values[take].astype(object)
+                out[~known] = None
+            columns[f"{role}_{name}"] = out
+        bar_time = bar_open[take].astype("datetime64[ms]") if len(df) else np.empty(n, dtype="datetime64[ms]")
+        bar_time[~known] = np.datetime64("NaT")
+        columns[f"{role}_bar_time"] = bar_time
+    return pd.DataFrame(columns, index=base_index)
+
+
+def split_aligned(wide, roles=TIMEFRAME_ROLES):
+    """
+    {role: frame with the original column names plus bar_time}, all on the
+    wide frame's index, e.g. for IchimokuDayStrategy(...).generate_signals().
+    """
+    frames = {}
+    for role in roles:
+        prefix = f"{role}_"
+        names = [c for c in wide.columns if c.startswith(prefix)]
+        if len(names) > 1:
+            frames[role] = wide[names].rename(columns=lambda c: c[len(prefix):])
+    return frames
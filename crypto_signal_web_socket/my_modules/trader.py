@@ -1,12 +1,16 @@
+import os
 import time
 import hmac
 import hashlib
 import requests
 import urllib.parse
 
+# LBANK_REST_URL points the bot at another server, e.g. the local exchange simulator
+BASE_URL = os.environ.get("LBANK_REST_URL", "https://api.lbank.info").rstrip("/")
+
 
 class Trader:
-    def __init__(self, api_key: str, secret_key: str, base_url="https://api.lbank.info"):
+    def __init__(self, api_key: str, secret_key: str, base_url=BASE_URL):
         self.api_key = api_key
         self.secret_key = secret_key
         self.base_url = base_url
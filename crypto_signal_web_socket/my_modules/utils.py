@@ -11,51 +11,59 @@ def load_config(path="config.json"):
     with open(path, "r") as f:
         return json.load(f)
 
-def fetch_initial_kline(symbol, interval, size=200, rest_code_map=None):
+# LBANK_REST_URL points the bot at another server, e.g. the local exchange simulator
+REST_BASE_URL = os.environ.get("LBANK_REST_URL", "https://api.lbank.info").rstrip("/")
+KLINE_URL = REST_BASE_URL + "/v2/kline.do"
+
+INTERVAL_MINUTES = {
+    "4h": int(4*60),
+    "1h": int(1*60),
+    "15min": int(15),
+    "5min": int(5),
+    "1min": int(1)
+    }
+
+def kline_request_params(symbol, interval, size=200, rest_code_map=None):
     if rest_code_map is None:
         raise ValueError("rest_code_map is required to convert timeframe")
 
     if interval not in rest_code_map:
         raise ValueError(f"Unknown interval '{interval}' for REST API")
 
-    rest_interval = rest_code_map[interval]
-    base_url = "https://api.lbank.info/v2/kline.do"
-    print('INterval: ', interval)
-    minutes = {
-        "4h":int(4*60),
-        "1h":int(1*60),
-        "15min":int(15),
-        "5min":int(5),
-        "1min":int(1)
-        }
-
     end_time = int(time.time())
-    start_time = end_time - minutes[interval] * 60 * size # size * 60sec
+    start_time = end_time - INTERVAL_MINUTES[interval] * 60 * size # size * 60sec
 
-    params = {
+    return {
         "symbol": symbol,
         "size": size,
-        "type": rest_interval,
+        "type": rest_code_map[interval],
         "time": str(start_time)
     }
 
+def kline_response_to_df(data, symbol, interval):
+    if data["result"] is False or not data.get("data"):
+        raise ValueError(f"No data returned for {symbol}-{interval}")
+    df = pd.DataFrame(data["data"], columns=[
+        "timestamp", "open", "high", "low", "close", "volume"
+    ])
+    df["timestamp"] = df["timestamp"].astype(int)
+    df["open"] = df["open"].astype(float)
+    df["high"] = df["high"].astype(float)
+    df["low"] = df["low"].astype(float)
+    df["close"] = df["close"].astype(float)
+    df["volume"] = df["volume"].astype(float)
+    return df
+
+def fetch_initial_kline(symbol, interval, size=200, rest_code_map=None):
+    params = kline_request_params(symbol, interval, size, rest_code_map)
+    base_url = KLINE_URL
+    print('INterval: ', interval)
+
     try:
         print(base_url, params)
         response = requests.get(base_url, params=params, timeout=10)
         response.raise_for_status()
-        data = response.json()
-        if data["result"] is False or not data.get("data"):
-            raise ValueError(f"No data returned for {symbol}-{interval}")
-        df = pd.DataFrame(data["data"], columns=[
-            "timestamp", "open", "high", "low", "close", "volume"
-        ])
-        df["timestamp"] = df["timestamp"].astype(int)
-        df["open"] = df["open"].astype(float)
-        df["high"] = df["high"].astype(float)
-        df["low"] = df["low"].astype(float)
-        df["close"] = df["close"].astype(float)
-        df["volume"] = df["volume"].astype(float)
-        return df
+        return kline_response_to_df(response.json(), symbol, interval)
     except Exception as e:
         print(f"[ERROR] fetch_initial_kline failed for {symbol}-{interval}: {e}")
         return pd.DataFrame()
@@ -0,0 +1,169 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from my_modules.backtest_engine import simulate_trades, stop_distance, strategy_frame, strategy_signals
+from my_modules.metrics import MetricsAccumulator, batch_metrics, calculate_metrics, pad_returns
+from my_modules.param_sweep import attach_history, cached_indicator, indicator_key, memo_groups, shared_frame, \
+    use_history
+from my_modules.shared_history import SharedHistory
+from my_modules.strategy import TradePlanner
+from my_modules.timeframe_alignment import TIMEFRAME_ROLES, align_timeframes
+
+# History before a window that its first signals still read: crossed()
+# compares the projected 4h bar with the one before it
+WARMUP = pd.Timedelta("12h")
+
+
+def walk_forward_windows(start, end, train_days=60, test_days=15):
+    """Rolling (train_start, test_start, test_end) timestamps; test windows follow each other."""
+    train, test = pd.Timedelta(days=train_days), pd.Timedelta(days=test_days)
+    windows, train_start = [], pd.Timestamp(start)
+    while train_start + train + test <= pd.Timestamp(end) + pd.Timedelta("1min"):
+        windows.append((train_start, train_start + train, train_start + train + test))
+        train_start += test
+    return windows
+
+
+# --- worker process side (history and indicator memo from param_sweep) ---
+def window_frame(pair, params, start, end):
+    """
+    align_timeframes() rows of [start, end) built from slices of the
+    full-history indicator columns, so no indicator is recomputed per window.
+    """
+    frames = {}
+    for role, tf in TIMEFRAME_ROLES.items():
+        candles = shared_frame(pair, tf)
+        lo, hi = candles.index.searchsorted([start - WARMUP, end])
+
+        def sliced(window_candles, kind, params, tf=tf, lo=lo, hi=hi):
+            columns = cached_indicator(pair, tf, kind, indicator_key(kind, params))
+            return {name: values[lo:hi] for name, values in columns.items()}
+        frames[role] = strategy_frame(candles.iloc[lo:hi], params, sliced)
+    wide = align_timeframes(frames)
+    return wide.iloc[wide.index.searchsorted(start):]
+
+
+def _window_trades(pair, wide, params, start, end, costs):
+    base = TIMEFRAME_ROLES["LLT"]
+    candles = shared_frame(pair, base)
+    lo, hi = candles.index.searchsorted([start, end])
+    first = wide.index.searchsorted(candles.index[lo]) if hi > lo else 0
+    signals = strategy_signals(wide, params)[first:first + hi - lo]
+    keltner = cached_indicator(pair, base, "keltner", indicator_key("keltner", params))
+    sl_distance = stop_distance({name: values[lo:hi] for name, values in keltner.items()})
+    planner = TradePlanner(equity=1.0, rr_ratio=params["rr_ratio"])
+    return simulate_trades(pair, candles.iloc[lo:hi], signals, sl_distance, planner, halt_on_drawdown=False, **costs)
+
+
+def _best(logs, rank_by):
+    """Index of the best log by `rank_by` (NaN last), then by trade count, then by order."""
+    returns, mask = pad_returns([[trade["return"] for trade in log] for log in logs])
+    scores = batch_metrics(returns, mask)
+    score = np.nan_to_num(np.asarray(scores.get(rank_by, np.full(len(logs), np.nan)), dtype=float), nan=-np.inf)
+    order = np.lexsort((np.arange(len(logs)), -scores["Total Trades"], -score))
+    return int(order[0]), {name: values[order[0]] for name, values in scores.items()}
+
+
+def run_window(window_id, window, pairs, param_sets, rank_by, costs):
+    """
+    Optimize on one train window and trade the winner on the test window
+    that follows: (window id, best parameter set, its train metrics, test trades).
+    """
+    train_start, test_start, test_end = window
+    started = time.perf_counter()
+    train_logs = [[] for _ in param_sets]
+    groups = memo_groups(param_sets)
+    for pair in pairs:
+        for group in groups:
+            wide = window_frame(pair, param_sets[group[0]], train_start, test_start)
+            for job in group:
+                train_logs[job].extend(_window_trades(pair, wide, param_sets[job], train_start, test_start, costs))
+    for log in train_logs:
+        log.sort(key=lambda trade: (trade["timestamp"], trade["symbol"]))
+    best, train_metrics = _best(train_logs, rank_by)
+
+    params = param_sets[best]
+    test_trades = []
+    for pair in pairs:
+        wide = window_frame(pair, params, test_start, test_end)
+        test_trades.extend(_window_trades(pair, wide, params, test_start, test_end, costs))
+    test_trades.sort(key=lambda trade: (trade["timestamp"], trade["symbol"]))
+    return window_id, params, train_metrics, test_trades, time.perf_counter() - started
+
+
+def run_walk_forward(candles, param_sets, train_days=60, test_days=15, workers=None, rank_by="Sharpe Ratio",
+                     slippage_pct=0.001, commission_pct=0.001, verbose=True, stats=None):
+    """
+    Walk-forward optimization of the IchimokuDayStrategy parameters.
+
+    candles: {pair: {interval: candle DataFrame}} as for run_sweep. Each
+    rolling window picks the best of `param_sets` on its train days (all
+    pairs together, by `rank_by`) and trades it on the next `test_days`;
+    the test trades are stitched into one out-of-sample log. Windows run
+    on `workers` processes (workers=0: in this process) reading a
+    SharedHistory; each process computes an indicator column once over the
+    whole history and every window slices it.
+
+    The out-of-sample trades are stitched window by window into `stats`, a
+    MetricsAccumulator (a new one by default), so each row also carries the
+    out-of-sample metrics up to the end of its test window.
+
+    Returns (one row per window, out-of-sample trade log).
+    """
+    base = TIMEFRAME_ROLES["LLT"]
+    start = max(frames[base].index[0] for frames in candles.values())
+    end = min(frames[base].index[-1] for frames in candles.values())
+    windows = walk_forward_windows(start, end, train_days, test_days)
+    if not windows:
+        print(f"⚠️ {end - start} of history is shorter than one {train_days}+{test_days} day window")
+        return pd.DataFrame(), []
+
+    pairs = list(candles)
+    history = SharedHistory({(pair, tf): frames[tf] for pair, frames in candles.items()
+                             for tf in TIMEFRAME_ROLES.values()})
+    costs = {"slippage_pct": slippage_pct, "commission_pct": commission_pct}
+    results = {}
+    started = time.perf_counter()
+    try:
+        if workers != 0:
+            with ProcessPoolExecutor(max_workers=workers, initializer=attach_history,
+                                     initargs=(history.spec(),)) as pool:
+                futures = [pool.submit(run_window, k, window, pairs, param_sets, rank_by, costs)
+                           for k, window in enumerate(windows)]
+                for done, future in enumerate(as_completed(futures), 1):
+                    result = future.result()
+                    results[result[0]] = result
+                    if verbose:
+                        print(f"[WALK] window {result[0] + 1} done ({done}/{len(windows)}) in {result[4]:.1f}s")
+        else:
+            use_history(history)
+            for k, window in enumerate(windows):
+                results[k] = run_window(k, window, pairs, param_sets, rank_by, costs)
+            use_history(None)
+    finally:
+        history.close()
+
+    stats = MetricsAccumulator() if stats is None else stats
+    rows, oos_log = [], []
+    for k, (train_start, test_start, test_end) in enumerate(windows):
+        _, params, train_metrics, test_trades, seconds = results[k]
+        test_metrics = calculate_metrics(test_trades) or {"Total Trades": 0}
+        stats.extend(test_trades)
+        oos = stats.snapshot()
+        rows.append({
+            "window": k + 1, "train_start": train_start, "test_start": test_start, "test_end": test_end,
+            **params,
+            f"train {rank_by}": train_metrics.get(rank_by, np.nan),
+            "train trades": int(train_metrics["Total Trades"]),
+            "seconds": round(seconds, 2),
+            **{f"test {name}": value for name, value in test_metrics.items()},
+            "oos trades": stats.count,
+            f"oos {rank_by}": oos.get(rank_by, np.nan),
+            "oos Max Drawdown": oos.get("Max Drawdown", np.nan),
+        })
+        oos_log.extend(test_trades)
+    if verbose:
+        print(f"[WALK] {len(windows)} windows x {len(param_sets)} parameter sets in "
+              f"{time.perf_counter() - started:.1f}s; out of sample: {stats.snapshot() or {'Total Trades': 0}}")
+    return pd.DataFrame(rows), oos_log
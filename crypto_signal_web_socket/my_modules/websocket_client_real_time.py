@@ -1,38 +1,25 @@
-import asyncio
-import websockets
-import json
 from utils.logger import get_logger
+from my_modules.ws_connection_manager import WebSocketConnectionManager, WS_URL
 
 logger = get_logger("ws_client")
 
 class WebSocketClient:
-    def __init__(self, symbols, on_message_callback):
+    def __init__(self, symbols, on_message_callback, connections=1):
         self.symbols = symbols
         self.on_message_callback = on_message_callback
-        self.url = "wss://www.lbkex.net/ws/V2/"
+        self.url = WS_URL
+        self.connections = connections
+        self.manager = None
 
     async def connect(self):
-        try:
-            async with websockets.connect(self.url) as ws:
-                # Subscribe to all requested symbols
-                for symbol in self.symbols:
-                    sub_msg = json.dumps({
-                        "action": "subscribe",
-                        "subscribe": f"ticker.{symbol}"
-                    })
-                    await ws.send(sub_msg)
-                    logger.info(f"[WS] Subscribed to {symbol}")
-
-                logger.info("[WS] Listening for messages...")
-
-                while True:
-                    try:
-                        msg = await ws.recv()
-                        data = json.loads(msg)
-                        await self.on_message_callback(data)
-                    except Exception as e:
-                        logger.error(f"[WS MESSAGE ERROR] {e}")
-                        await asyncio.sleep(3)
-
-        except Exception as e:
-            logger.critical(f"[WS CONNECTION FAILED] {e}")
+        # Sharded, self-reconnecting sockets instead of a single connection
+        subscriptions = [
+            {"action": "subscribe", "subscribe": f"ticker.{symbol}"}
+            for symbol in self.symbols
+        ]
+        self.manager = WebSocketConnectionManager(
+            subscriptions, self.on_message_callback,
+            connections=self.connections, url=self.url
+        )
+        logger.info(f"[WS] Listening for {len(self.symbols)} symbols on {len(self.manager.connections)} connection(s)...")
+        await self.manager.run()
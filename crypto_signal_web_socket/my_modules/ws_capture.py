@@ -0,0 +1,130 @@
+import asyncio
+import gzip
+import inspect
+import time
+from collections import defaultdict, deque
+from my_modules.ws_router import loads
+
+
+class LatencyStats:
+    """Latency samples per pipeline stage (seconds); the last `window` of each are kept."""
+    def __init__(self, window=100_000):
+        self.samples = defaultdict(lambda: deque(maxlen=window))
+        self.counts = defaultdict(int)
+
+    def add(self, stage, seconds):
+        self.samples[stage].append(seconds)
+        self.counts[stage] += 1
+
+    def report(self):
+        summary = {}
+        for stage, samples in self.samples.items():
+            latencies = sorted(samples)
+            if not latencies:
+                continue
+            summary[stage] = {
+                "count": self.counts[stage],
+                "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+                "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 3),
+                "max_ms": round(latencies[-1] * 1000, 3)
+            }
+        return summary
+
+
+class FrameRecorder:
+    """
+    Append-only gzip log of raw WebSocket frames, one "<receive_ns>\\t<frame>"
+    line per frame. Every open starts a new gzip member, so a log can be
+    extended across runs and still reads back as one stream.
+    """
+    def __init__(self, path, flush_every=500, compresslevel=6):
+        self.path = path
+        self.flush_every = flush_every
+        self.frames = 0
+        self._file = gzip.open(path, "at", encoding="utf-8", compresslevel=compresslevel)
+
+    def record(self, frame, received_ns=None):
+        if isinstance(frame, bytes):
+            frame = frame.decode("utf-8")
+        self._file.write(f"{received_ns or time.time_ns()}\t{frame}\n")
+        self.frames += 1
+        if self.frames % self.flush_every == 0:
+            self._file.flush()  # sync-flushes the compressor, the log stays readable if we crash
+
+    def close(self):
+        self._file.close()
+
+
+def read_frames(path):
+    """Yield (receive_ns, raw_frame) from a capture log, in recorded order."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # half-written last line
+                received_ns, _, frame = line[:-1].partition("\t")
+                yield int(received_ns), frame
+        except EOFError:
+            # the recording process was killed, keep everything that was flushed
+            return
+
+
+class FrameReplayer:
+    """
+    Feeds a capture log into `on_message` (the live receiver's callback)
+    without a network.
+
+    speed=1 keeps the recorded pacing, speed=N shrinks every gap N times and
+    speed=0/None sends the frames back to back. Pings and pongs are skipped
+    like the live receiver does. Decode and dispatch times, and how far the
+    replay fell behind its schedule, are recorded in `timings`.
+    """
+    def __init__(self, path, on_message, speed=1.0, decoder=None, timings=None):
+        self.path = path
+        self.on_message = on_message
+        self.speed = speed
+        self.decode = decoder or loads
+        self.timings = timings or LatencyStats()
+        self.frames = 0
+        self.recorded_sec = 0.0
+        self.elapsed = 0.0
+
+    async def run(self):
+        first_ns = None
+        started = time.perf_counter()
+        for received_ns, frame in read_frames(self.path):
+            if first_ns is None:
+                first_ns = received_ns
+            self.recorded_sec = (received_ns - first_ns) / 1e9
+            if self.speed:
+                delay = self.recorded_sec / self.speed - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    self.timings.add("schedule_lag", -delay)
+                    await asyncio.sleep(0)
+            else:
+                await asyncio.sleep(0)  # a real socket read would yield here too
+
+            t0 = time.perf_counter()
+            data = self.decode(frame)
+            t1 = time.perf_counter()
+            self.timings.add("decode", t1 - t0)
+            if data.get("action") in ("ping", "pong"):
+                continue
+            result = self.on_message(data)
+            if inspect.isawaitable(result):
+                await result
+            self.timings.add("dispatch", time.perf_counter() - t1)
+            self.frames += 1
+        self.elapsed = time.perf_counter() - started
+        return self.frames
+
+    def report(self):
+        return {
+            "frames": self.frames,
+            "recorded_sec": round(self.recorded_sec, 2),
+            "replay_sec": round(self.elapsed, 2),
+            "frames_per_sec": round(self.frames / self.elapsed, 1) if self.elapsed else None,
+            "stages": self.timings.report()
+        }
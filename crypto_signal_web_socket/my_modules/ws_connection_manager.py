@@ -0,0 +1,193 @@
+import asyncio
+import inspect
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+import websockets
+from my_modules.ws_router import loads
+
+# LBANK_WS_URL points the bot at another server, e.g. the local exchange simulator
+WS_URL = os.environ.get("LBANK_WS_URL", "wss://www.lbkex.net/ws/V2/")
+
+
+def kbar_subscription(pair, interval="1min"):
+    return {"action": "subscribe", "subscribe": "kbar", "kbar": interval, "pair": pair}
+
+
+def tick_subscription(pair):
+    return {"action": "subscribe", "subscribe": "tick", "pair": pair}
+
+
+def depth_subscription(pair, depth=50):
+    return {"action": "subscribe", "subscribe": "depth", "depth": str(depth), "pair": pair}
+
+
+def subscription_pair(sub):
+    return sub.get("pair") or sub.get("subscribe", "").split(".")[-1]
+
+
+def parse_kbar(data):
+    """LBank kbar push -> (pair, interval, [timestamp_ms, open, high, low, close, volume])."""
+    k = data["kbar"]
+    ts = datetime.fromisoformat(k["t"]).replace(tzinfo=timezone.utc)
+    return data["pair"], k["slot"], [int(ts.timestamp() * 1000), k["o"], k["h"], k["l"], k["c"], k["v"]]
+
+
+class _Connection:
+    """One socket carrying a shard of the subscriptions."""
+    def __init__(self, conn_id, subscriptions):
+        self.conn_id = conn_id
+        self.subscriptions = subscriptions
+        self.pairs = sorted({subscription_pair(sub) for sub in subscriptions})
+        self.ws = None
+        self.connected = False
+        self.messages = 0
+        self.bad_frames = 0
+        self.reconnects = 0
+        self.last_message = None
+        self.disconnected_at = None
+        self._rate_mark = (time.monotonic(), 0)
+
+
+class WebSocketConnectionManager:
+    """
+    Spreads subscriptions over `connections` sockets and keeps them alive.
+
+    Subscriptions of one pair always land on the same connection. Each
+    connection runs its own liveness check: when nothing arrived for
+    `ping_interval` seconds it sends a ping, and when nothing arrived for
+    `ping_timeout` seconds the socket is considered dead and replaced.
+    Reconnects use exponential backoff with jitter. After a reconnect,
+    `on_reconnect(pairs, disconnected_at_ms)` is awaited before resubscribing
+    so missed candles can be backfilled over REST.
+
+    Frames are decoded with `decoder` (the fastest installed JSON library by
+    default) and handed to `on_message`, typically ChannelRouter.dispatch.
+    With a `recorder` (ws_capture.FrameRecorder) every raw frame is also
+    logged with its receive time for later replay.
+    """
+    def __init__(self, subscriptions, on_message, connections=4, url=WS_URL,
+                 ping_interval=10, ping_timeout=30, base_backoff=1, max_backoff=60,
+                 on_reconnect=None, decoder=None, recorder=None):
+        self.on_message = on_message
+        self.recorder = recorder
+        self.decode = decoder or loads
+        self.on_reconnect = on_reconnect
+        self.url = url
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.connections = self._shard(subscriptions, connections)
+        self.running = False
+
+    @staticmethod
+    def _shard(subscriptions, n):
+        pairs = sorted({subscription_pair(sub) for sub in subscriptions})
+        n = max(1, min(n, len(pairs)))
+        shard_of = {pair: i % n for i, pair in enumerate(pairs)}
+        shards = [[] for _ in range(n)]
+        for sub in subscriptions:
+            shards[shard_of[subscription_pair(sub)]].append(sub)
+        return [_Connection(i, shard) for i, shard in enumerate(shards)]
+
+    async def run(self):
+        self.running = True
+        await asyncio.gather(*(self._keep_alive(conn) for conn in self.connections))
+
+    async def stop(self):
+        self.running = False
+        for conn in self.connections:
+            if conn.ws is not None:
+                await conn.ws.close()
+
+    async def _keep_alive(self, conn):
+        failures = 0
+        while self.running:
+            seen = conn.messages
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    conn.ws = ws
+                    if conn.disconnected_at is not None:
+                        conn.reconnects += 1
+                        if self.on_reconnect:
+                            await self._call(self.on_reconnect, conn.pairs, conn.disconnected_at)
+                    await asyncio.gather(*(ws.send(json.dumps(sub)) for sub in conn.subscriptions))
+                    conn.connected = True
+                    print(f"[WS-{conn.conn_id}] Subscribed {len(conn.subscriptions)} channels for {len(conn.pairs)} pairs")
+                    await self._receive(conn, ws)
+            except Exception as e:
+                if self.running:
+                    print(f"[WS-{conn.conn_id} ERROR] {e}")
+            if conn.connected:
+                conn.disconnected_at = int(time.time() * 1000)
+            if conn.messages > seen:
+                failures = 0
+            conn.connected = False
+            conn.ws = None
+            if not self.running:
+                break
+            failures += 1
+            delay = min(self.max_backoff, self.base_backoff * 2 ** (failures - 1)) * random.uniform(0.5, 1.5)
+            print(f"[WS-{conn.conn_id}] Reconnecting in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def _receive(self, conn, ws):
+        conn.last_message = time.monotonic()
+        while self.running:
+            try:
+                msg = await asyncio.wait_for(ws.recv(), timeout=self.ping_interval)
+            except asyncio.TimeoutError:
+                if time.monotonic() - conn.last_message > self.ping_timeout:
+                    print(f"[WS-{conn.conn_id}] No data for {self.ping_timeout}s, dropping connection")
+                    return
+                await ws.send(json.dumps({"action": "ping", "ping": str(uuid.uuid4())}))
+                continue
+
+            conn.last_message = time.monotonic()
+            conn.messages += 1
+            if self.recorder is not None:
+                self.recorder.record(msg)
+            try:
+                data = self.decode(msg)
+                action = data.get("action")
+                if action == "ping":
+                    await ws.send(json.dumps({"action": "pong", "pong": data["ping"]}))
+                    continue
+                if action == "pong":
+                    continue
+                await self._call(self.on_message, data)
+            except websockets.ConnectionClosed:
+                raise
+            except Exception as e:
+                # one bad frame must not cost the shard a reconnect and backfill
+                conn.bad_frames += 1
+                print(f"[WS-{conn.conn_id} MESSAGE ERROR] {e}")
+
+    @staticmethod
+    async def _call(callback, *args):
+        result = callback(*args)
+        if inspect.isawaitable(result):
+            await result
+
+    def stats(self):
+        """Per-connection state and message rate since the previous call."""
+        now = time.monotonic()
+        report = {}
+        for conn in self.connections:
+            mark_time, mark_count = conn._rate_mark
+            elapsed = max(now - mark_time, 1e-9)
+            report[conn.conn_id] = {
+                "connected": conn.connected,
+                "pairs": len(conn.pairs),
+                "messages": conn.messages,
+                "bad_frames": conn.bad_frames,
+                "msg_per_sec": round((conn.messages - mark_count) / elapsed, 2),
+                "reconnects": conn.reconnects,
+                "idle_sec": round(now - conn.last_message, 1) if conn.last_message else None
+            }
+            conn._rate_mark = (now, conn.messages)
+        return report
@@ -0,0 +1,63 @@
+import json
+
+# Fastest available JSON decoder; the stdlib one is always there as a fallback.
+try:
+    import orjson
+    loads = orjson.loads
+    DECODER = "orjson"
+except ImportError:
+    try:
+        import ujson
+        loads = ujson.loads
+        DECODER = "ujson"
+    except ImportError:
+        loads = json.loads
+        DECODER = "json"
+
+
+def channel_key(data):
+    """
+    (channel, pair) of a decoded frame. LBank V2 pushes carry both in
+    "type"/"pair"; the older "ticker.btc_usdt" style keeps them in "subscribe".
+    """
+    channel = data.get("type")
+    if channel is not None:
+        return channel, data.get("pair")
+    subscribe = data.get("subscribe")
+    if subscribe and "." in subscribe:
+        channel, pair = subscribe.split(".", 1)
+        return channel, pair
+    return data.get("action"), None
+
+
+class ChannelRouter:
+    """
+    Routes decoded frames through a precomputed (channel, pair) -> handler table.
+    A handler registered with pair=None catches every pair of that channel.
+    """
+    def __init__(self):
+        self.routes = {}
+        self.unrouted = 0
+
+    def register(self, channel, pair, handler):
+        self.routes[(channel, pair)] = handler
+
+    def register_pairs(self, channel, pairs, handler):
+        for pair in pairs:
+            self.register(channel, pair, handler)
+
+    def dispatch(self, data):
+        routes = self.routes
+        channel = data.get("type")
+        # V2 pushes are nearly every frame: key them inline, without channel_key()
+        key = (channel, data.get("pair")) if channel is not None else channel_key(data)
+        handler = routes.get(key)
+        if handler is None:
+            handler = routes.get((key[0], None))
+        if handler is None:
+            self.unrouted += 1
+            return None
+        return handler(data)
+
+    def dispatch_raw(self, msg):
+        return self.dispatch(loads(msg))
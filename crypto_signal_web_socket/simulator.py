@@ -0,0 +1,50 @@
+"""
+Local LBank stand-in for offline end-to-end runs.
+
+    python simulator.py --rate 5                      # synthetic market, 5 updates/sec per pair
+    python simulator.py --capture session.log.gz --speed 10
+    LBANK_WS_URL=ws://127.0.0.1:8765/ws/V2/ LBANK_REST_URL=http://127.0.0.1:8766 python app.py
+"""
+import argparse
+import asyncio
+import os
+from my_modules.exchange_simulator import ExchangeSimulator, MarketState, SyntheticFeed, RecordedFeed
+from my_modules.candle_archive import CandleArchive
+from my_modules.utils import log_signal
+
+
+async def report(simulator, every=60):
+    while True:
+        await asyncio.sleep(every)
+        log_signal(f"[SIM] {simulator.stats()}")
+
+
+async def main(args):
+    state = MarketState(history=args.history)
+    if args.archive:
+        archive = CandleArchive(args.archive)
+        seeded = [pair for pair in sorted(os.listdir(args.archive)) if state.seed_archive(archive, pair)]
+        print(f"📂 History of {len(seeded)} pairs loaded from {args.archive}")
+    if args.capture:
+        feed = RecordedFeed(state, args.capture, speed=args.speed, seed=args.seed)
+    else:
+        feed = SyntheticFeed(state, rate=args.rate, volatility=args.volatility, depth_levels=args.depth, seed=args.seed)
+    simulator = ExchangeSimulator(feed, host=args.host, ws_port=args.ws_port, rest_port=args.rest_port)
+    asyncio.create_task(report(simulator))
+    await simulator.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--ws-port", type=int, default=8765)
+    parser.add_argument("--rest-port", type=int, default=8766)
+    parser.add_argument("--rate", type=float, default=1.0, help="synthetic updates per second per pair")
+    parser.add_argument("--volatility", type=float, default=0.001, help="synthetic per-update log-return stdev")
+    parser.add_argument("--depth", type=int, default=50, help="synthetic depth levels per side")
+    parser.add_argument("--capture", help="replay a ws_capture log instead of a synthetic market")
+    parser.add_argument("--speed", type=float, default=1.0, help="capture replay speed, 0 = as fast as possible")
+    parser.add_argument("--archive", help="serve REST history from this candle archive")
+    parser.add_argument("--history", type=int, default=1000, help="candles kept per pair and interval")
+    parser.add_argument("--seed", type=int)
+    asyncio.run(main(parser.parse_args()))
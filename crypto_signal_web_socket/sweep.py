@@ -0,0 +1,54 @@
+"""
+Parameter sweep of IchimokuDayStrategy / IndicatorCalculator / TradePlanner
+over archived 1min candles (or downloaded ones, cached on disk), ranked
+by calculate_metrics.
+
+    python sweep.py --pairs btc_usdt eth_usdt --days 60            # full grid
+    python sweep.py --random 200 --workers 8 --rank-by Expectancy
+"""
+import argparse
+import time
+import pandas as pd
+from my_modules.backtester import ARCHIVE, KLINE_URL, TIMEFRAME_MAP_REST, load_history
+from my_modules.candle_archive import CandleArchive
+from my_modules.kline_downloader import KlineCache, KlineDownloader
+from my_modules.param_sweep import PARAM_SPACE, grid_search, random_search, run_sweep
+
+
+def load_candles(archive, pairs, days, downloader=None):
+    end = int(time.time() * 1000)
+    candles = {}
+    for pair in pairs:
+        frames = load_history(pair, archive, start=end - days * 86_400_000, end=end, downloader=downloader)
+        if frames is None or len(frames["1min"]) < 1440:
+            print(f"⚠️ {pair}: less than a day of 1min candles, skipped")
+            continue
+        candles[pair] = frames
+    return candles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pairs", nargs="+", default=["btc_usdt", "eth_usdt"])
+    parser.add_argument("--archive", default=ARCHIVE.root)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--cache", default="kline_cache", help="download cache for history the archive lacks")
+    parser.add_argument("--no-download", action="store_true")
+    parser.add_argument("--random", type=int, default=0, help="sample this many parameter sets instead of the grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", default="Sharpe Ratio")
+    parser.add_argument("--output", default="sweep_results.csv")
+    args = parser.parse_args()
+
+    downloader = None if args.no_download else KlineDownloader(TIMEFRAME_MAP_REST, KlineCache(args.cache),
+                                                                base_url=KLINE_URL)
+    candles = load_candles(CandleArchive(args.archive), args.pairs, args.days, downloader)
+    if not candles:
+        raise SystemExit("No candle history to sweep over")
+    param_sets = random_search(PARAM_SPACE, args.random, args.seed) if args.random else grid_search(PARAM_SPACE)
+    table = run_sweep(candles, param_sets, workers=args.workers, rank_by=args.rank_by)
+    table.to_csv(args.output, index=False)
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(table.head(10))
+    print(f"✅ {len(table)} parameter sets ranked by {args.rank_by} → {args.output}")
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+from my_modules.backtest_engine import backtest_pair, first_touch, simulate_trades
+from my_modules.backtester import run_full_backtest
+from my_modules.candle_archive import CandleArchive
+from my_modules.slippage_model import apply_slippage_and_commission
+from my_modules.strategy import TradePlanner
+from my_modules.timeframe_alignment import resample_timeframes
+from candle_fixtures import make_minutes
+
+COSTS = {"slippage_pct": 0.001, "commission_pct": 0.001}
+
+
+def reference_walk(pair, candles, signals, sl_distance, planner):
+    # the plain bar-by-bar loop the engine's jumps must reproduce
+    close, high, low = (candles[c].to_numpy() for c in ("close_price", "high_price", "low_price"))
+    trades, position = [], None
+    for i in range(len(close)):
+        if position is not None:
+            long = position["direction"] == "long"
+            stop = low[i] <= position["sl"] if long else high[i] >= position["sl"]
+            take = high[i] >= position["tp"] if long else low[i] <= position["tp"]
+            if stop or take or i == len(close) - 1:
+                exit_price = position["sl"] if stop else position["tp"] if take else close[i]
+                net = apply_slippage_and_commission(position["entry"], exit_price, direction=position["direction"],
+                                                    **COSTS)["net_return"]
+                trades.append((position["entry_i"], i, exit_price, net))
+                position = None
+            continue
+        if signals[i] in ("Buy", "Sell") and i + 1 < len(close):
+            atr = sl_distance[i] if np.isfinite(sl_distance[i]) else None
+            position = planner.plan_trade({"symbol": pair, "entry": float(close[i]),
+                                           "direction": "long" if signals[i] == "Buy" else "short"}, atr)
+            position["entry_i"] = i
+    return trades
+
+
+def test_event_walk_matches_bar_by_bar_reference():
+    candles = make_minutes(20_000, 2)
+    rng = np.random.default_rng(5)
+    signals = rng.choice(["None", "Buy", "Sell"], len(candles), p=[0.98, 0.01, 0.01])
+    sl_distance = rng.uniform(0.05, 0.6, len(candles))
+    sl_distance[rng.random(len(candles)) < 0.1] = np.nan  # falls back to the planner's fixed 1%
+
+    trades = simulate_trades("eth_usdt", candles, signals, sl_distance, TradePlanner(10_000, rr_ratio=1.5),
+                             halt_on_drawdown=False, **COSTS)
+    expected = reference_walk("eth_usdt", candles, signals, sl_distance, TradePlanner(10_000, rr_ratio=1.5))
+    index = candles.index
+    assert len(trades) == len(expected) > 100
+    for trade, (i, j, exit_price, net) in zip(trades, expected):
+        assert trade["entry_time"] == index[i].isoformat() and trade["timestamp"] == index[j].isoformat()
+        assert trade["exit_price"] == exit_price and trade["return"] == net
+        assert trade["signal"] == signals[i]
+
+
+def test_simulate_trades_exits_at_planner_levels():
+    index = pd.date_range("2025-01-01", periods=7, freq="min")
+    candles = pd.DataFrame({
+        "close_price": [100.0, 100.5, 101.0, 100.0, 100.0, 100.0, 100.0],
+        "high_price": [100.0, 101.0, 102.5, 100.0, 101.5, 100.0, 100.0],
+        "low_price": [100.0, 99.5, 100.5, 100.0, 98.5, 100.0, 100.0],
+    }, index=index)
+    signals = np.array(["Buy", "Buy", "None", "Sell", "None", "Buy", "None"])
+    trades = simulate_trades("btc_usdt", candles, signals, np.full(7, 1.0), TradePlanner(10_000, rr_ratio=2.0), **COSTS)
+
+    # long 100 -> TP 102 on bar 2 (the Buy on bar 1 is skipped while in the trade)
+    assert [t["exit"] for t in trades] == ["tp", "sl", "end"]
+    assert trades[0]["exit_price"] == 102.0 and trades[0]["timestamp"] == index[2].isoformat()
+    assert trades[0]["position_size"] == 200.0 and trades[0]["pnl"] == trades[0]["return"] * 200.0 * 100.0
+    # short 100: bar 4 reaches both SL 101 and TP 98, the stop is assumed first
+    assert trades[1]["signal"] == "Sell" and (trades[1]["sl"], trades[1]["tp"]) == (101.0, 98.0)
+    assert trades[1]["exit_price"] == 101.0
+    assert trades[1]["return"] == apply_slippage_and_commission(100.0, 101.0, direction="short")["net_return"]
+
+
+def test_intrabar_minutes_settle_bars_reaching_both_levels():
+    # one 15min bar after the entry reaches SL 99 and TP 102; its minutes went up first
+    minutes = pd.DataFrame({"close_price": 100.0, "high_price": 100.0, "low_price": 100.0},
+                           index=pd.date_range("2025-01-01", periods=30, freq="min"))
+    minutes.iloc[18, minutes.columns.get_loc("high_price")] = 102.5
+    minutes.iloc[25, minutes.columns.get_loc("low_price")] = 98.5
+    bars = minutes.resample("15min").agg({"close_price": "last", "high_price": "max", "low_price": "min"})
+    signals, distance = np.array(["Buy", "None"]), np.full(2, 1.0)
+
+    coarse = simulate_trades("btc_usdt", bars, signals, distance, TradePlanner(10_000), interval="15min")
+    fine = simulate_trades("btc_usdt", bars, signals, distance, TradePlanner(10_000), interval="15min",
+                           intrabar=minutes)
+    assert coarse[0]["exit"] == "sl" and coarse[0]["timestamp"] == bars.index[1].isoformat()
+    assert fine[0]["exit"] == "tp" and fine[0]["exit_price"] == 102.0
+    assert fine[0]["timestamp"] == minutes.index[18].isoformat()
+
+
+def test_intrabar_exits_match_a_minute_by_minute_walk():
+    minutes = make_minutes(20_000, 3)
+    bars = resample_timeframes(minutes)["15min"]
+    rng = np.random.default_rng(8)
+    signals = rng.choice(["None", "Buy", "Sell"], len(bars), p=[0.9, 0.05, 0.05])
+    sl_distance = rng.uniform(0.05, 0.6, len(bars))
+    trades = simulate_trades("eth_usdt", bars, signals, sl_distance, TradePlanner(10_000), halt_on_drawdown=False,
+                             interval="15min", intrabar=minutes, **COSTS)
+    high, low = minutes["high_price"].to_numpy(), minutes["low_price"].to_numpy()
+    assert len(trades) > 50
+    for trade in trades:
+        # the same levels searched on the 1min bars from the end of the entry bar
+        start = minutes.index.searchsorted(pd.Timestamp(trade["entry_time"]) + pd.Timedelta("15min"))
+        k, stopped = first_touch(high, low, start, trade["sl"], trade["tp"], trade["signal"] == "Buy")
+        if k is None:
+            assert trade["exit"] == "end"
+            continue
+        assert trade["exit"] == ("sl" if stopped else "tp")
+        assert trade["timestamp"] == minutes.index[k].isoformat()
+
+
+def test_drawdown_limit_stops_trading():
+    n = 400
+    close = 100 * np.exp(-0.002 * np.arange(n))  # every long is stopped out
+    candles = pd.DataFrame({"close_price": close, "high_price": close, "low_price": close * 0.995},
+                           index=pd.date_range("2025-01-01", periods=n, freq="min"))
+    signals = np.array(["Buy"] * n)
+    losses = simulate_trades("btc_usdt", candles, signals, close * 0.004, TradePlanner(10_000), halt_on_drawdown=False)
+    halted = simulate_trades("btc_usdt", candles, signals, close * 0.004, TradePlanner(10_000))
+    cumulative = np.cumsum([-t["pnl"] for t in losses])
+    assert len(halted) == int(np.argmax(cumulative >= 2_000)) + 1 < len(losses)
+
+
+def test_run_full_backtest_from_archive(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # log_signal writes into the working directory
+    archive = CandleArchive(str(tmp_path / "archive"))
+    pairs = ["btc_usdt", "eth_usdt"]
+    for seed, pair in enumerate(pairs):
+        minutes = make_minutes(30 * 1440, seed)
+        archive.append(pair, "1min", dict(minutes.reset_index().to_dict("list"),
+                                          timestamp=minutes.index.values.astype("datetime64[ms]").astype(np.int64)))
+
+    trade_log = run_full_backtest(pairs, archive, params={"rsi_buy_below": 101, "rsi_sell_above": -1},
+                                  output_csv=str(tmp_path / "log.csv"), output_html=str(tmp_path / "report.html"),
+                                  workers=2)
+    # worker processes finish in any order; the merged log does not depend on it
+    assert trade_log == run_full_backtest(pairs[::-1], archive, params={"rsi_buy_below": 101, "rsi_sell_above": -1},
+                                          output_csv=str(tmp_path / "serial.csv"),
+                                          output_html=str(tmp_path / "serial.html"), workers=0)
+    per_pair = {pair: backtest_pair(pair, resample_timeframes(archive.to_frame(pair, "1min")),
+                                    {"rsi_buy_below": 101, "rsi_sell_above": -1}) for pair in pairs}
+    assert len(trade_log) == sum(len(trades) for trades in per_pair.values()) > 0
+    assert [t["timestamp"] for t in trade_log] == sorted(t["timestamp"] for t in trade_log)
+    for trades in per_pair.values():
+        # one position at a time per pair
+        assert all(a["timestamp"] < b["entry_time"] for a, b in zip(trades, trades[1:]))
+    assert len(pd.read_csv(tmp_path / "log.csv")) == len(trade_log)
+    assert (tmp_path / "report_equity.html").exists()
+    assert "block bootstrap" in (tmp_path / "report_stats.html").read_text()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    import pytest
+    test_event_walk_matches_bar_by_bar_reference()
+    test_simulate_trades_exits_at_planner_levels()
+    test_intrabar_minutes_settle_bars_reaching_both_levels()
+    test_intrabar_exits_match_a_minute_by_minute_walk()
+    test_drawdown_limit_stops_trading()
+    with tempfile.TemporaryDirectory() as tmp, pytest.MonkeyPatch.context() as monkeypatch:
+        test_run_full_backtest_from_archive(pathlib.Path(tmp), monkeypatch)
+    print("✅ backtest engine tests passed")
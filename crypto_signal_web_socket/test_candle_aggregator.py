@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+from my_modules.candle_aggregator import CandleAggregator, interval_to_ms
+from my_modules.timeframe_alignment import resample_timeframes
+
+TARGETS = {"5min": "5min", "15min": "15min", "1h": "1h", "4h": "4h"}
+T0 = 1_749_600_000_000  # a 4h boundary (ms)
+
+
+def make_klines(n, start=T0, seed=5):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.3, n))
+    open_ = np.r_[100.0, close[:-1]]
+    high = np.maximum(open_, close) + rng.uniform(0, 0.5, n)
+    low = np.minimum(open_, close) - rng.uniform(0, 0.5, n)
+    return [[start + i * 60_000, open_[i], high[i], low[i], close[i], rng.uniform(1, 3)] for i in range(n)]
+
+
+def expected_bars(klines):
+    columns = ["open_price", "high_price", "low_price", "close_price", "volume"]
+    index = pd.to_datetime([k[0] for k in klines], unit="ms")
+    minutes = pd.DataFrame([k[1:] for k in klines], columns=columns, index=index)
+    return {tf: [[int(ts.value // 10**6)] + list(row) for ts, row in zip(df.index, df.to_numpy().tolist())]
+            for tf, df in resample_timeframes(minutes, TARGETS).items()}
+
+
+def feed(aggregator, klines, pair="btc_usdt"):
+    for kline in klines:
+        # the exchange repeats the forming minute before it closes
+        aggregator.update(pair, "1min", [kline[0], kline[1], kline[1], kline[1], kline[1], kline[5] / 2])
+        aggregator.update(pair, "1min", kline)
+
+
+class Recorder:
+    def __init__(self):
+        self.candles, self.closed = [], []
+
+    def on_candle(self, pair, interval, kline):
+        self.candles.append((interval, list(kline)))
+
+    def on_close(self, pair, interval, kline):
+        self.closed.append((interval, list(kline)))
+
+    def last(self, interval):
+        return [k for tf, k in self.candles if tf == interval][-1]
+
+
+def test_buckets_roll_over_on_utc_boundaries():
+    klines = make_klines(2 * 240 + 7)
+    rec = Recorder()
+    feed(CandleAggregator(rec.on_candle, on_close=rec.on_close), klines)
+    expected = expected_bars(klines)
+    for tf in TARGETS:
+        closed = [k for interval, k in rec.closed if interval == tf]
+        # every bucket but the forming one was closed once, with every minute folded in
+        assert len(closed) == len(expected[tf]) - 1
+        assert np.allclose(closed, expected[tf][:-1])
+        assert all(k[0] % interval_to_ms(tf) == 0 for k in closed)
+        # the forming bucket holds the committed minutes plus the forming one
+        assert np.allclose(rec.last(tf), expected[tf][-1])
+    # the minute that crosses 04:00 opens a fresh 4h bar
+    index = 240 * 2 * 5  # two updates per minute, each emitting 1min and the 4 targets
+    assert rec.candles[index][0] == "1min" and rec.candles[index][1][0] == T0 + 240 * 60_000
+    first = klines[240]
+    assert rec.candles[index + 4] == ("4h", [first[0]] + [first[1]] * 4 + [first[5] / 2])
+
+
+def test_warm_up_emits_nothing_and_continues_the_buckets():
+    klines = make_klines(300)
+    live = Recorder()
+    feed(CandleAggregator(live.on_candle, on_close=live.on_close), klines)
+
+    warm = Recorder()
+    aggregator = CandleAggregator(warm.on_candle, on_close=warm.on_close)
+    aggregator.warm_up("btc_usdt", klines[:100])
+    assert warm.candles == [] and warm.closed == []
+    feed(aggregator, klines[100:])
+    assert warm.candles == live.candles[-len(warm.candles):]
+    assert warm.closed == [c for c in live.closed if c[1][0] + interval_to_ms(c[0]) >= klines[100][0]]
+
+
+def test_partial_buckets_are_skipped_until_the_next_boundary():
+    klines = make_klines(260, start=T0 + 37 * 60_000)
+    rec = Recorder()
+    aggregator = CandleAggregator(rec.on_candle, on_close=rec.on_close)
+    feed(aggregator, klines)
+    assert sum(tf == "1min" for tf, _ in rec.candles) == 2 * len(klines)
+    first_full = {"5min": T0 + 40 * 60_000, "15min": T0 + 45 * 60_000, "1h": T0 + 60 * 60_000,
+                  "4h": T0 + 240 * 60_000}
+    expected = expected_bars(klines)
+    for tf, start in first_full.items():
+        emitted = [k for interval, k in rec.candles if interval == tf]
+        assert emitted[0][0] == start and not aggregator.is_partial("btc_usdt", tf)
+        closed = [k for interval, k in rec.closed if interval == tf]
+        # no bar built from only part of its bucket
+        assert all(k[0] >= start for k in closed)
+        assert np.allclose(closed, [bar for bar in expected[tf] if bar[0] >= start][:len(closed)])
+    assert [k for tf, k in rec.closed if tf == "4h"] == []
+
+
+if __name__ == "__main__":
+    test_buckets_roll_over_on_utc_boundaries()
+    test_warm_up_emits_nothing_and_continues_the_buckets()
+    test_partial_buckets_are_skipped_until_the_next_boundary()
+    print("✅ candle aggregator tests passed")
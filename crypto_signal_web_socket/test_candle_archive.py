@@ -0,0 +1,65 @@
+import os
+import numpy as np
+from my_modules.candle_archive import COLUMNS, CandleArchive
+
+
+def candles(ts, close=None):
+    ts = np.asarray(ts, dtype=np.int64)
+    close = np.asarray(close if close is not None else ts / 60_000, dtype=float)
+    return {"timestamp": ts, "open_price": close, "high_price": close + 1, "low_price": close - 1,
+            "close_price": close, "volume": np.ones(len(ts))}
+
+
+def test_append_dedupes_and_reads_memory_mapped(tmp_path):
+    archive = CandleArchive(str(tmp_path))
+    # out of order, with a repeated timestamp whose last update wins
+    assert archive.append("btc_usdt", "1min", candles([120_000, 0, 60_000, 120_000], [2.0, 0.0, 1.0, 2.5])) == 3
+    # an overlapping backfill only adds the newer rows
+    assert archive.append("btc_usdt", "1min", candles([60_000, 120_000, 180_000, 240_000])) == 2
+    assert archive.append("btc_usdt", "1min", candles([])) == 0
+
+    arrays = archive.read("btc_usdt", "1min")
+    assert isinstance(arrays["close_price"], np.memmap)
+    assert list(arrays["timestamp"]) == [0, 60_000, 120_000, 180_000, 240_000]
+    assert list(arrays["close_price"]) == [0.0, 1.0, 2.5, 3.0, 4.0]
+    assert list(archive.read("btc_usdt", "1min", start=60_000, end=180_000)["timestamp"]) == [60_000, 120_000, 180_000]
+    assert archive.last_timestamp("btc_usdt", "1min") == 240_000
+    df = archive.to_frame("btc_usdt", "1min", tail=2)
+    assert list(df.columns) == list(COLUMNS)[1:] and list(df["close_price"]) == [3.0, 4.0]
+    assert archive.read("eth_usdt", "1min")["timestamp"].size == 0
+
+
+def test_torn_append_is_repaired(tmp_path):
+    archive = CandleArchive(str(tmp_path))
+    archive.append("btc_usdt", "1min", candles(np.arange(10) * 60_000))
+
+    # a crash mid-append: close_price stopped 3 bytes into its 8th record
+    path = os.path.join(str(tmp_path), "btc_usdt", "1min", "close_price.bin")
+    os.truncate(path, 7 * 8 + 3)
+    restarted = CandleArchive(str(tmp_path))
+    assert restarted.count("btc_usdt", "1min") == 7
+    assert list(restarted.read("btc_usdt", "1min")["timestamp"]) == list(np.arange(7) * 60_000)
+
+    # the next append truncates every column to the 7 complete rows first
+    assert restarted.append("btc_usdt", "1min", candles(np.arange(5, 12) * 60_000)) == 5
+    arrays = restarted.read("btc_usdt", "1min")
+    assert list(arrays["timestamp"]) == list(np.arange(12) * 60_000)
+    assert list(arrays["close_price"]) == list(np.arange(12, dtype=float))
+    sizes = {os.path.getsize(os.path.join(str(tmp_path), "btc_usdt", "1min", f"{c}.bin")) for c in COLUMNS}
+    assert sizes == {12 * 8}
+
+    # half a timestamp left over from a torn append in this process is noticed too
+    with open(os.path.join(str(tmp_path), "btc_usdt", "1min", "timestamp.bin"), "ab") as f:
+        f.write(b"\x00\x01\x02")
+    assert restarted.append("btc_usdt", "1min", candles([12 * 60_000])) == 1
+    assert list(restarted.read("btc_usdt", "1min")["timestamp"]) == list(np.arange(13) * 60_000)
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_append_dedupes_and_reads_memory_mapped(pathlib.Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_torn_append_is_repaired(pathlib.Path(tmp))
+    print("✅ candle archive tests passed")
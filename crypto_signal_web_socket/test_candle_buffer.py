@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+from my_modules.candle_buffer import FIELDS, CandleBuffer
+
+STEP = 60_000
+
+
+def kline(i, close=None):
+    close = float(i) if close is None else close
+    return [i * STEP, close - 0.5, close + 1, close - 1, close, 10.0 + i]
+
+
+def test_wraparound_keeps_the_newest_candles_in_order():
+    buffer = CandleBuffer(capacity=5)
+    for i in range(5):
+        buffer.append(*kline(i))
+    assert len(buffer) == 5 and list(buffer.view("close_price")) == [0, 1, 2, 3, 4]
+    for i in range(5, 13):
+        buffer.append(*kline(i))
+        # once full, every append drops the oldest candle
+        assert len(buffer) == 5
+        assert list(buffer.view("timestamp")) == [k * STEP for k in range(i - 4, i + 1)]
+    assert list(buffer.view("close_price")) == [8, 9, 10, 11, 12]
+    assert buffer.last() == 12 and buffer.last("timestamp") == 12 * STEP
+    assert CandleBuffer().last() is None
+
+
+def test_view_is_a_contiguous_read_only_slice_after_wrapping():
+    buffer = CandleBuffer(capacity=4)
+    for i in range(11):  # head stops mid-ring
+        buffer.append(*kline(i))
+        for field in FIELDS:
+            view = buffer.view(field)
+            assert view.flags.c_contiguous and not view.flags.writeable
+            # a window of the mirrored column, not a copy
+            assert view.base is getattr(buffer, field) and np.shares_memory(view, getattr(buffer, field))
+    assert list(buffer.view("open_price")) == [6.5, 7.5, 8.5, 9.5]
+    try:
+        buffer.view("close_price")[0] = 0
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("view() must be read-only")
+    assert {field: list(values) for field, values in buffer.arrays().items()} == \
+        {field: [kline(i)[k] for i in range(7, 11)] for k, field in enumerate(FIELDS)}
+
+
+def test_update_overwrites_the_forming_candle_and_appends_newer_ones():
+    buffer = CandleBuffer(capacity=3)
+    assert buffer.update(kline(0)) is True
+    for i in range(1, 6):
+        assert buffer.update(kline(i, close=i - 0.25)) is True  # the previous candle closed
+        assert buffer.update(kline(i, close=i + 0.25)) is False  # same minute, still forming
+    assert len(buffer) == 3
+    assert list(buffer.view("close_price")) == [3.25, 4.25, 5.25]
+    assert list(buffer.view("volume")) == [13, 14, 15]
+    # a late kline for a candle that already closed is ignored
+    assert buffer.update(kline(4, close=99)) is False
+    assert list(buffer.view("close_price")) == [3.25, 4.25, 5.25]
+    # overwriting after the ring wrapped touches both mirrored copies
+    assert buffer.update(kline(5, close=7)) is False
+    assert buffer.last() == 7 and list(buffer.view("close_price")) == [3.25, 4.25, 7]
+
+
+def test_to_frame_uses_the_indicator_layout():
+    buffer = CandleBuffer(capacity=3)
+    for i in range(4):
+        buffer.update(kline(i))
+    df = buffer.to_frame()
+    assert list(df.columns) == ["open_price", "high_price", "low_price", "close_price", "volume"]
+    assert df.index.name == "timestamp"
+    assert list(df.index) == list(pd.to_datetime([STEP, 2 * STEP, 3 * STEP], unit="ms"))
+    assert df.to_numpy().tolist() == [kline(i)[1:] for i in range(1, 4)]
+
+
+if __name__ == "__main__":
+    test_wraparound_keeps_the_newest_candles_in_order()
+    test_view_is_a_contiguous_read_only_slice_after_wrapping()
+    test_update_overwrites_the_forming_candle_and_appends_newer_ones()
+    test_to_frame_uses_the_indicator_layout()
+    print("✅ candle buffer tests passed")
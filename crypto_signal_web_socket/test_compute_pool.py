@@ -0,0 +1,84 @@
+import asyncio
+import gc
+import pandas as pd
+from my_modules.compute_pool import SharedCandleStore, SymbolEvaluator
+from candle_fixtures import fill_buffers
+
+INTERVALS = ["1min", "5min", "15min", "1h", "4h"]
+PAIRS = ["btc_usdt", "eth_usdt", "sol_usdt"]
+
+
+def test_published_slots_are_read_by_an_attached_store():
+    buffers = fill_buffers(PAIRS[:2], capacity=50)
+    store = SharedCandleStore(PAIRS[:2], INTERVALS, capacity=40)
+    try:
+        for pair in PAIRS[:2]:
+            for interval in INTERVALS:
+                store.publish(pair, interval, buffers[pair][interval])
+        attached = SharedCandleStore(*store.spec()[:3], name=store.name)
+        try:
+            assert not attached.owner
+            for pair in PAIRS[:2]:
+                for interval in INTERVALS:
+                    # a slot keeps the newest `capacity` candles
+                    expected = buffers[pair][interval].to_frame().iloc[-40:]
+                    pd.testing.assert_frame_equal(attached.frame(pair, interval), expected)
+            # a republished slot is seen in place, without re-attaching
+            buffers["btc_usdt"]["1min"].update([buffers["btc_usdt"]["1min"].last("timestamp"), 1, 2, 0.5, 1.5, 7])
+            store.publish("btc_usdt", "1min", buffers["btc_usdt"]["1min"])
+            assert attached.frame("btc_usdt", "1min")["close_price"].iloc[-1] == 1.5
+        finally:
+            attached.close()
+    finally:
+        store.close()
+
+
+async def evaluate_all(mode, symbol_data):
+    results = {}
+    evaluator = SymbolEvaluator(symbol_data, PAIRS, INTERVALS, lambda pair, interval, result: results.update(
+        {pair: result}), mode=mode, workers=2)
+    try:
+        for pair in PAIRS:
+            evaluator.submit(pair, "1min")
+        # a second submit while in flight is conflated into one re-run
+        evaluator.submit(PAIRS[0], "1min")
+        while evaluator.in_flight:
+            gc.collect()  # the evaluator holds its tasks; the loop alone would not keep them
+            await asyncio.sleep(0.01)
+    finally:
+        evaluator.shutdown()
+    return results, evaluator.stats()
+
+
+def test_process_mode_matches_inline_on_the_same_buffers():
+    symbol_data = fill_buffers(PAIRS)
+    inline, inline_stats = asyncio.run(evaluate_all("inline", symbol_data))
+    process, process_stats = asyncio.run(evaluate_all("process", symbol_data))
+    assert set(inline) == set(PAIRS)
+    assert process == inline
+    assert inline_stats["evaluations"] == process_stats["evaluations"] == len(PAIRS) + 1
+
+
+async def shut_down_with_queued_runs():
+    results = []
+    evaluator = SymbolEvaluator(fill_buffers(PAIRS, capacity=60), PAIRS, INTERVALS,
+                                lambda *args: results.append(args), mode="inline")
+    for pair in PAIRS:
+        evaluator.submit(pair, "1min")
+    tasks = set(evaluator._tasks)
+    evaluator.shutdown()
+    await asyncio.sleep(0)
+    return results, tasks, evaluator
+
+
+def test_shutdown_cancels_runs_that_have_not_started():
+    results, tasks, evaluator = asyncio.run(shut_down_with_queued_runs())
+    assert len(tasks) == len(PAIRS) and all(task.cancelled() for task in tasks)
+    assert results == [] and not evaluator.in_flight and not evaluator._tasks
+
+
+if __name__ == "__main__":
+    test_published_slots_are_read_by_an_attached_store()
+    test_process_mode_matches_inline_on_the_same_buffers()
+    test_shutdown_cancels_runs_that_have_not_started()
+    print("✅ compute pool tests passed")
@@ -0,0 +1,67 @@
+import asyncio
+import requests
+from my_modules.exchange_simulator import ExchangeSimulator, MarketState, SyntheticFeed
+from my_modules.order_book import OrderBookManager
+from my_modules.prefill import PrefillPipeline
+from my_modules.trader import Trader
+from my_modules.ws_connection_manager import WebSocketConnectionManager, kbar_subscription, depth_subscription, parse_kbar
+from my_modules.ws_router import ChannelRouter
+
+REST_MAP = {"1min": "Minute1", "5min": "minute5", "15min": "minute15", "1h": "hour1", "4h": "hour4"}
+PAIRS = ["btc_usdt", "eth_usdt"]
+
+
+async def run_session():
+    simulator = ExchangeSimulator(SyntheticFeed(MarketState(history=300), rate=20, depth_levels=10, seed=1),
+                                  ws_port=0, rest_port=0, ping_interval=0.2)
+    ready = asyncio.Event()
+    server = asyncio.create_task(simulator.run(ready))
+    await ready.wait()
+    rest = f"http://127.0.0.1:{simulator.rest_port}"
+
+    pipeline = PrefillPipeline(REST_MAP, base_url=rest + "/v2/kline.do", max_concurrency=4, rate_per_sec=100)
+    history = await pipeline.prefill(PAIRS, list(REST_MAP), size=200)
+
+    klines, books, router = [], OrderBookManager(top_n=5), ChannelRouter()
+    router.register_pairs("kbar", PAIRS, lambda data: klines.append(parse_kbar(data)))
+    router.register_pairs("depth", PAIRS, books.on_depth)
+    manager = WebSocketConnectionManager(
+        [kbar_subscription(p, "1min") for p in PAIRS] + [depth_subscription(p, 10) for p in PAIRS],
+        router.dispatch, connections=2, url=f"ws://127.0.0.1:{simulator.ws_port}/ws/V2/", ping_interval=1)
+    client = asyncio.create_task(manager.run())
+    await asyncio.sleep(1.0)
+
+    trader = Trader("key", "secret", base_url=rest)
+    order = await asyncio.to_thread(trader.place_order, "btc_usdt", "buy", 0.5, order_type="market")
+    info = await asyncio.to_thread(trader.get_order_info, "btc_usdt", order["data"]["order_id"])
+    ticker = (await asyncio.to_thread(requests.get, rest + "/v2/ticker.do", params={"symbol": "eth_usdt"})).json()
+
+    await manager.stop()
+    client.cancel()
+    server.cancel()
+    return simulator, history, klines, books, info, ticker
+
+
+def test_bot_clients_run_against_simulator():
+    simulator, history, klines, books, info, ticker = asyncio.run(run_session())
+
+    assert all(df is not None and len(df) == 200 for df in history.values())
+    assert len(history) == len(PAIRS) * len(REST_MAP)
+
+    assert {pair for pair, _, _ in klines} == set(PAIRS)
+    assert len(klines) >= 20
+    pair, slot, (ts, o, h, l, c, v) = klines[-1]
+    assert slot == "1min" and ts % 60_000 == 0 and l <= c <= h
+    for pair in PAIRS:
+        book = books.get(pair)
+        assert book.updates > 0 and book.best_bid < book.best_ask
+
+    assert info["result"] == "true" and info["data"]["status"] == 2
+    assert info["data"]["price"] > 0 and info["data"]["deal_amount"] == 0.5
+    assert ticker["data"][0]["ticker"]["latest"] > 0
+    assert simulator.stats()["requests"]["/v2/kline.do"] >= len(history)
+
+
+if __name__ == "__main__":
+    test_bot_clients_run_against_simulator()
+    print("✅ exchange simulator test passed")
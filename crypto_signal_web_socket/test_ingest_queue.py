@@ -0,0 +1,115 @@
+import asyncio
+import time
+import zlib
+from my_modules.ingest_queue import ConflatingQueue, IngestPipeline, ingest_key
+
+PAIRS = ["btc_usdt", "eth_usdt", "sol_usdt", "xrp_usdt", "bnb_usdt", "doge_usdt", "ada_usdt", "ltc_usdt"]
+
+
+def depth(pair, n):
+    return {"depth": {"asks": [[n, 1]], "bids": [[n - 1, 1]]}, "type": "depth", "pair": pair}
+
+
+def kbar(pair, t, close):
+    return {"kbar": {"t": t, "slot": "1min", "c": close}, "type": "kbar", "pair": pair}
+
+
+def drain(queue):
+    async def get_all():
+        return [await queue.get() for _ in range(len(queue))]
+    return asyncio.run(get_all())
+
+
+def test_ingest_key():
+    assert ingest_key(depth("btc_usdt", 1)) == ("depth", "btc_usdt")
+    assert ingest_key(kbar("btc_usdt", "2025-06-21T17:46:00.000", 1)) == ("kbar", "btc_usdt", "2025-06-21T17:46:00.000")
+    assert ingest_key({"action": "ping", "ping": "0ca8f854"}) == ("ping", None)
+
+
+def test_latest_frame_per_key_keeps_its_place():
+    queue = ConflatingQueue()
+    for n in range(3):
+        for pair in PAIRS[:3]:
+            queue.put_nowait(("depth", pair), depth(pair, n))
+    queue.put_nowait(("depth", "btc_usdt"), depth("btc_usdt", 9))
+    assert len(queue) == 3
+    assert drain(queue) == [(("depth", "btc_usdt"), depth("btc_usdt", 9)), (("depth", "eth_usdt"), depth("eth_usdt", 2)),
+                            (("depth", "sol_usdt"), depth("sol_usdt", 2))]
+    assert (queue.received, queue.conflated, queue.dropped, queue.max_depth) == (10, 7, 0, 3)
+
+
+def test_oldest_key_is_dropped_at_maxsize():
+    queue = ConflatingQueue(maxsize=3)
+    for pair in PAIRS[:3]:
+        queue.put_nowait(("depth", pair), depth(pair, 0))
+    # a waiting key is updated in place, even when full
+    queue.put_nowait(("depth", "btc_usdt"), depth("btc_usdt", 1))
+    assert queue.dropped == 0
+    queue.put_nowait(("depth", "xrp_usdt"), depth("xrp_usdt", 0))
+    queue.put_nowait(("depth", "bnb_usdt"), depth("bnb_usdt", 0))
+    assert len(queue) == queue.max_depth == 3 and queue.dropped == 2
+    assert [key[1] for key, _ in drain(queue)] == ["sol_usdt", "xrp_usdt", "bnb_usdt"]
+
+
+def test_pairs_are_pinned_to_one_worker_queue():
+    pipeline = IngestPipeline(print, workers=4)
+    for n in range(5):
+        for pair in PAIRS:
+            pipeline.submit(depth(pair, n))
+            pipeline.submit(kbar(pair, f"2025-06-21T17:4{n}:00.000", n))
+    pipeline.submit({"action": "ping", "ping": "0ca8f854"})
+    assert len(pipeline) == len(PAIRS) * 6 + 1
+    # every frame of a pair, whatever its channel, waits in the pair's crc32 queue
+    placed = {(key[1] or "", k) for k, queue in enumerate(pipeline.queues) for key in queue._items}
+    assert placed == {(pair, zlib.crc32(pair.encode()) % 4) for pair in PAIRS + [""]}
+    assert sum(q.received for q in pipeline.queues) == len(PAIRS) * 10 + 1
+
+
+async def pipeline_session():
+    handled = []
+
+    async def handler(data):
+        handled.append(data)
+        await asyncio.sleep(0)
+
+    async def settle():
+        while len(pipeline):
+            await asyncio.sleep(0.001)
+
+    pipeline = IngestPipeline(handler, workers=1)
+    for pair in PAIRS:
+        pipeline.submit(depth(pair, 0))
+    time.sleep(0.06)  # the receiver is busy before the workers get the loop
+    for n in range(1, 4):
+        for pair in PAIRS:
+            pipeline.submit(depth(pair, n))
+    workers = asyncio.create_task(pipeline.run())
+    await settle()
+    pipeline.submit(depth("btc_usdt", 4))
+    await settle()
+    first = pipeline.stats()
+    pipeline.submit(depth("btc_usdt", 5))
+    await settle()
+    second = pipeline.stats()
+    workers.cancel()
+    return handled, first, second
+
+
+def test_pipeline_handles_latest_frames_and_reports_the_longest_wait():
+    handled, first, second = asyncio.run(pipeline_session())
+    assert [(data["pair"], data["depth"]["asks"][0][0]) for data in handled] == \
+        [(pair, 3) for pair in PAIRS] + [("btc_usdt", 4), ("btc_usdt", 5)]
+    assert (first["received"], first["conflated"], first["processed"]) == (len(PAIRS) * 4 + 1, len(PAIRS) * 3,
+                                                                           len(PAIRS) + 1)
+    # the longest wait of the interval, not the last one; the next interval starts over
+    assert first["max_wait_ms"] >= 60
+    assert second["max_wait_ms"] < 60 and second["depth"] == 0
+
+
+if __name__ == "__main__":
+    test_ingest_key()
+    test_latest_frame_per_key_keeps_its_place()
+    test_oldest_key_is_dropped_at_maxsize()
+    test_pairs_are_pinned_to_one_worker_queue()
+    test_pipeline_handles_latest_frames_and_reports_the_longest_wait()
+    print("✅ ingest queue tests passed")
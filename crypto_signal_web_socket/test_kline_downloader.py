@@ -0,0 +1,119 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+from my_modules.kline_downloader import KlineCache, KlineDownloader
+
+REST_MAP = {"1min": "minute1", "5min": "minute5", "15min": "minute15", "1h": "hour1", "4h": "hour4"}
+LISTED = int(pd.Timestamp("2025-01-31").value // 10**6)  # ms
+LAST = int(pd.Timestamp("2025-02-04").value // 10**6)
+DAY = 86_400_000
+
+
+def price(ts_sec):
+    return 100 + (ts_sec // 60) % 97 * 0.01
+
+
+class StubHistoryServer(ThreadingHTTPServer):
+    """/v2/kline.do over 1min candles from LISTED to LAST; the first call fails once."""
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHistoryHandler)
+        self.lock = threading.Lock()
+        self.starts = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v2/kline.do"
+
+
+class StubHistoryHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        start, size = int(query["time"][0]), int(query["size"][0])
+        with self.server.lock:
+            self.server.starts.append(start)
+            first = len(self.server.starts) == 1
+        if first:
+            self.send_response(503)
+            self.end_headers()
+            return
+        # like LBank: `size` candles from the first one at or after `time`
+        first_bar = max(start, LISTED // 1000)
+        first_bar = -(-first_bar // 60) * 60
+        rows = [[t, price(t), price(t) + 1, price(t) - 1, price(t), 2.0]
+                for t in range(first_bar, min(first_bar + size * 60, LAST // 1000 + 60), 60)]
+        body = json.dumps({"result": True, "data": rows}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_downloads_pages_once_and_then_only_missing_ranges(tmp_path):
+    server = StubHistoryServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        cache = KlineCache(str(tmp_path / "cache"))
+        downloader = KlineDownloader(REST_MAP, cache, base_url=server.url, page_size=1000,
+                                     rate_per_sec=1000, backoff=0.01)
+
+        # starts a day before the listing and crosses the month boundary
+        start, end = LISTED - DAY, LISTED + 2 * DAY - 60_000
+        df = downloader.load("btc_usdt", "1min", start, end)
+        assert len(df) == 2 * 1440 and df.index[0] == pd.Timestamp(LISTED, unit="ms")
+        assert (df.index.to_series().diff().iloc[1:] == pd.Timedelta("1min")).all()
+        seconds = df.index.values.astype("datetime64[s]").astype(np.int64)
+        assert np.allclose(df["close_price"], price(seconds))
+        assert cache.partitions("btc_usdt", "1min") == ["2025-01", "2025-02"]
+        # paged backwards from the end: 2880 candles in 1000s, then one empty page before the listing
+        pages = server.starts[1:]
+        assert pages == sorted(pages, reverse=True) and len(pages) == 4
+        assert cache.coverage("btc_usdt", "1min") == [[start, end]]
+
+        # a second run is served from disk
+        calls = len(server.starts)
+        again = downloader.load("btc_usdt", "1min", start, end)
+        pd.testing.assert_frame_equal(again, df)
+        assert len(server.starts) == calls
+
+        # extending the range asks only for the new day
+        longer = downloader.load("btc_usdt", "1min", start, end + DAY)
+        assert len(longer) == 3 * 1440
+        assert len(server.starts) == calls + 2
+        assert min(server.starts[calls:]) * 1000 > end
+        pd.testing.assert_frame_equal(longer.iloc[:len(df)], df)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_cache_merge_keeps_newest_candle(tmp_path):
+    cache = KlineCache(str(tmp_path))
+    ts = np.array([0, 60_000, 120_000])
+    cache.write("eth_usdt", "1min", {"timestamp": ts, "open_price": [1.0] * 3, "high_price": [1.0] * 3,
+                                     "low_price": [1.0] * 3, "close_price": [1.0, 2.0, 3.0],
+                                     "volume": [1.0] * 3}, 0, 120_000)
+    cache.write("eth_usdt", "1min", {"timestamp": ts[1:] + 60_000, "open_price": [1.0] * 2,
+                                     "high_price": [1.0] * 2, "low_price": [1.0] * 2,
+                                     "close_price": [9.0, 4.0], "volume": [1.0] * 2}, 120_000, 180_000)
+    arrays = cache.read("eth_usdt", "1min")
+    assert list(arrays["timestamp"]) == [0, 60_000, 120_000, 180_000]
+    assert list(arrays["close_price"]) == [1.0, 2.0, 9.0, 4.0]
+    assert cache.coverage("eth_usdt", "1min") == [[0, 180_000]]
+    assert cache.missing("eth_usdt", "1min", 0, 300_000) == [(240_000, 300_000)]
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_downloads_pages_once_and_then_only_missing_ranges(pathlib.Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cache_merge_keeps_newest_candle(pathlib.Path(tmp))
+    print("✅ kline downloader tests passed")
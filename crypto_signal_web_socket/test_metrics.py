@@ -0,0 +1,54 @@
+import numpy as np
+from my_modules.metrics import MetricsAccumulator, batch_metrics, calculate_metrics, pad_returns
+
+
+def same(a, b):
+    assert a.keys() == b.keys()
+    for name in a:
+        assert a[name] == b[name] or (np.isnan(a[name]) and np.isnan(b[name])), (name, a[name], b[name])
+
+
+def test_accumulator_matches_calculate_metrics_after_every_trade():
+    rng = np.random.default_rng(7)
+    returns = rng.normal(0.001, 0.02, 400)
+    returns[rng.random(400) < 0.05] = 0.0  # flat trades count as losses
+    log = [{"symbol": "btc_usdt", "return": r} for r in returns]
+    acc = MetricsAccumulator()
+    assert acc.snapshot() == calculate_metrics([]) == {}
+    for n, trade in enumerate(log, 1):
+        acc.update(trade)
+        if n in (1, 2, 3, 50, 400):
+            same(acc.snapshot(), calculate_metrics(log[:n]))
+
+
+def test_accumulator_edge_cases():
+    for returns in ([0.01, 0.02], [-0.01, -0.03, 0.0], [0.05], [-0.5, 0.2, -0.9, 1.5]):
+        acc = MetricsAccumulator(risk_free_rate=0.03)
+        acc.extend(returns)
+        same(acc.snapshot(), calculate_metrics([{"return": r} for r in returns], risk_free_rate=0.03))
+
+
+def test_batch_metrics_match_calculate_metrics_per_series():
+    rng = np.random.default_rng(11)
+    series = [rng.normal(0.0005, 0.03, n) for n in rng.integers(0, 120, 300)]
+    series += [[], [0.05], [-0.02, 0.0, 0.0]]
+    returns, mask = pad_returns(series)
+    out = batch_metrics(returns, mask)
+    for k, s in enumerate(series):
+        expected = calculate_metrics([{"return": r} for r in s])
+        if not expected:
+            assert out["Total Trades"][k] == 0 and np.isnan(out["Sharpe Ratio"][k])
+            continue
+        same({name: out[name][k] for name in expected}, expected)
+
+    # padding may sit anywhere, e.g. before the first trade
+    shifted = batch_metrics(np.c_[np.full(len(series), -0.5), returns], np.c_[np.zeros(len(series), bool), mask])
+    for name in out:
+        np.testing.assert_array_equal(shifted[name], out[name])
+
+
+if __name__ == "__main__":
+    test_accumulator_matches_calculate_metrics_after_every_trade()
+    test_accumulator_edge_cases()
+    test_batch_metrics_match_calculate_metrics_per_series()
+    print("✅ metrics tests passed")
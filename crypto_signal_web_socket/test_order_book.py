@@ -0,0 +1,85 @@
+import json
+import random
+from my_modules.order_book import OrderBook, OrderBookManager
+from my_modules.strategy import IchimokuDayStrategy
+from my_modules.ws_router import ChannelRouter
+
+# depth pushes as received from wss://www.lbkex.net/ws/V2/ (trimmed to 5 levels)
+RECORDED = [
+    '{"depth":{"asks":[[2410.52,1.2031],[2410.63,0.5],[2410.8,3.1127],[2411.02,0.9],[2411.35,7.4]],"bids":[[2410.31,2.5004],[2410.2,0.75],[2410.07,4.0],[2409.88,1.1],[2409.5,12.0]]},"count":5,"type":"depth","pair":"eth_usdt","SERVER":"V2","TS":"2025-06-21T17:46:35.433"}',
+    '{"depth":{"asks":[[2410.52,0.4031],[2410.63,0.5],[2410.8,3.1127],[2411.02,0.9],[2411.35,7.4]],"bids":[[2410.31,2.5004],[2410.2,0.75],[2410.07,4.0],[2409.88,1.1],[2409.5,12.0]]},"count":5,"type":"depth","pair":"eth_usdt","SERVER":"V2","TS":"2025-06-21T17:46:35.641"}',
+    '{"depth":{"asks":[[2410.45,0.25],[2410.52,0.4031],[2410.63,0.5],[2410.8,3.1127],[2411.02,0.9]],"bids":[[2410.31,3.0],[2410.2,0.75],[2410.07,4.0],[2409.88,1.1],[2409.5,12.0]]},"count":5,"type":"depth","pair":"eth_usdt","SERVER":"V2","TS":"2025-06-21T17:46:35.852"}',
+    '{"depth":{"asks":[[2410.63,0.5],[2410.8,3.1127],[2411.02,0.9],[2411.35,7.4],[2411.6,2.0]],"bids":[[2410.6,0.8],[2410.31,3.0],[2410.2,0.75],[2410.07,4.0],[2409.88,1.1]]},"count":5,"type":"depth","pair":"eth_usdt","SERVER":"V2","TS":"2025-06-21T17:46:36.060"}',
+    '{"depth":{"asks":[[104860.0,0.12],[104861.5,0.4]],"bids":[[104856.51,0.9],[104850.0,2.0]]},"count":2,"type":"depth","pair":"btc_usdt","SERVER":"V2","TS":"2025-06-21T17:46:36.101"}',
+]
+
+
+def expected(bids, asks, top_n):
+    bids = sorted(bids, key=lambda level: -level[0])[:top_n]
+    asks = sorted(asks)[:top_n]
+    bid_volume = sum(q for _, q in bids)
+    ask_volume = sum(q for _, q in asks)
+    (bid, bid_size), (ask, ask_size) = bids[0], asks[0]
+    return {
+        "best_bid": bid, "best_ask": ask,
+        "bid_volume": bid_volume, "ask_volume": ask_volume,
+        "imbalance": (bid_volume - ask_volume) / (bid_volume + ask_volume),
+        "microprice": (bid * ask_size + ask * bid_size) / (bid_size + ask_size)
+    }
+
+
+def assert_matches(book, bids, asks):
+    bids, asks = [tuple(level) for level in bids], [tuple(level) for level in asks]
+    want = expected(bids, asks, book.top_n)
+    got = book.snapshot()
+    for key, value in want.items():
+        assert abs(got[key] - value) < 1e-9, (key, got[key], value)
+    assert book.bids.levels() == sorted(bids, key=lambda level: -level[0])
+    assert book.asks.levels() == sorted(asks)
+
+
+def test_replay_recorded_depth():
+    books = OrderBookManager(top_n=3)
+    router = ChannelRouter()
+    router.register_pairs("depth", ["eth_usdt", "btc_usdt"], books.on_depth)
+    for raw in RECORDED:
+        data = json.loads(raw)
+        router.dispatch(data)
+        book = books.get(data["pair"])
+        assert_matches(book, data["depth"]["bids"], data["depth"]["asks"])
+        assert book.timestamp == data["TS"]
+    assert books.get("eth_usdt").updates == 4
+    assert books.get("eth_usdt").best_bid == 2410.6
+
+
+def test_random_deltas_match_rebuild():
+    rng = random.Random(5)
+    book = OrderBook("btc_usdt", top_n=5)
+    bids, asks = {}, {}
+    for _ in range(2000):
+        side, levels = rng.choice([("bid", bids), ("ask", asks)])
+        price = round(100 - rng.randint(1, 40) * 0.5 if side == "bid" else 100 + rng.randint(1, 40) * 0.5, 2)
+        size = rng.choice([0.0, round(rng.uniform(0.1, 5), 3)])
+        if size:
+            levels[price] = size
+        else:
+            levels.pop(price, None)
+        book.apply_updates(**{side + "s": [(price, size)]})
+        if bids and asks:
+            assert_matches(book, list(bids.items()), list(asks.items()))
+
+
+def test_confirm_orderbook():
+    book = OrderBook("eth_usdt")
+    assert IchimokuDayStrategy.confirm_orderbook("Buy", book) == "Buy"  # no depth yet
+    book.apply_snapshot(bids=[[10.0, 5.0]], asks=[[10.1, 1.0]])
+    assert IchimokuDayStrategy.confirm_orderbook("Buy", book) == "Buy"
+    assert IchimokuDayStrategy.confirm_orderbook("Sell", book) == "WaitBook"
+    assert IchimokuDayStrategy.confirm_orderbook("WaitLTF", book) == "WaitLTF"
+
+
+if __name__ == "__main__":
+    test_replay_recorded_depth()
+    test_random_deltas_match_rebuild()
+    test_confirm_orderbook()
+    print("✅ order book tests passed")
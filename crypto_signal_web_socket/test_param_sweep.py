@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+from my_modules import param_sweep
+from my_modules.backtest_engine import pair_signals, simulate_trades
+from my_modules.metrics import calculate_metrics
+from my_modules.param_sweep import grid_search, random_search, run_sweep, run_chunk
+from my_modules.shared_history import SharedHistory
+from my_modules.strategy import TradePlanner
+from my_modules.timeframe_alignment import TIMEFRAME_ROLES, resample_timeframes
+from candle_fixtures import make_minutes
+
+COSTS = {"slippage_pct": 0.001, "commission_pct": 0.001}
+
+
+def direct_trades(pair, candles, params):
+    # the same backtest without shared memory or memoization
+    base, signals, sl_distance = pair_signals(candles, params)
+    planner = TradePlanner(equity=1.0, rr_ratio=params["rr_ratio"])
+    return simulate_trades(pair, base, signals, sl_distance, planner, halt_on_drawdown=False, **COSTS)
+
+
+def test_sweep_matches_direct_backtest_in_parallel():
+    candles = {f"p{i}_usdt": resample_timeframes(make_minutes(30 * 1440, i)) for i in range(2)}
+    param_sets = grid_search({"tenkan": [7, 9], "rsi_buy_below": [40, 101], "rsi_sell_above": [-1], "rr_ratio": [1.0, 2.0]})
+    inline = run_sweep(candles, param_sets, workers=0, verbose=False)
+    parallel = run_sweep(candles, param_sets, workers=2, verbose=False)
+    pd.testing.assert_frame_equal(inline, parallel)
+
+    sharpe = inline["Sharpe Ratio"].dropna().to_numpy()
+    assert (np.diff(sharpe) <= 0).all() and list(inline["rank"]) == list(range(1, len(param_sets) + 1))
+    assert inline["Total Trades"].max() > 0
+
+    for params in param_sets:
+        log = sorted((trade for pair in candles for trade in direct_trades(pair, candles[pair], params)),
+                     key=lambda trade: (trade["timestamp"], trade["symbol"]))
+        row = inline.loc[(inline[list(params)] == pd.Series(params)).all(axis=1)].iloc[0]
+        for name, value in (calculate_metrics(log) or {"Total Trades": 0}).items():
+            assert row[name] == value or (np.isnan(row[name]) and np.isnan(value)), (params, name)
+
+
+def test_indicators_are_memoized_across_parameter_sets():
+    candles = resample_timeframes(make_minutes(3 * 1440, 0))
+    history = SharedHistory({("btc_usdt", tf): df for tf, df in candles.items()})
+    try:
+        param_sweep.use_history(history)
+        # only thresholds and trade planning differ: one set of indicator columns
+        jobs = list(enumerate(grid_search({"rsi_buy_below": [40, 60, 101], "rr_ratio": [1.5, 3.0]})))
+        run_chunk("btc_usdt", jobs, COSTS)
+        assert param_sweep._aligned.cache_info().misses == 1
+        assert param_sweep.cached_indicator.cache_info().misses == 3 * len(TIMEFRAME_ROLES) + 1  # + keltner
+
+        frame = history.frame("btc_usdt", "15min")
+        pd.testing.assert_frame_equal(frame, candles["15min"], check_freq=False, check_index_type=False)
+        attached = SharedHistory.attach(history.spec())
+        try:
+            attached.prices[0, 0] = 1.0
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("workers must see the history read-only")
+        attached.close()
+    finally:
+        param_sweep.use_history(None)
+        history.close()
+
+
+def test_random_search_is_distinct_and_reproducible():
+    sets = random_search(n=50, seed=4)
+    assert len(sets) == 50 and sets == random_search(n=50, seed=4)
+    assert len({tuple(sorted(p.items())) for p in sets}) == 50
+    assert all(p["tenkan"] < p["kijun"] < p["senkou"] for p in sets)
+
+
+if __name__ == "__main__":
+    test_sweep_matches_direct_backtest_in_parallel()
+    test_indicators_are_memoized_across_parameter_sets()
+    test_random_search_is_distinct_and_reproducible()
+    print("✅ parameter sweep tests passed")
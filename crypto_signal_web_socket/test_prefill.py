@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from my_modules.candle_archive import CandleArchive
+from my_modules.prefill import PrefillPipeline
+from my_modules.real_time_multi_df_handler import MultiTimeframeHandler
+
+REST_MAP = {"1min": "minute1", "5min": "minute5", "15min": "minute15", "1h": "hour1", "4h": "hour4"}
+
+
+class StubKlineServer(ThreadingHTTPServer):
+    """Local stand-in for /v2/kline.do that fails the first call per key once."""
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubKlineHandler)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.seen = set()
+        self.calls = 0
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v2/kline.do"
+
+
+class StubKlineHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)
+        key = (query["symbol"][0], query["type"][0])
+        with server.lock:
+            server.calls += 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            first = key not in server.seen
+            server.seen.add(key)
+        time.sleep(0.02)
+        with server.lock:
+            server.in_flight -= 1
+
+        if first and key[0] == "eth_usdt":
+            self.send_response(503)
+            self.end_headers()
+            return
+        size = int(query["size"][0])
+        start = int(query["time"][0])
+        rows = [[start + i * 60, 1.0, 2.0, 0.5, 1.5, 10.0] for i in range(size)]
+        body = json.dumps({"result": True, "data": rows}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def test_prefill_fills_every_pair_concurrently_with_retries():
+    server = StubKlineServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        symbols = ["btc_usdt", "eth_usdt", "xrp_usdt", "sol_usdt"]
+        pipeline = PrefillPipeline(REST_MAP, base_url=server.url, max_concurrency=4,
+                                   rate_per_sec=200, retries=2, backoff=0.01)
+        results = pipeline.run(symbols, list(REST_MAP), size=50)
+    finally:
+        server.shutdown()
+
+    assert len(results) == len(symbols) * len(REST_MAP)
+    assert all(df is not None and len(df) == 50 for df in results.values())
+    # every eth_usdt timeframe failed once and was retried
+    assert server.calls == len(results) + len(REST_MAP)
+    assert 1 < server.max_in_flight <= 4
+
+    summary = pipeline.report()
+    assert summary["requests"] == server.calls
+    assert summary["failed"] == len(REST_MAP)
+    assert summary["p50_ms"] > 0
+
+
+def test_prefill_many_loads_indicator_frames(tmp_path):
+    server = StubKlineServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    archive = CandleArchive(str(tmp_path))
+    try:
+        handlers = MultiTimeframeHandler.prefill_many(["btc_usdt", "xrp_usdt"], list(REST_MAP), REST_MAP, size=60,
+                                                      archive=archive, base_url=server.url, rate_per_sec=200,
+                                                      backoff=0.01)
+    finally:
+        server.shutdown()
+
+    for handler in handlers.values():
+        for tf in REST_MAP:
+            df = handler.get_df(tf)
+            assert len(df) == 60
+            assert {"close_price", "rsi", "macd", "boll_upper", "keltner_upper", "tenkan_sen",
+                    "patterns_result"} <= set(df.columns)
+            assert (df["close_price"] == 1.5).all()
+    assert handlers["btc_usdt"].get_multi_df()["TTF"] is handlers["btc_usdt"].get_df("15min")
+    # closed REST candles went to the archive in its ms / *_price layout
+    archived = archive.read("xrp_usdt", "1min")
+    assert len(archived["timestamp"]) > 0 and (archived["close_price"] == 1.5).all()
+    assert archived["timestamp"][0] == handlers["xrp_usdt"].get_df("1min")["timestamp"].iloc[0] * 1000
+
+    # a live candle is appended with the same column names
+    handler = handlers["btc_usdt"]
+    last = handler.get_df("1min")["timestamp"].iloc[-1]
+    handler.update_candle("1min", {"timestamp": last + 60, "open": 1.5, "high": 3.0, "low": 1.0, "close": 2.5,
+                                   "volume": 4.0})
+    df = handler.get_df("1min")
+    assert len(df) == 61 and df["close_price"].iloc[-1] == 2.5 and not df["close_price"].isna().any()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_prefill_fills_every_pair_concurrently_with_retries()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_prefill_many_loads_indicator_frames(pathlib.Path(tmp))
+    print("✅ Prefill pipeline OK")
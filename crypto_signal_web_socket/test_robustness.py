@@ -0,0 +1,76 @@
+import tracemalloc
+import numpy as np
+import pandas as pd
+from my_modules.dashboard_generator import generate_dashboard
+from my_modules.metrics import batch_metrics, calculate_metrics
+from my_modules.robustness import block_bootstrap_paths, path_stats, robustness_report, shuffle_paths
+
+
+def test_resampled_paths():
+    returns = np.random.default_rng(1).normal(0.001, 0.02, 50)
+    shuffled = shuffle_paths(returns, n=100, seed=3)
+    assert shuffled.shape == (100, 50)
+    assert (np.sort(shuffled, axis=1) == np.sort(returns)).all()
+    np.testing.assert_array_equal(shuffled, shuffle_paths(returns, n=100, seed=3))
+
+    paths = block_bootstrap_paths(returns, n=100, block=5, seed=3)
+    assert paths.shape == (100, 50)
+    # every path is made of runs of 5 consecutive (circular) trades
+    position = {value: k for k, value in enumerate(returns)}
+    rows = np.vectorize(position.get)(paths)
+    runs = rows.reshape(100, 10, 5)
+    assert ((np.diff(runs, axis=2) % 50) == 1).all()
+
+
+def test_report_bands_and_stats_page(tmp_path):
+    rng = np.random.default_rng(2)
+    log = [{"timestamp": str(t), "price": 100.0, "signal": "Buy", "return": r}
+           for t, r in zip(pd.date_range("2025-01-01", periods=300, freq="h"), rng.normal(0.002, 0.02, 300))]
+    report = robustness_report([t["return"] for t in log], n=500)
+    assert list(report["Method"].unique()) == ["shuffle", "block bootstrap"]
+    assert (report["P5"] <= report["P50"]).all() and (report["P50"] <= report["P95"]).all()
+    actual = report.set_index(["Method", "Metric"])["Backtest"]
+    stats = calculate_metrics(log)
+    assert round(actual["shuffle", "Sharpe Ratio"], 3) == stats["Sharpe Ratio"]
+    assert round(actual["shuffle", "Max Drawdown"], 2) == stats["Max Drawdown"]
+    # reordering never changes the compounded result
+    shuffle = report.set_index(["Method", "Metric"]).loc[("shuffle", "Final Equity")]
+    assert shuffle["P5"] == shuffle["P95"] == shuffle["Backtest"]
+
+    generate_dashboard(log, output_html=str(tmp_path / "report.html"), robustness=report)
+    assert "block bootstrap" in (tmp_path / "report_stats.html").read_text()
+
+
+def test_path_stats_match_batch_metrics():
+    paths = np.random.default_rng(4).normal(0.001, 0.02, (40, 300))
+    stats, metrics = path_stats(paths), batch_metrics(paths, rounded=False)
+    np.testing.assert_allclose(stats["Max Drawdown"], metrics["Max Drawdown"])
+    np.testing.assert_allclose(stats["Sharpe Ratio"], metrics["Sharpe Ratio"])
+    np.testing.assert_allclose(stats["Final Equity"], np.prod(1 + paths, axis=1))
+
+
+def test_large_log_is_scored_in_batches():
+    returns = np.random.default_rng(5).normal(0.001, 0.02, 20_000)
+    # the batch size changes neither the paths nor the bands
+    pd.testing.assert_frame_equal(robustness_report(returns[:2000], n=300, batch_cells=50_000),
+                                  robustness_report(returns[:2000], n=300))
+    tracemalloc.start()
+    try:
+        report = robustness_report(returns, n=500)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # one unbatched [500, 20000] path matrix alone would be 80 MB
+    assert peak < 64e6, peak
+    assert len(report) == 6 and report[["P5", "P50", "P95"]].notna().all().all()
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    test_resampled_paths()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_report_bands_and_stats_page(pathlib.Path(tmp))
+    test_path_stats_match_batch_metrics()
+    test_large_log_is_scored_in_batches()
+    print("✅ robustness tests passed")
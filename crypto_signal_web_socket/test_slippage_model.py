@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from my_modules.backtest_engine import simulate_trades
+from my_modules.slippage_model import apply_slippage_and_commission, book_liquidity, candle_liquidity, \
+    fill_slippage, market_impact, trade_costs
+from my_modules.strategy import TradePlanner
+from candle_fixtures import make_minutes
+
+
+def test_trade_costs_match_the_scalar_model():
+    rng = np.random.default_rng(0)
+    entry = rng.uniform(90, 110, 1000)
+    exit_price = entry * rng.uniform(0.97, 1.03, 1000)
+    sign = rng.choice([-1.0, 1.0], 1000)
+    costs = trade_costs(entry, exit_price, sign, 0.002, 0.002, {"maker": 0.001, "taker": 0.001})
+    for k in range(0, 1000, 37):
+        expected = apply_slippage_and_commission(entry[k], exit_price[k], 0.002, 0.001,
+                                                 "long" if sign[k] > 0 else "short")
+        for name, value in expected.items():
+            assert np.isclose(costs[name][k], value, rtol=1e-12), name
+
+    # a maker exit only changes the exit fee
+    maker = trade_costs(entry, exit_price, sign, 0.002, 0.002, {"maker": -0.0002, "taker": 0.001}, exit_maker=True)
+    assert np.allclose(maker["net_return"] - costs["net_return"], 0.0012)
+
+
+def test_bigger_fills_on_thinner_books_cost_more():
+    slippage = market_impact(size=[1, 10, 10], volume=[100, 100, 10], volatility=0.002, spread_pct=0.0004)
+    assert slippage[0] < slippage[1] < slippage[2]
+    assert np.isclose(slippage[0], 0.0002 + 0.002 * np.sqrt(0.01))
+    assert market_impact(5, 0, 0.002) == 0.05  # no liquidity at all
+
+    candles = make_minutes(300, 0)
+    snapshots = [{"timestamp": int(candles.index[100].value // 10**6), "mid": 100.0, "spread": 0.1,
+                  "bid_volume": 50.0, "ask_volume": 2.0}]
+    liquidity = book_liquidity(snapshots, candles)
+    assert (liquidity["ask_volume"][:100] == candle_liquidity(candles)["volume"][:100]).all()
+    assert (liquidity["ask_volume"][100:] == 2.0).all() and (liquidity["spread_pct"][100:] == 0.001).all()
+    rows = np.array([150, 150])
+    buy, sell = fill_slippage(liquidity, rows, 1.0, np.array([True, False]))
+    assert buy > sell  # buys walk the thin ask side
+
+
+def test_simulated_trades_pay_size_dependent_costs():
+    candles = make_minutes(5_000, 1)
+    rng = np.random.default_rng(3)
+    signals = rng.choice(["None", "Buy", "Sell"], len(candles), p=[0.98, 0.01, 0.01])
+    distance = np.full(len(candles), 0.3)
+    fixed = simulate_trades("btc_usdt", candles, signals, distance, TradePlanner(10_000), halt_on_drawdown=False)
+    liquidity = candle_liquidity(candles)
+    small = simulate_trades("btc_usdt", candles, signals, distance, TradePlanner(1_000), halt_on_drawdown=False,
+                            liquidity=liquidity)
+    large = simulate_trades("btc_usdt", candles, signals, distance, TradePlanner(100_000), halt_on_drawdown=False,
+                            liquidity=liquidity)
+    assert len(fixed) == len(small) == len(large) > 10
+    # the same trades, only the costs differ
+    assert [t["exit_price"] for t in fixed] == [t["exit_price"] for t in large]
+    assert all(b["return"] < a["return"] for a, b in zip(small, large))
+
+
+if __name__ == "__main__":
+    test_trade_costs_match_the_scalar_model()
+    test_bigger_fills_on_thinner_books_cost_more()
+    test_simulated_trades_pay_size_dependent_costs()
+    print("✅ slippage model tests passed")
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+from my_modules.indicator import IndicatorCalculator
+from my_modules.strategy import IchimokuDayStrategy
+
+ROLES = ['HHT', 'HTF', 'TTF', 'LTF', 'LLT']
+
+
+def make_frame(index, seed):
+    rng = np.random.default_rng(seed)
+    n = len(index)
+    # trending regimes so every gate of the strategy opens somewhere
+    drift = np.repeat(rng.choice([-0.004, 0.004], n // 40 + 1), 40)[:n]
+    close = 100 * np.exp(np.cumsum(drift + rng.normal(0, 0.006, n)))
+    open_ = np.r_[close[0], close[:-1]] * (1 + rng.normal(0, 0.002, n))
+    df = pd.DataFrame({
+        "open_price": open_,
+        "high_price": np.maximum(open_, close) * (1 + rng.exponential(0.002, n)),
+        "low_price": np.minimum(open_, close) * (1 - rng.exponential(0.002, n)),
+        "close_price": close,
+        "volume": rng.uniform(1, 10, n)
+    }, index=index)
+    return IndicatorCalculator(df).calculate_rsi().calculate_ichimoku().detect_candlestick_patterns().get_df()
+
+
+def make_multi_df(n=600, seed=11):
+    index = pd.date_range("2025-01-01", periods=n, freq="min", name="timestamp")
+    return {role: make_frame(index, seed + i) for i, role in enumerate(ROLES)}
+
+
+def random_columns(index, seed):
+    # raw indicator columns (with NaN warm-up) so that every gate opens often
+    rng = np.random.default_rng(seed)
+    n = len(index)
+    df = pd.DataFrame({
+        column: rng.normal(100, 1, n)
+        for column in ("senkou_span_a", "senkou_span_b", "chikou_reference", "close_price", "tenkan_sen", "kijun_sen")
+    }, index=index)
+    df["rsi"] = rng.uniform(20, 80, n)
+    df["patterns_result"] = rng.choice(["Bullish", "Bearish", "Neutral"], n, p=[0.45, 0.45, 0.1])
+    df.iloc[:5, :6] = np.nan
+    return df
+
+
+def assert_matches_per_bar(multi_df):
+    strat = IchimokuDayStrategy(multi_df)
+    buy = strat.generate_signals()
+    sell = strat.generate_signals_sell()
+
+    for i in range(len(buy)):
+        per_bar = IchimokuDayStrategy({role: df.iloc[:i + 1] for role, df in multi_df.items()})
+        assert buy.iloc[i] == per_bar.generate_signal(), i
+        assert sell.iloc[i] == per_bar.generate_signal_sell(), i
+
+    assert buy.iloc[-1] == strat.generate_signal()
+    assert sell.iloc[-1] == strat.generate_signal_sell()
+    return buy, sell
+
+
+def test_vectorized_labels_match_per_bar_evaluation():
+    buy, sell = assert_matches_per_bar(make_multi_df())
+    assert len(set(buy)) >= 3 and len(set(sell)) >= 3
+
+
+def test_every_gate_matches_per_bar_evaluation():
+    index = pd.date_range("2025-01-01", periods=3000, freq="min", name="timestamp")
+    buy, sell = assert_matches_per_bar({role: random_columns(index, 100 + i) for i, role in enumerate(ROLES)})
+    assert set(buy) == {"NoTrend", "WeakTrend", "WeakSignal", "WaitLTF", "WaitLLT", "Buy"}
+    assert set(sell) == {"NoTrend", "WeakTrend", "WeakSignal", "WaitLTF", "WaitLLT", "Sell"}
+
+
+def test_missing_timeframe_and_misaligned_index():
+    multi_df = make_multi_df(n=120)
+    multi_df['LLT'] = None
+    labels = IchimokuDayStrategy(multi_df).generate_signals()
+    assert not (labels == "Buy").any()
+
+    multi_df['LTF'] = multi_df['LTF'].iloc[1:]
+    try:
+        IchimokuDayStrategy(multi_df).generate_signals()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("misaligned frames must be rejected")
+
+
+if __name__ == "__main__":
+    test_vectorized_labels_match_per_bar_evaluation()
+    test_every_gate_matches_per_bar_evaluation()
+    test_missing_timeframe_and_misaligned_index()
+    print("✅ vectorized strategy tests passed")
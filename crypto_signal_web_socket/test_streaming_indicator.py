@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from my_modules.indicator import IndicatorCalculator
+from my_modules.streaming_indicator import StreamingIndicatorCalculator
+
+NUMERIC_COLUMNS = [
+    "rsi", "macd", "macd_signal", "macd_hist",
+    "boll_sma", "boll_std", "boll_upper", "boll_lower",
+    "ema", "tr", "atr", "keltner_upper", "keltner_lower",
+    "tenkan_sen", "kijun_sen", "senkou_span_a", "senkou_span_b", "chikou_reference",
+    "body", "range", "upper_shadow", "lower_shadow"
+]
+FLAG_COLUMNS = [
+    "bullish_candle", "bearish_candle", "doji", "hammer", "inv_hammer",
+    "bullish_engulfing", "bearish_engulfing", "patterns_result"
+]
+
+
+def make_candles(n=400, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 30000 + np.cumsum(rng.normal(0, 40, n))
+    open_ = np.r_[close[0], close[:-1]] + rng.normal(0, 5, n)
+    high = np.maximum(open_, close) + rng.exponential(20, n)
+    low = np.minimum(open_, close) - rng.exponential(20, n)
+    return pd.DataFrame({
+        "timestamp": np.arange(n, dtype=np.int64) * 60_000,
+        "open_price": open_, "high_price": high, "low_price": low,
+        "close_price": close, "volume": rng.uniform(1, 10, n)
+    })
+
+
+def batch_indicators(df):
+    return IndicatorCalculator(df) \
+        .calculate_rsi() \
+        .calculate_macd() \
+        .calculate_bollinger() \
+        .calculate_keltner() \
+        .calculate_ichimoku() \
+        .detect_candlestick_patterns() \
+        .get_df()
+
+
+def test_streaming_matches_batch_on_every_bar():
+    df = make_candles()
+    expected = batch_indicators(df)
+    calc = StreamingIndicatorCalculator()
+
+    for i, row in enumerate(df.to_dict("records")):
+        values = calc.update(row)
+        for col in NUMERIC_COLUMNS:
+            np.testing.assert_allclose(values[col], expected[col].iloc[i], rtol=1e-8, atol=1e-8,
+                                       err_msg=f"{col} @ bar {i}")
+        for col in FLAG_COLUMNS:
+            assert values[col] == expected[col].iloc[i], f"{col} @ bar {i}"
+
+
+def test_forming_candle_revisions_do_not_leak_into_state():
+    df = make_candles(150)
+    expected = batch_indicators(df)
+    calc = StreamingIndicatorCalculator()
+
+    for row in df.to_dict("records"):
+        # the exchange repeats the forming candle with intermediate prices first
+        partial = dict(row, close_price=row["open_price"], high_price=row["high_price"] * 1.01)
+        calc.update(partial)
+        values = calc.update(row)
+
+    for col in NUMERIC_COLUMNS:
+        np.testing.assert_allclose(values[col], expected[col].iloc[-1], rtol=1e-8, atol=1e-8)
+    assert calc.bars == len(df) - 1
+
+
+if __name__ == "__main__":
+    test_streaming_matches_batch_on_every_bar()
+    test_forming_candle_revisions_do_not_leak_into_state()
+    print("✅ Streaming indicators match the batch calculator")
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from my_modules.indicator import IndicatorCalculator
+from my_modules.strategy import IchimokuDayStrategy
+from my_modules.timeframe_alignment import TIMEFRAME_ROLES, align_timeframes, closed_bars, split_aligned, open_ms
+from candle_fixtures import make_minutes
+
+START = "2025-03-01 00:07"  # mid-bucket, so every timeframe starts with a partial bar
+AGG = {"open_price": "first", "high_price": "max", "low_price": "min", "close_price": "last", "volume": "sum"}
+
+
+def with_indicators(df):
+    return IndicatorCalculator(df).calculate_rsi().calculate_ichimoku().detect_candlestick_patterns().get_df()
+
+
+def timeframes(minutes):
+    # bars labelled by their open time, like the exchange and the aggregator
+    return {role: with_indicators(minutes.resample(tf, label="left", closed="left").agg(AGG).dropna())
+            for role, tf in TIMEFRAME_ROLES.items()}
+
+
+def test_projected_bars_were_closed_and_latest():
+    minutes = make_minutes(3 * 24 * 60, 4, start=START)
+    frames = timeframes(minutes)
+    wide = align_timeframes(frames)
+    base_close = wide.index + pd.Timedelta(minutes=1)
+    for role, tf in TIMEFRAME_ROLES.items():
+        step = pd.Timedelta(tf)
+        bar_time = wide[f"{role}_bar_time"]
+        known = bar_time.notna()
+        assert (bar_time[known] + step <= base_close[known]).all()
+        # the next bar of that timeframe had not closed yet
+        assert (bar_time[known] + 2 * step > base_close[known]).all()
+        assert wide[f"{role}_chikou_span"].isna().all()
+    assert (wide["LLT_close_price"] == minutes["close_price"]).all()
+    assert wide.index.equals(minutes.index)
+
+
+def test_no_lookahead_against_recomputed_history():
+    minutes = make_minutes(3 * 24 * 60, 4, start=START)
+    wide = align_timeframes(timeframes(minutes))
+    strat = IchimokuDayStrategy(split_aligned(wide))
+    labels = strat.generate_signals()
+    # a TTF crossover holds for every 1min row of the 15min bar that made it
+    crosses = {name: strat._check(name, 'TTF', len(wide)) for name in ('cross_up', 'cross_down')}
+    cross_rows = np.flatnonzero(crosses['cross_up'] | crosses['cross_down'])
+    assert len(cross_rows) >= 15 and len(cross_rows) % 15 == 0
+    rng = np.random.default_rng(0)
+    rows = np.r_[rng.choice(np.arange(300, len(minutes)), 25, replace=False), rng.choice(cross_rows, 10, replace=False)]
+    for row in sorted(rows):
+        # what a live bot had at the close of this minute: closed bars only
+        as_of = int(open_ms(minutes.index[row:row + 1])[0]) + 60_000
+        live = {role: closed_bars(df, TIMEFRAME_ROLES[role], as_of)
+                for role, df in timeframes(minutes.iloc[:row + 1]).items()}
+        for role, df in live.items():
+            last = df.iloc[-1]
+            for column in ("close_price", "rsi", "tenkan_sen", "kijun_sen", "senkou_span_a", "senkou_span_b"):
+                a, b = wide[f"{role}_{column}"].iloc[row], last[column]
+                assert (np.isnan(a) and np.isnan(b)) or abs(a - b) < 1e-9, (row, role, column)
+            assert wide[f"{role}_patterns_result"].iloc[row] == last["patterns_result"]
+        live_strat = IchimokuDayStrategy(live)
+        assert labels.iloc[row] == live_strat.generate_signal(), row
+        assert crosses['cross_up'][row] == live_strat.is_tenkan_kijun_cross_up('TTF'), row
+        assert crosses['cross_down'][row] == live_strat.is_tenkan_kijun_cross_down('TTF'), row
+
+
+def test_closed_bars_drops_forming_candle():
+    frames = timeframes(make_minutes(600, 4, start=START))
+    h1 = frames["HTF"]
+    last_open = int(open_ms(h1.index)[-1])
+    assert len(closed_bars(h1, "1h", last_open + 3_600_000)) == len(h1)
+    assert len(closed_bars(h1, "1h", last_open + 3_599_999)) == len(h1) - 1
+
+
+if __name__ == "__main__":
+    test_projected_bars_were_closed_and_latest()
+    test_no_lookahead_against_recomputed_history()
+    test_closed_bars_drops_forming_candle()
+    print("✅ timeframe alignment tests passed")
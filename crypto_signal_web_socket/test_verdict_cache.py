@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+from my_modules.compute_pool import VerdictCache, evaluate_frames
+from my_modules.strategy import IchimokuDayStrategy
+from my_modules.timeframe_alignment import TIMEFRAME_ROLES
+from candle_fixtures import make_minutes
+
+AGG = {"open_price": "first", "high_price": "max", "low_price": "min", "close_price": "last", "volume": "sum"}
+
+
+def test_cached_verdicts_match_and_only_refresh_on_close():
+    minutes = make_minutes(32 * 240 + 200, 9, start="2025-03-01")
+    cache = VerdictCache()
+    # an hour around a 4h boundary
+    steps = range(32 * 240 - 30, 32 * 240 + 30)
+    closed_bars_seen = {role: set() for role in TIMEFRAME_ROLES}
+    full = {tf: minutes.resample(tf, label="left", closed="left").agg(AGG) for tf in TIMEFRAME_ROLES.values()}
+    for k in steps:
+        now = minutes.index[k]
+        # 200 bars like the live buffers; the forming bar holds later minutes
+        # here, which evaluate_frames must drop anyway
+        frames = {tf: df.loc[:now].iloc[-200:] for tf, df in full.items()}
+        assert evaluate_frames(frames, "btc_usdt", cache) == evaluate_frames(frames)
+        for role, tf in TIMEFRAME_ROLES.items():
+            closed_bars_seen[role].add(frames[tf].index[-2])
+
+    stats = cache.stats()
+    for role in TIMEFRAME_ROLES:
+        assert stats[role]["misses"] == len(closed_bars_seen[role]), role
+        assert stats[role]["hits"] + stats[role]["misses"] == len(steps)
+    assert stats["HHT"]["misses"] == 2 and stats["LLT"]["hits"] == 0
+
+
+def test_signal_from_verdicts_matches_strategy_chain():
+    rng = np.random.default_rng(3)
+    index = pd.date_range("2025-01-01", periods=40, freq="min")
+    for _ in range(300):
+        multi_df = {}
+        for role in TIMEFRAME_ROLES:
+            df = pd.DataFrame({c: rng.normal(100, 1, len(index)) for c in (
+                "senkou_span_a", "senkou_span_b", "chikou_reference", "close_price", "tenkan_sen", "kijun_sen")},
+                index=index)
+            df["rsi"] = rng.uniform(20, 80, len(index))
+            df["patterns_result"] = rng.choice(["Bullish", "Bearish", "Neutral"], len(index))
+            multi_df[role] = df
+        strat = IchimokuDayStrategy(multi_df)
+        expected = strat.generate_signal()
+        if expected != "Buy" and strat.generate_signal_sell() == "Sell":
+            expected = "Sell"
+        verdicts = {role: IchimokuDayStrategy({role: df}).role_verdicts(role) for role, df in multi_df.items()}
+        assert IchimokuDayStrategy.signal_from_verdicts(verdicts) == expected
+
+
+if __name__ == "__main__":
+    test_cached_verdicts_match_and_only_refresh_on_close()
+    test_signal_from_verdicts_matches_strategy_chain()
+    print("✅ verdict cache tests passed")
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from my_modules import param_sweep
+from my_modules.backtest_engine import DEFAULT_PARAMS, pair_signals, simulate_trades, strategy_frame, strategy_signals
+from my_modules.metrics import calculate_metrics
+from my_modules.param_sweep import grid_search
+from my_modules.shared_history import SharedHistory
+from my_modules.strategy import TradePlanner
+from my_modules.timeframe_alignment import TIMEFRAME_ROLES, align_timeframes, resample_timeframes
+from my_modules.walk_forward import run_walk_forward, walk_forward_windows, window_frame
+from candle_fixtures import make_minutes
+
+COSTS = {"slippage_pct": 0.001, "commission_pct": 0.001}
+
+
+def test_window_slices_match_the_full_history():
+    candles = resample_timeframes(make_minutes(12 * 1440, 0))
+    params = dict(DEFAULT_PARAMS, rsi_buy_below=101, rsi_sell_above=-1)
+    history = SharedHistory({("btc_usdt", tf): df for tf, df in candles.items()})
+    try:
+        param_sweep.use_history(history)
+        full = align_timeframes({role: strategy_frame(candles[tf], params) for role, tf in TIMEFRAME_ROLES.items()})
+        signals = strategy_signals(full, params)
+        for day in (1, 5, 9):
+            start, end = full.index[day * 1440], full.index[(day + 2) * 1440]
+            wide = window_frame("btc_usdt", params, start, end)
+            pd.testing.assert_frame_equal(wide, full.iloc[day * 1440:(day + 2) * 1440], check_freq=False,
+                                          check_index_type=False)
+            assert (strategy_signals(wide, params) == signals[day * 1440:(day + 2) * 1440]).all()
+        # every window sliced the same full-history columns
+        assert param_sweep.cached_indicator.cache_info().misses == 3 * len(TIMEFRAME_ROLES)
+    finally:
+        param_sweep.use_history(None)
+        history.close()
+
+
+def direct_window_trades(direct, pair, params, start, end):
+    # the full-history backtest path, cut to one window
+    base, signals, sl_distance = direct[pair, tuple(params.values())]
+    lo, hi = base.index.searchsorted([start, end])
+    planner = TradePlanner(equity=1.0, rr_ratio=params["rr_ratio"])
+    return simulate_trades(pair, base.iloc[lo:hi], signals[lo:hi], sl_distance[lo:hi], planner,
+                           halt_on_drawdown=False, **COSTS)
+
+
+def pooled(direct, pairs, params, start, end):
+    return sorted((trade for pair in pairs for trade in direct_window_trades(direct, pair, params, start, end)),
+                  key=lambda trade: (trade["timestamp"], trade["symbol"]))
+
+
+def test_walk_forward_picks_train_winners_and_stitches_test_trades():
+    candles = {f"p{i}_usdt": resample_timeframes(make_minutes(40 * 1440, i)) for i in range(2)}
+    param_sets = grid_search({"tenkan": [7, 9], "rsi_buy_below": [101], "rsi_sell_above": [-1], "rr_ratio": [1.0, 3.0]})
+    table, oos_log = run_walk_forward(candles, param_sets, train_days=16, test_days=8, workers=0, verbose=False)
+    parallel_table, parallel_log = run_walk_forward(candles, param_sets, train_days=16, test_days=8, workers=2,
+                                                    verbose=False)
+    pd.testing.assert_frame_equal(table.drop(columns="seconds"), parallel_table.drop(columns="seconds"))
+    assert oos_log == parallel_log
+
+    minutes = candles["p0_usdt"]["1min"].index
+    windows = walk_forward_windows(minutes[0], minutes[-1], 16, 8)
+    assert len(table) == len(windows) == 3
+    assert list(table["test_start"].iloc[1:]) == list(table["test_end"].iloc[:-1])
+    direct = {(pair, tuple(params.values())): pair_signals(candles[pair], params)
+              for pair in candles for params in param_sets}
+    stitched = []
+    for (train_start, test_start, test_end), (_, row) in zip(windows, table.iterrows()):
+        # best train Sharpe, then most trades, then the first parameter set
+        scores = []
+        for params in param_sets:
+            metrics = calculate_metrics(pooled(direct, candles, params, train_start, test_start))
+            sharpe = metrics.get("Sharpe Ratio", np.nan)
+            scores.append((-np.inf if np.isnan(sharpe) else sharpe, metrics.get("Total Trades", 0)))
+        best = param_sets[max(range(len(param_sets)), key=lambda k: (scores[k], -k))]
+        assert {name: row[name] for name in best} == best
+        stitched += pooled(direct, candles, best, test_start, test_end)
+        # the running out-of-sample metrics are those of the trades stitched so far
+        oos = calculate_metrics(stitched) or {"Total Trades": 0}
+        assert row["oos trades"] == oos["Total Trades"] == len(stitched)
+        for name in ("Sharpe Ratio", "Max Drawdown"):
+            value, expected = row[f"oos {name}"], oos.get(name, np.nan)
+            assert value == expected or (np.isnan(value) and np.isnan(expected)), name
+    assert oos_log == stitched and len(oos_log) > 0
+
+
+if __name__ == "__main__":
+    test_window_slices_match_the_full_history()
+    test_walk_forward_picks_train_winners_and_stitches_test_trades()
+    print("✅ walk-forward tests passed")
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import time
+from my_modules.ws_capture import FrameRecorder, FrameReplayer, read_frames
+
+T0 = 1_750_000_000_000_000_000
+
+
+def kbar(pair, close):
+    return json.dumps({"kbar": {"t": "2025-06-21T17:46:00.000", "o": close, "h": close, "l": close,
+                                "c": close, "v": 1.0, "slot": "1min"}, "type": "kbar", "pair": pair})
+
+
+def write_log(path):
+    # two sessions appended to the same log, 50 ms apart, with a server ping in between
+    recorder = FrameRecorder(path, flush_every=2)
+    recorder.record(kbar("btc_usdt", 1.0), T0)
+    recorder.record('{"action":"ping","ping":"abc"}'.encode(), T0 + 10_000_000)
+    recorder.close()
+    recorder = FrameRecorder(path)
+    recorder.record(kbar("eth_usdt", 2.0), T0 + 20_000_000)
+    recorder.record(kbar("btc_usdt", 3.0), T0 + 50_000_000)
+    recorder.close()
+
+
+def test_record_and_read_back(tmp_path):
+    path = tmp_path / "capture.log.gz"
+    write_log(path)
+    frames = list(read_frames(path))
+    assert [ts - T0 for ts, _ in frames] == [0, 10_000_000, 20_000_000, 50_000_000]
+    assert json.loads(frames[-1][1])["kbar"]["c"] == 3.0
+
+
+def test_truncated_log_keeps_flushed_frames(tmp_path):
+    path = tmp_path / "capture.log.gz"
+    recorder = FrameRecorder(path, flush_every=2)
+    for i in range(3):
+        recorder.record(kbar("btc_usdt", float(i)), T0 + i)
+    recorder._file.flush()
+    data = path.read_bytes()  # a killed process leaves a gzip member without trailer
+    recorder.close()
+    path.write_bytes(data[:-3])
+    frames = list(read_frames(path))
+    assert 0 < len(frames) <= 3
+
+
+def test_replay_max_and_paced(tmp_path):
+    path = tmp_path / "capture.log.gz"
+    write_log(path)
+
+    seen = []
+    replayer = FrameReplayer(path, seen.append, speed=0)
+    assert asyncio.run(replayer.run()) == 3
+    assert [(d["pair"], d["kbar"]["c"]) for d in seen] == [("btc_usdt", 1.0), ("eth_usdt", 2.0), ("btc_usdt", 3.0)]
+    report = replayer.report()
+    assert report["stages"]["dispatch"]["count"] == 3
+    assert report["stages"]["decode"]["count"] == 4
+
+    async def handler(data):
+        seen.append(data)
+
+    started = time.perf_counter()
+    assert asyncio.run(FrameReplayer(path, handler, speed=2).run()) == 3
+    assert time.perf_counter() - started >= 0.025  # 50 ms recorded at 2x
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    for test in (test_record_and_read_back, test_truncated_log_keeps_flushed_frames, test_replay_max_and_paced):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(pathlib.Path(tmp))
+    print("✅ ws capture tests passed")
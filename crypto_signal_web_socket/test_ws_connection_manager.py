@@ -0,0 +1,193 @@
+import asyncio
+import json
+import random
+import socket
+import time
+import websockets
+from my_modules import ws_connection_manager
+from my_modules.ws_connection_manager import (WebSocketConnectionManager, depth_subscription, kbar_subscription,
+                                              subscription_pair)
+
+PAIRS = ["btc_usdt", "eth_usdt", "sol_usdt", "xrp_usdt", "bnb_usdt"]
+
+
+def kbar_frame(pair):
+    return json.dumps({"kbar": {"t": "2025-06-21T17:46:00.000", "slot": "1min", "o": 1, "h": 2, "l": 0.5, "c": 1.5,
+                                "v": 3}, "type": "kbar", "pair": pair, "SERVER": "V2"})
+
+
+def test_subscriptions_of_a_pair_share_one_connection():
+    subscriptions = [kbar_subscription(p) for p in PAIRS] + [depth_subscription(p) for p in PAIRS]
+    manager = WebSocketConnectionManager(subscriptions, print, connections=2)
+    assert [conn.pairs for conn in manager.connections] == [["bnb_usdt", "eth_usdt", "xrp_usdt"],
+                                                            ["btc_usdt", "sol_usdt"]]
+    for conn in manager.connections:
+        assert sorted(subscription_pair(sub) for sub in conn.subscriptions) == sorted(conn.pairs * 2)
+    # never more sockets than pairs
+    assert len(WebSocketConnectionManager(subscriptions[:2], print, connections=4).connections) == 2
+
+
+async def serve(handler):
+    server = await websockets.serve(handler, "127.0.0.1", 0)
+    return server, f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}/ws/V2/"
+
+
+async def stop(manager, client):
+    await manager.stop()
+    await asyncio.wait_for(client, 2)
+
+
+async def dropped_once_session():
+    events, received, sessions, done = [], [], [], asyncio.Event()
+
+    async def handler(ws):
+        session = len(sessions)
+        sessions.append([])
+        async for msg in ws:
+            data = json.loads(msg)
+            sessions[session].append(data)
+            events.append(("subscribe", session, data["subscribe"]))
+            if len(sessions[session]) < 2:
+                continue
+            await ws.send(kbar_frame("btc_usdt"))
+            if session == 0:
+                await ws.close()
+                return
+            # the server's keepalive ping is answered
+            await ws.send(json.dumps({"action": "ping", "ping": "0ca8f854"}))
+            sessions[session].append(json.loads(await ws.recv()))
+            done.set()
+
+    async def backfill(pairs, disconnected_at):
+        events.append(("backfill", tuple(pairs), disconnected_at))
+        await asyncio.sleep(0.05)  # a REST round trip
+        events.append(("backfilled",))
+
+    server, url = await serve(handler)
+    manager = WebSocketConnectionManager([kbar_subscription("btc_usdt"), depth_subscription("btc_usdt")],
+                                         received.append, connections=1, url=url, base_backoff=0.01,
+                                         on_reconnect=backfill)
+    started = int(time.time() * 1000)
+    client = asyncio.create_task(manager.run())
+    await asyncio.wait_for(done.wait(), 5)
+    await stop(manager, client)
+    server.close()
+    await server.wait_closed()
+    return started, events, received, sessions, manager
+
+
+def test_reconnect_backfills_before_resubscribing():
+    started, events, received, sessions, manager = asyncio.run(dropped_once_session())
+    assert [name for name, *_ in events] == ["subscribe", "subscribe", "backfill", "backfilled", "subscribe",
+                                              "subscribe"]
+    _, pairs, disconnected_at = events[2]
+    assert pairs == ("btc_usdt",) and started <= disconnected_at <= int(time.time() * 1000)
+    # both sessions carried every subscription
+    assert [sorted(sub["subscribe"] for sub in session[:2]) for session in sessions] == [["depth", "kbar"]] * 2
+    assert sessions[1][2] == {"action": "pong", "pong": "0ca8f854"}
+    assert [data["pair"] for data in received] == ["btc_usdt", "btc_usdt"]
+    assert manager.connections[0].reconnects == 1
+
+
+async def garbage_frame_session():
+    sessions, received, done = [], [], asyncio.Event()
+
+    async def handler(ws):
+        sessions.append(json.loads(await ws.recv()))
+        # a plain-text error, a list, a ping without its id, then a good frame
+        for frame in ("upstream timeout", "[1, 2]", '{"action": "ping"}', kbar_frame("btc_usdt")):
+            await ws.send(frame)
+        await done.wait()
+
+    def on_message(data):
+        received.append(data)
+        done.set()
+
+    server, url = await serve(handler)
+    manager = WebSocketConnectionManager([kbar_subscription("btc_usdt")], on_message, connections=1, url=url,
+                                         base_backoff=0.01)
+    client = asyncio.create_task(manager.run())
+    await asyncio.wait_for(done.wait(), 5)
+    stats = manager.stats()[0]
+    await stop(manager, client)
+    server.close()
+    await server.wait_closed()
+    return sessions, received, stats
+
+
+def test_bad_frames_are_skipped_without_reconnecting():
+    sessions, received, stats = asyncio.run(garbage_frame_session())
+    assert len(sessions) == 1 and [data["pair"] for data in received] == ["btc_usdt"]
+    assert stats["connected"] and stats["reconnects"] == 0
+    assert stats["messages"] == 4 and stats["bad_frames"] == 3
+
+
+async def silent_server_session():
+    sessions, reconnected = [], asyncio.Event()
+
+    async def handler(ws):
+        # accepts the subscriptions, then goes quiet and ignores pings
+        sessions.append([])
+        if len(sessions) > 1:
+            reconnected.set()
+        async for msg in ws:
+            sessions[-1].append(json.loads(msg))
+
+    server, url = await serve(handler)
+    manager = WebSocketConnectionManager([kbar_subscription("btc_usdt")], print, connections=1, url=url,
+                                         ping_interval=0.05, ping_timeout=0.2, base_backoff=0.01)
+    client = asyncio.create_task(manager.run())
+    started = time.monotonic()
+    await asyncio.wait_for(reconnected.wait(), 5)
+    elapsed = time.monotonic() - started
+    await stop(manager, client)
+    server.close()
+    await server.wait_closed()
+    return sessions, elapsed, manager
+
+
+def test_silent_connection_is_pinged_then_dropped():
+    sessions, elapsed, manager = asyncio.run(silent_server_session())
+    first = sessions[0]
+    assert first[0] == kbar_subscription("btc_usdt")
+    pings = [msg for msg in first[1:] if msg["action"] == "ping"]
+    # a ping every ping_interval of silence until ping_timeout ran out
+    assert len(pings) == len(first) - 1 >= 2
+    assert elapsed >= 0.2
+    assert manager.connections[0].reconnects >= 1
+
+
+def test_backoff_doubles_with_jitter(monkeypatch):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]  # nothing listens here once closed
+    manager = WebSocketConnectionManager([kbar_subscription("btc_usdt")], print, connections=1,
+                                         url=f"ws://127.0.0.1:{port}/ws/V2/", base_backoff=1, max_backoff=5)
+    delays, real_sleep = [], asyncio.sleep
+
+    async def fake_sleep(delay):
+        delays.append(delay)
+        if len(delays) == 6:
+            manager.running = False
+        await real_sleep(0)
+
+    monkeypatch.setattr(ws_connection_manager.random, "uniform", random.Random(7).uniform)
+    monkeypatch.setattr(ws_connection_manager.asyncio, "sleep", fake_sleep)
+    asyncio.run(manager.run())
+    monkeypatch.undo()
+
+    jitter = random.Random(7)
+    assert delays == [min(5, 2 ** k) * jitter.uniform(0.5, 1.5) for k in range(6)]
+    assert len(set(round(d / min(5, 2 ** k), 6) for k, d in enumerate(delays))) == 6
+    assert manager.connections[0].reconnects == 0
+
+
+if __name__ == "__main__":
+    import pytest
+    test_subscriptions_of_a_pair_share_one_connection()
+    test_reconnect_backfills_before_resubscribing()
+    test_bad_frames_are_skipped_without_reconnecting()
+    test_silent_connection_is_pinged_then_dropped()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_backoff_doubles_with_jitter(monkeypatch)
+    print("✅ ws connection manager tests passed")
@@ -0,0 +1,63 @@
+import importlib
+import json
+import sys
+from my_modules import ws_router
+from my_modules.ws_router import ChannelRouter, channel_key
+
+KBAR = {"kbar": {"c": 104856.51, "slot": "1min"}, "type": "kbar", "pair": "btc_usdt", "SERVER": "V2"}
+
+
+def test_channel_key_reads_each_frame_style():
+    assert channel_key(KBAR) == ("kbar", "btc_usdt")
+    assert channel_key({"type": "tick"}) == ("tick", None)
+    assert channel_key({"subscribe": "ticker.eth_usdt", "data": {}}) == ("ticker", "eth_usdt")
+    assert channel_key({"subscribe": "status"}) == (None, None)
+    assert channel_key({"action": "ping", "ping": "0ca8f854"}) == ("ping", None)
+    assert channel_key({}) == (None, None)
+
+
+def test_dispatch_routes_by_channel_and_pair():
+    seen = []
+    router = ChannelRouter()
+    router.register_pairs("kbar", ["btc_usdt", "eth_usdt"], lambda data: seen.append(("kbar", data["pair"])) or 1)
+    router.register("depth", None, lambda data: seen.append(("depth", data["pair"])) or 2)
+    router.register("depth", "btc_usdt", lambda data: seen.append(("btc depth", data["pair"])) or 3)
+
+    assert router.dispatch(KBAR) == 1
+    assert router.dispatch(dict(KBAR, pair="eth_usdt")) == 1
+    # a pair handler wins over the channel's catch-all
+    assert router.dispatch({"type": "depth", "pair": "btc_usdt"}) == 3
+    assert router.dispatch({"type": "depth", "pair": "sol_usdt"}) == 2
+    assert seen == [("kbar", "btc_usdt"), ("kbar", "eth_usdt"), ("btc depth", "btc_usdt"), ("depth", "sol_usdt")]
+
+    # unknown channel, unknown pair of a channel without a catch-all, and frames with neither
+    assert router.dispatch({"type": "trade", "pair": "btc_usdt"}) is None
+    assert router.dispatch(dict(KBAR, pair="sol_usdt")) is None
+    assert router.dispatch({"action": "pong"}) is None
+    assert router.unrouted == 3 and len(seen) == 4
+
+
+def test_dispatch_raw_falls_back_to_stdlib_json(monkeypatch):
+    # no fast decoder installed: None in sys.modules makes the import fail
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    monkeypatch.setitem(sys.modules, "ujson", None)
+    try:
+        fallback = importlib.reload(ws_router)
+        assert fallback.DECODER == "json" and fallback.loads is json.loads
+        router = fallback.ChannelRouter()
+        router.register("kbar", "btc_usdt", lambda data: data["kbar"]["c"])
+        assert router.dispatch_raw(json.dumps(KBAR)) == 104856.51
+        assert router.dispatch_raw(json.dumps(KBAR).encode()) == 104856.51
+        assert router.dispatch_raw('{"action":"ping","ping":"0ca8f854"}') is None and router.unrouted == 1
+    finally:
+        monkeypatch.undo()
+        importlib.reload(ws_router)
+
+
+if __name__ == "__main__":
+    import pytest
+    test_channel_key_reads_each_frame_style()
+    test_dispatch_routes_by_channel_and_pair()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_dispatch_raw_falls_back_to_stdlib_json(monkeypatch)
+    print("✅ ws router tests passed")
@@ -0,0 +1,51 @@
+"""
+Walk-forward optimization of IchimokuDayStrategy / IndicatorCalculator
+parameters: optimize on each rolling train window, trade the winner on the
+next test window and report the stitched out-of-sample result.
+
+    python walkforward.py --pairs btc_usdt eth_usdt --days 180 --train-days 60 --test-days 15
+    python walkforward.py --random 100 --workers 8 --rank-by Expectancy
+"""
+import argparse
+import pandas as pd
+from my_modules.backtester import ARCHIVE, KLINE_URL, TIMEFRAME_MAP_REST
+from my_modules.candle_archive import CandleArchive
+from my_modules.dashboard_generator import generate_dashboard
+from my_modules.kline_downloader import KlineCache, KlineDownloader
+from my_modules.metrics import MetricsAccumulator
+from my_modules.param_sweep import PARAM_SPACE, grid_search, random_search
+from my_modules.walk_forward import run_walk_forward
+from sweep import load_candles
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pairs", nargs="+", default=["btc_usdt", "eth_usdt"])
+    parser.add_argument("--archive", default=ARCHIVE.root)
+    parser.add_argument("--cache", default="kline_cache")
+    parser.add_argument("--no-download", action="store_true")
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--train-days", type=int, default=60)
+    parser.add_argument("--test-days", type=int, default=15)
+    parser.add_argument("--random", type=int, default=0, help="sample this many parameter sets instead of the grid")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", default="Sharpe Ratio")
+    parser.add_argument("--output", default="walk_forward.csv")
+    args = parser.parse_args()
+
+    downloader = None if args.no_download else KlineDownloader(TIMEFRAME_MAP_REST, KlineCache(args.cache),
+                                                                base_url=KLINE_URL)
+    candles = load_candles(CandleArchive(args.archive), args.pairs, args.days, downloader)
+    if not candles:
+        raise SystemExit("No candle history to walk forward over")
+    param_sets = random_search(PARAM_SPACE, args.random, args.seed) if args.random else grid_search(PARAM_SPACE)
+    oos = MetricsAccumulator()
+    table, oos_log = run_walk_forward(candles, param_sets, args.train_days, args.test_days, args.workers, args.rank_by,
+                                      stats=oos)
+    table.to_csv(args.output, index=False)
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(table)
+    if oos_log:
+        pd.DataFrame(oos_log).to_csv(args.output.replace(".csv", "_oos_trades.csv"), index=False)
+        generate_dashboard(oos_log, output_html=args.output.replace(".csv", "_oos.html"), stats=oos.snapshot())
+    print(f"✅ {len(table)} windows, {len(oos_log)} out-of-sample trades → {args.output}")